@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+"""流水线基准：生成合成语料（不同长度的PDF），用本地HTTP服务和延迟可配置的假LLM，分别测量各阶段及完整流水线的吞吐量、p50/p95延迟和峰值内存"""
+import os
+import sys
+import json
+import math
+import time
+import zlib
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 可单独测量的场景：各阶段及完整流水线
+CASES = ["crawl", "download", "parse", "analyze", "store", "pipeline"]
+
+# 语料格式变化时递增，使旧的语料目录重新生成
+CORPUS_VERSION = "1"
+
+_WORDS = (
+    "skill evolution agent policy reward learning transfer meta continual lifelong curriculum "
+    "exploration hierarchical option embedding representation memory planning model world "
+    "environment benchmark task adaptation gradient network transformer language robot control "
+    "imitation demonstration self supervised contrastive intrinsic motivation novelty replay "
+    "buffer offline online sample efficiency generalization composition library primitive"
+).split()
+
+_SURNAMES = (
+    "Zhang Wang Li Liu Chen Yang Huang Zhao Wu Zhou Smith Johnson Brown Garcia Miller Davis "
+    "Martin Lee Kim Park Nguyen Silva Rossi Muller Schmidt Dubois Tanaka Sato Ivanov Cohen"
+).split()
+
+# 假LLM返回的固定格式响应，与分析器的解析逻辑一致
+_FAKE_RESPONSE = """【研究问题】：
+合成语料中的技能演化问题
+
+【提出方法】：
+基准测试用的占位方法
+
+【关键技术】：
+1. 强化学习
+2. 技能迁移
+
+【实验效果】：
+无
+
+【局限性】：
+1. 合成数据
+
+【是否开源】：
+否
+"""
+
+# ---------- 合成语料 ----------
+
+def paper_pages(index, seed):
+    """按论文序号确定性地生成各页文本行，页数服从对数正态分布（1-60页）"""
+    rng = random.Random(f"{seed}:{index}:pages")
+    page_count = min(60, max(1, int(round(rng.lognormvariate(math.log(10), 0.6)))))
+    pages = []
+    for _ in range(page_count):
+        lines = []
+        for _ in range(rng.randint(30, 45)):
+            lines.append(" ".join(rng.choice(_WORDS) for _ in range(rng.randint(8, 12))))
+        pages.append(lines)
+    return pages
+
+def paper_text(index, seed):
+    """论文全文（与PDF中的文本一致），用于不经过下载和解析的阶段"""
+    return "\n\n".join("\n".join(lines) for lines in paper_pages(index, seed))
+
+def make_paper(index, seed):
+    """生成单篇论文的元数据，标题互不相似，避免被去重合并"""
+    rng = random.Random(f"{seed}:{index}:meta")
+    words = rng.sample(_WORDS, 6)
+    return {
+        "title": f"Synthetic Study {index}: {' '.join(words).title()}",
+        "authors": [f"{rng.choice('ABCDEFGHJKLMNPRSTW')}. {rng.choice(_SURNAMES)}" for _ in range(rng.randint(1, 5))],
+        "summary": " ".join(rng.choice(_WORDS) for _ in range(60)),
+        "publish_year": rng.randint(2020, 2025),
+        "source": "arXiv",
+        "arxiv_id": f"{2000 + index // 100000}.{index % 100000:05d}v1",
+        "categories": ["cs.AI"],
+        "primary_category": "cs.AI"
+    }
+
+def _escape_pdf_text(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def make_pdf(pages):
+    """生成只含文本的最小PDF（内容流使用FlateDecode压缩）"""
+    objects = []
+    page_ids = []
+    # 对象编号：1 目录，2 页树，3 字体，之后每页两个对象（页面、内容流）
+    next_id = 4
+    for lines in pages:
+        stream = ["BT", "/F1 9 Tf", "11 TL", "50 760 Td"]
+        for line in lines:
+            stream.append(f"({_escape_pdf_text(line)}) Tj T*")
+        stream.append("ET")
+        content = zlib.compress("\n".join(stream).encode("latin-1"))
+        page_id, content_id = next_id, next_id + 1
+        next_id += 2
+        page_ids.append(page_id)
+        objects.append((page_id, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode("latin-1")))
+        objects.append((content_id, (
+            f"<< /Length {len(content)} /Filter /FlateDecode >>\nstream\n".encode("latin-1") + content + b"\nendstream"
+        )))
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects = [
+        (1, b"<< /Type /Catalog /Pages 2 0 R >>"),
+        (2, f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode("latin-1")),
+        (3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    ] + objects
+    
+    output = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = {}
+    for object_id, body in objects:
+        offsets[object_id] = len(output)
+        output += f"{object_id} 0 obj\n".encode("latin-1") + body + b"\nendobj\n"
+    xref_offset = len(output)
+    output += f"xref\n0 {next_id}\n0000000000 65535 f \n".encode("latin-1")
+    for object_id in range(1, next_id):
+        output += f"{offsets[object_id]:010d} 00000 n \n".encode("latin-1")
+    output += f"trailer\n<< /Size {next_id} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode("latin-1")
+    return bytes(output)
+
+def ensure_corpus(workdir, size, seed):
+    """生成（或复用）指定规模的语料：论文元数据和PDF文件"""
+    corpus_dir = os.path.join(workdir, f"corpus_{size}")
+    meta_path = os.path.join(corpus_dir, "corpus.json")
+    if os.path.exists(meta_path):
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get("version") == CORPUS_VERSION and meta.get("seed") == seed:
+            return corpus_dir, meta
+        shutil.rmtree(corpus_dir)
+    
+    started = time.perf_counter()
+    pdf_dir = os.path.join(corpus_dir, "pdf")
+    os.makedirs(pdf_dir, exist_ok=True)
+    total_bytes = 0
+    total_pages = 0
+    for index in range(size):
+        pages = paper_pages(index, seed)
+        data = make_pdf(pages)
+        with open(os.path.join(pdf_dir, f"{index}.pdf"), 'wb') as f:
+            f.write(data)
+        total_bytes += len(data)
+        total_pages += len(pages)
+    meta = {
+        "version": CORPUS_VERSION,
+        "seed": seed,
+        "size": size,
+        "pdf_bytes": total_bytes,
+        "pages": total_pages
+    }
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    print(f"生成语料 {size} 篇: {total_pages} 页, {total_bytes / 1024 / 1024:.1f} MB, 耗时 {time.perf_counter() - started:.1f} 秒")
+    return corpus_dir, meta
+
+# ---------- 本地HTTP服务 ----------
+
+def start_http_server(root, latency_ms):
+    """在后台线程启动只读文件服务（PDF以application/pdf返回），返回 (服务, 基础URL)"""
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        
+        def do_GET(self):
+            path = os.path.normpath(os.path.join(root, self.path.split("?", 1)[0].lstrip("/")))
+            if not path.startswith(root) or not os.path.isfile(path):
+                self.send_error(404)
+                return
+            if latency_ms:
+                time.sleep(latency_ms / 1000.0)
+            with open(path, 'rb') as f:
+                data = f.read()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/pdf" if path.endswith(".pdf") else "application/octet-stream")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        
+        def log_message(self, format, *args):
+            pass
+    
+    class Server(ThreadingHTTPServer):
+        # 异步下载同时建立大量连接，加大监听队列避免连接被丢弃后重传
+        request_queue_size = 1024
+        daemon_threads = True
+    
+    server = Server(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+# ---------- 假LLM ----------
+
+class FakeLLM:
+    """延迟服从指定分布的假LLM模型（fixed / uniform / lognormal），返回固定格式的分析结果"""
+    
+    def __init__(self, latency_ms, distribution="lognormal", sigma=0.5, seed=0):
+        self.latency_ms = latency_ms
+        self.distribution = distribution
+        self.sigma = sigma
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+    
+    def _delay(self):
+        with self._lock:
+            if self.distribution == "fixed":
+                return self.latency_ms
+            if self.distribution == "uniform":
+                return self._rng.uniform(0, 2 * self.latency_ms)
+            # 对数正态分布，中位数为 latency_ms
+            return self._rng.lognormvariate(math.log(max(self.latency_ms, 1e-3)), self.sigma)
+    
+    def generate(self, prompt):
+        time.sleep(self._delay() / 1000.0)
+        return _FAKE_RESPONSE
+
+# ---------- 子进程：执行单个场景 ----------
+
+def _peak_rss_mb():
+    """当前进程及已回收子进程（如解析进程池）的峰值常驻内存（MB）"""
+    import resource
+    self_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # macOS 返回字节，Linux 返回KB
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(self_kb / scale, 1), round(children_kb / scale, 1)
+
+def _configure(run_dir, args):
+    """把数据目录指向本次运行的临时目录，关闭缓存、录制/回放和网络延迟"""
+    from src.core.config import config_manager
+    settings = {
+        "database.sqlite.db_path": os.path.join(run_dir, "papers.db"),
+        "pdf.storage_path": os.path.join(run_dir, "pdf"),
+        "pdf_parsing.text_store_path": os.path.join(run_dir, "text"),
+        "pdf_parsing.default_parser": "pymupdf",
+        "report.output_path": os.path.join(run_dir, "reports"),
+        "system.cache.enabled": False,
+        "sources.http_cache.enabled": False,
+        "system.metrics.output_path": os.path.join(run_dir, "metrics"),
+        "system.pipeline.streaming": True,
+        "system.replay.mode": "off",
+        "sources.request_delay": [0, 0],
+        # 本地HTTP服务不需要礼貌限速，不限制单个主机的并发数和连接数
+        "sources.politeness.concurrency": 1024,
+        "sources.async_http.limit_per_host": 1024,
+        "sources.incremental": False,
+        "sources.arxiv.enabled": True,
+        "sources.arxiv.max_results": args.size,
+        "sources.google_scholar.enabled": False,
+        "research.domains": [],
+        "llm.spo.enabled": False,
+        "system.pipeline.stages.download.executor": args.download_executor
+    }
+    for key, value in settings.items():
+        config_manager.set(key, value)
+    return config_manager
+
+def run_case(args):
+    """在当前进程中执行一个场景，返回结果字典"""
+    import logging
+    # 基准只输出结果，控制器的日志配置在已有处理器时不生效
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+    os.environ["DINHUI_REPLAY"] = "off"
+    sys.path.insert(0, PROJECT_ROOT)
+    
+    run_dir = tempfile.mkdtemp(prefix=f"run_{args.size}_{args.child}_", dir=args.workdir)
+    _configure(run_dir, args)
+    corpus_dir = os.path.join(args.workdir, f"corpus_{args.size}")
+    papers = [make_paper(index, args.seed) for index in range(args.size)]
+    for index, paper in enumerate(papers):
+        paper["pdf_url"] = f"{args.base_url}/corpus_{args.size}/pdf/{index}.pdf"
+    
+    # 爬取来源替换为合成语料，LLM替换为假模型
+    from src.crawler.arxiv import ArxivCrawler
+    from src.llm.analyzer import LLMAnalyzer
+    ArxivCrawler.iter_papers = lambda self: (dict(paper) for paper in papers)
+    fake_llm = FakeLLM(args.llm_latency_ms, args.llm_latency_dist, args.llm_latency_sigma, seed=args.seed)
+    LLMAnalyzer._initialize_model = lambda self: fake_llm
+    
+    from src.core.controller import Controller
+    from src.crawler.utils import canonical_paper_id
+    controller = Controller()
+    from src.pdf.text_store import TextStore
+    controller.text_store = TextStore(os.path.join(run_dir, "text"))
+    
+    stage = args.child
+    # 各阶段的输入直接由语料构造，不计入耗时
+    if stage == "parse":
+        for index, paper in enumerate(papers):
+            paper["pdf_path"] = os.path.join(corpus_dir, "pdf", f"{index}.pdf")
+    elif stage in ("analyze", "store"):
+        analysis = LLMAnalyzer()._parse_response(_FAKE_RESPONSE) if stage == "store" else {}
+        for index, paper in enumerate(papers):
+            paper["content_path"] = controller.text_store.put(canonical_paper_id(paper), paper_text(index, args.seed))
+            paper.update(analysis)
+    
+    started = time.perf_counter()
+    if stage == "pipeline":
+        ok = controller.run_pipeline(streaming=True)
+        succeeded = controller.metrics.summary()["stages"].get("store", {}).get("succeeded", 0)
+    elif stage == "crawl":
+        ok = True
+        succeeded = sum(1 for _ in controller.metrics.iter_timed("crawl", controller._iter_crawled_papers()))
+    else:
+        parse_pool = controller._create_parse_pool() if stage == "parse" else None
+        try:
+            ok = True
+            async_handler = controller._create_async_stage_handler(stage, parse_pool)
+            if async_handler is not None:
+                succeeded = len(controller._run_stage_batch_async(stage, async_handler, papers))
+            else:
+                handler = controller._create_stage_handler(stage, parse_pool)
+                succeeded = len(controller._run_stage_batch(stage, handler, papers))
+        finally:
+            if parse_pool is not None:
+                parse_pool.shutdown()
+    elapsed = time.perf_counter() - started
+    
+    summary = controller.metrics.summary()
+    peak_rss, children_peak_rss = _peak_rss_mb()
+    result = {
+        "ok": bool(ok),
+        "papers": args.size,
+        "succeeded": succeeded,
+        "wall_seconds": round(elapsed, 3),
+        "papers_per_second": round(succeeded / elapsed, 3) if elapsed > 0 else 0.0,
+        "peak_rss_mb": peak_rss,
+        "children_peak_rss_mb": children_peak_rss,
+        "stages": {
+            name: {
+                "succeeded": values["succeeded"],
+                "failed": values["failed"],
+                "items_per_second": values["items_per_second"],
+                "p50": values["latency"]["p50"],
+                "p95": values["latency"]["p95"],
+                "queue_wait_p95": values["queue_wait"]["p95"]
+            }
+            for name, values in summary["stages"].items()
+        }
+    }
+    stage_latency = result["stages"].get(stage)
+    if stage_latency:
+        result["p50"] = stage_latency["p50"]
+        result["p95"] = stage_latency["p95"]
+    if not args.keep:
+        shutil.rmtree(run_dir, ignore_errors=True)
+    return result
+
+# ---------- 主进程：生成语料、启动服务并逐个场景运行 ----------
+
+def measure(case, size, base_url, args):
+    """在新的子进程中运行场景，峰值内存互不影响"""
+    command = [
+        sys.executable, os.path.abspath(__file__),
+        "--child", case,
+        "--size", str(size),
+        "--workdir", args.workdir,
+        "--base-url", base_url,
+        "--seed", str(args.seed),
+        "--llm-latency-ms", str(args.llm_latency_ms),
+        "--llm-latency-dist", args.llm_latency_dist,
+        "--llm-latency-sigma", str(args.llm_latency_sigma),
+        "--download-executor", args.download_executor
+    ]
+    if args.keep:
+        command.append("--keep")
+    output = subprocess.run(
+        command,
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        env=dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [PROJECT_ROOT, os.environ.get("PYTHONPATH")])))
+    )
+    lines = output.stdout.strip().splitlines()
+    if output.returncode != 0 or not lines:
+        return {"ok": False, "error": (output.stderr.strip().splitlines() or ["无输出"])[-1]}
+    return json.loads(lines[-1])
+
+def compare(results, baseline, tolerance):
+    """与基线比较吞吐量和峰值内存，返回回退项列表"""
+    regressions = []
+    for size, cases in results.items():
+        for case, result in cases.items():
+            base = baseline.get(size, {}).get(case)
+            if not base or not base.get("ok") or not result.get("ok"):
+                continue
+            limit = base["papers_per_second"] * (1 - tolerance)
+            if result["papers_per_second"] < limit:
+                regressions.append(
+                    f"{case}@{size}: {result['papers_per_second']} 篇/秒 < {round(limit, 3)} (基线 {base['papers_per_second']})"
+                )
+            limit = base["peak_rss_mb"] * (1 + tolerance)
+            if result["peak_rss_mb"] > limit:
+                regressions.append(f"{case}@{size}: 峰值内存 {result['peak_rss_mb']}MB > {round(limit, 1)}MB (基线 {base['peak_rss_mb']}MB)")
+    return regressions
+
+def _git_commit():
+    """当前提交，便于跨提交比较结果"""
+    try:
+        output = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True)
+        return output.stdout.strip() or None
+    except Exception:
+        return None
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='Benchmark pipeline stages on synthetic corpora')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000], help='Corpus sizes (papers)')
+    parser.add_argument('--cases', type=str, nargs='+', choices=CASES, default=CASES, help='Stages to benchmark')
+    parser.add_argument('--workdir', type=str, help='Directory for corpora and run data (reused across runs)')
+    parser.add_argument('--seed', type=int, default=42, help='Corpus and latency seed')
+    parser.add_argument('--llm-latency-ms', type=float, default=50.0, help='Median fake LLM latency in ms')
+    parser.add_argument('--llm-latency-dist', type=str, choices=['fixed', 'uniform', 'lognormal'], default='lognormal',
+                        help='Fake LLM latency distribution')
+    parser.add_argument('--llm-latency-sigma', type=float, default=0.5, help='Sigma of the lognormal distribution')
+    parser.add_argument('--http-latency-ms', type=float, default=0.0, help='Latency added by the local HTTP server')
+    parser.add_argument('--download-executor', type=str, choices=['thread', 'async'], default='thread',
+                        help='Executor for the download stage (async needs aiohttp)')
+    parser.add_argument('--keep', action='store_true', help='Keep run directories')
+    parser.add_argument('--output', type=str, help='Write results to this JSON file')
+    parser.add_argument('--baseline', type=str, help='Compare against a previous results file')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative regression')
+    parser.add_argument('--child', type=str, choices=CASES, help=argparse.SUPPRESS)
+    parser.add_argument('--size', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--base-url', type=str, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        print(json.dumps(run_case(args)))
+        return
+    
+    created_workdir = args.workdir is None
+    args.workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="bench_pipeline_"))
+    os.makedirs(args.workdir, exist_ok=True)
+    server, base_url = start_http_server(args.workdir, args.http_latency_ms)
+    
+    results = {}
+    corpora = {}
+    try:
+        for size in args.sizes:
+            corpus_dir, corpora[str(size)] = ensure_corpus(args.workdir, size, args.seed)
+            results[str(size)] = {}
+            for case in args.cases:
+                result = measure(case, size, base_url, args)
+                results[str(size)][case] = result
+                if not result.get("ok"):
+                    print(f"{case:9s} {size:6d}  失败: {result.get('error', '')}")
+                    continue
+                # 完整流水线没有单篇端到端延迟，各阶段延迟见结果文件
+                latency = f"p50 {result['p50']:7.4f}s  p95 {result['p95']:7.4f}s" if "p50" in result else f"{'':26s}"
+                print(
+                    f"{case:9s} {size:6d}  {result['papers_per_second']:9.2f} 篇/秒  {latency}  "
+                    f"峰值内存 {result['peak_rss_mb']:7.1f} MB (子进程 {result['children_peak_rss_mb']:.1f} MB)"
+                )
+    finally:
+        server.shutdown()
+        if created_workdir and not args.keep:
+            shutil.rmtree(args.workdir, ignore_errors=True)
+    
+    if args.output:
+        report = {
+            "meta": {
+                "commit": _git_commit(),
+                "timestamp": datetime.now().isoformat(),
+                "python": sys.version.split()[0],
+                "platform": sys.platform,
+                "cpu_count": os.cpu_count(),
+                "seed": args.seed,
+                "llm_latency": {"median_ms": args.llm_latency_ms, "distribution": args.llm_latency_dist, "sigma": args.llm_latency_sigma},
+                "http_latency_ms": args.http_latency_ms,
+                "download_executor": args.download_executor,
+                "corpora": corpora
+            },
+            "results": results
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存: {args.output}")
+    
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline.get("results", baseline), args.tolerance)
+        if regressions:
+            print("\n性能回退:")
+            for item in regressions:
+                print(f"  - {item}")
+            sys.exit(1)
+        print("\n与基线相比没有回退")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""启动耗时基准：在全新的解释器中测量各入口的导入耗时，防止重依赖回到导入路径上"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+import statistics
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 各入口在导入阶段执行的语句
+ENTRY_POINTS = {
+    "run_script": "import runpy; runpy.run_path('scripts/run.py', run_name='bench_startup')",
+    "db_query": "from src.database.db_manager import DatabaseManager",
+    "core_package": "import src.core",
+    "crawler_package": "import src.crawler",
+    "pdf_package": "import src.pdf",
+    "report_package": "import src.report"
+}
+
+# 这些模块不应在上述入口的导入阶段被加载
+HEAVY_MODULES = ["schedule", "scholarly", "fake_useragent", "arxiv", "fitz", "matplotlib", "jinja2", "requests"]
+
+_PROBE = """
+import sys, time, json
+_t = time.perf_counter()
+_error = None
+try:
+    exec({statement!r})
+except Exception as e:
+    _error = f"{{type(e).__name__}}: {{e}}"
+_elapsed = time.perf_counter() - _t
+print(json.dumps({{
+    "seconds": _elapsed,
+    "modules": len(sys.modules),
+    "heavy": [m for m in {heavy!r} if m in sys.modules],
+    "error": _error
+}}))
+"""
+
+def measure(name, statement, repeat):
+    """在子进程中重复测量某个入口的导入耗时"""
+    samples = []
+    last = None
+    for _ in range(repeat):
+        code = _PROBE.format(statement=statement, heavy=HEAVY_MODULES)
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            env=dict(os.environ, PYTHONPATH=PROJECT_ROOT)
+        )
+        last = json.loads(output.stdout.strip().splitlines()[-1])
+        samples.append(last["seconds"])
+    return {
+        "median_ms": round(statistics.median(samples) * 1000, 2),
+        "min_ms": round(min(samples) * 1000, 2),
+        "modules": last["modules"],
+        "heavy_modules": last["heavy"],
+        "error": last["error"]
+    }
+
+def compare(results, baseline, tolerance, slack_ms):
+    """与基线比较，返回回退项列表"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        limit = base["median_ms"] * (1 + tolerance) + slack_ms
+        if result["median_ms"] > limit:
+            regressions.append(f"{name}: {result['median_ms']}ms > {round(limit, 2)}ms (基线 {base['median_ms']}ms)")
+        new_heavy = set(result["heavy_modules"]) - set(base.get("heavy_modules", []))
+        if new_heavy:
+            regressions.append(f"{name}: 导入阶段新增重依赖 {sorted(new_heavy)}")
+    return regressions
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='Benchmark import time of entry points')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per entry point')
+    parser.add_argument('--output', type=str, help='Write results to this JSON file')
+    parser.add_argument('--baseline', type=str, help='Compare against a previous results file')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative slowdown')
+    parser.add_argument('--slack-ms', type=float, default=20.0, help='Allowed absolute slowdown in ms')
+    args = parser.parse_args()
+    
+    results = {}
+    for name, statement in ENTRY_POINTS.items():
+        results[name] = measure(name, statement, args.repeat)
+        result = results[name]
+        heavy = ", ".join(result["heavy_modules"]) or "-"
+        print(f"{name:16s} {result['median_ms']:8.2f} ms  modules={result['modules']:4d}  heavy={heavy}")
+        if result["error"]:
+            print(f"{'':16s} 导入出错: {result['error']}")
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存: {args.output}")
+    
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.slack_ms)
+        if regressions:
+            print("\n启动耗时回退:")
+            for item in regressions:
+                print(f"  - {item}")
+            sys.exit(1)
+        print("\n与基线相比没有回退")
+
+if __name__ == "__main__":
+    main()
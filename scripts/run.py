@@ -1,9 +1,11 @@
 #!/usr/bin/env python3
+import os
 import sys
 import argparse
 import logging
-from src.core.controller import controller
+from src.core.controller import get_controller
 from src.core.config import config_manager
+from src.core.replay import REPLAY_MODE_ENV
 
 # 配置日志
 logging.basicConfig(
@@ -18,10 +20,18 @@ logging.basicConfig(
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(description='Run the dinhui-range-search system')
+    parser.add_argument('command', nargs='?', default='run', choices=['run', 'enqueue', 'worker'],
+                        help='run: full pipeline; enqueue: crawl into the ledger only; worker: process one stage from the ledger')
+    parser.add_argument('--stage', type=str, choices=['download', 'parse', 'analyze', 'store'], help='Stage processed by a worker')
+    parser.add_argument('--once', action='store_true', help='Worker exits when no papers are left to claim')
     parser.add_argument('--domain', type=str, help='Research domain')
+    parser.add_argument('--domains', type=str, nargs='+', help='Run several research domains (names from research.domains or new names)')
     parser.add_argument('--start-year', type=int, help='Start year')
     parser.add_argument('--end-year', type=int, help='End year')
     parser.add_argument('--keywords', type=str, nargs='+', help='Keywords for search')
+    parser.add_argument('--incremental', action='store_true', help='Only crawl papers newer than the last run')
+    parser.add_argument('--replay', type=str, choices=['off', 'record', 'replay', 'auto'],
+                        help='Record external calls to cassettes, or replay them offline')
     parser.add_argument('--verbose', action='store_true', help='Enable verbose output')
     
     args = parser.parse_args()
@@ -29,25 +39,52 @@ def main():
     # 更新配置
     if args.domain:
         config_manager.set('research.domain', args.domain)
+        # 指定单个领域时不再运行配置中的多领域列表
+        config_manager.set('research.domains', [])
+    if args.domains:
+        # 按名称选取配置中的领域，未配置的名称使用默认关键词和时间范围
+        configured = {}
+        for domain in config_manager.get('research.domains') or []:
+            if isinstance(domain, str):
+                domain = {"name": domain}
+            configured[domain.get("name")] = domain
+        config_manager.set('research.domains', [configured.get(name, {"name": name}) for name in args.domains])
     if args.start_year:
         config_manager.set('research.start_year', args.start_year)
     if args.end_year:
         config_manager.set('research.end_year', args.end_year)
     if args.keywords:
         config_manager.set('research.keywords', args.keywords)
+    if args.replay:
+        # 通过环境变量传给解析进程池等子进程
+        os.environ[REPLAY_MODE_ENV] = args.replay
     
     # 如果启用详细输出，设置日志级别为DEBUG
     if args.verbose:
         for handler in logging.root.handlers:
             handler.setLevel(logging.DEBUG)
     
+    # 只爬取并把新论文记入台账，由各阶段worker处理
+    if args.command == 'enqueue':
+        count = get_controller().enqueue_papers(incremental=args.incremental or None)
+        print(f"新论文入队 {count} 篇")
+        return
+    
+    # worker模式：从台账领取论文，只执行指定阶段
+    if args.command == 'worker':
+        if not args.stage:
+            parser.error('worker requires --stage')
+        if not get_controller().run_worker(args.stage, once=args.once):
+            sys.exit(1)
+        return
+    
     # 运行工作流程
     print(f"开始执行工作流程...")
-    print(f"研究领域: {config_manager.get_research_domain()}")
+    print(f"研究领域: {', '.join(domain['name'] for domain in config_manager.get_domain_specs())}")
     start_year, end_year = config_manager.get_time_range()
     print(f"时间范围: {start_year}-{end_year}")
     
-    success = controller.run_pipeline()
+    success = get_controller().run_pipeline(incremental=args.incremental or None)
     
     if success:
         print("\n工作流程执行完成！")
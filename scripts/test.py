@@ -1,5 +1,7 @@
 #!/usr/bin/env python3
+import os
 import sys
+import argparse
 import logging
 from src.core.config import config_manager
 from src.crawler.arxiv import ArxivCrawler
@@ -8,6 +10,7 @@ from src.pdf.parser import PDFParser
 from src.llm.analyzer import LLMAnalyzer
 from src.database.db_manager import DatabaseManager
 from src.report.generator import ReportGenerator
+from src.core.replay import REPLAY_MODE_ENV
 
 # 配置日志
 logging.basicConfig(
@@ -129,6 +132,14 @@ def test_report_generator():
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description='Test each module of the dinhui-range-search system')
+    parser.add_argument('--replay', type=str, choices=['off', 'record', 'replay', 'auto'],
+                        help='Record external calls to cassettes, or replay them offline')
+    args = parser.parse_args()
+    if args.replay:
+        # 先用 record 录制一次，之后用 replay 离线、可复现地运行
+        os.environ[REPLAY_MODE_ENV] = args.replay
+    
     print("开始测试各个模块...")
     
     # 测试配置模块
@@ -1,6 +1,14 @@
-from .config import ConfigManager, config_manager
-from .controller import Controller, controller
-from .scheduler import Scheduler, scheduler
+import sys
+import types
+import importlib
+
+# 延迟导入：访问属性时才加载对应子模块，导入 src.core 不会读取配置或创建单例
+_LAZY_ATTRS = {
+    "ConfigManager": ".config",
+    "config_manager": ".config",
+    "Controller": ".controller",
+    "Scheduler": ".scheduler"
+}
 
 __all__ = [
     "ConfigManager",
@@ -10,3 +18,31 @@ __all__ = [
     "Scheduler",
     "scheduler"
 ]
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        module = importlib.import_module(_LAZY_ATTRS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+class _CoreModule(types.ModuleType):
+    """controller、scheduler 单例与同名子模块重名，用属性保证始终返回单例"""
+    
+    @property
+    def controller(self):
+        return importlib.import_module(".controller", __name__).get_controller()
+    
+    @controller.setter
+    def controller(self, value):
+        # 导入子模块时导入系统会设置同名属性，忽略即可
+        pass
+    
+    @property
+    def scheduler(self):
+        return importlib.import_module(".scheduler", __name__).get_scheduler()
+    
+    @scheduler.setter
+    def scheduler(self, value):
+        pass
+
+sys.modules[__name__].__class__ = _CoreModule
@@ -0,0 +1,241 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import logging
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+class ArtifactCache:
+    """内容寻址的产物缓存：对象按内容哈希存储，按总大小做LRU淘汰，并统计命中率"""
+    
+    def __init__(self, path="data/cache", max_size_mb=2048, enabled=True):
+        self.path = path
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.enabled = enabled
+        self.objects_path = os.path.join(path, "objects")
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: {"hits": 0, "misses": 0, "puts": 0})
+        self.conn = None
+        if self.enabled:
+            os.makedirs(self.objects_path, exist_ok=True)
+            self.conn = sqlite3.connect(os.path.join(path, "index.db"), check_same_thread=False, timeout=30)
+            self._create_tables()
+    
+    def _create_tables(self):
+        """创建缓存索引表"""
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS cache_objects (
+                    content_hash TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    meta TEXT,  -- JSON格式的附加信息
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_cache_objects_access ON cache_objects(last_access)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_cache_entries_hash ON cache_entries(content_hash)')
+            self.conn.commit()
+    
+    @staticmethod
+    def make_key(*parts):
+        """由若干部分（字符串或字节）生成缓存键"""
+        digest = hashlib.sha256()
+        for part in parts:
+            if part is None:
+                part = ""
+            if not isinstance(part, bytes):
+                part = str(part).encode('utf-8')
+            digest.update(hashlib.sha256(part).digest())
+        return digest.hexdigest()
+    
+    @staticmethod
+    def file_hash(file_path, chunk_size=1024 * 1024):
+        """计算文件内容的SHA-256"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def _object_path(self, content_hash):
+        return os.path.join(self.objects_path, content_hash[:2], content_hash)
+    
+    def get_entry(self, namespace, key, max_age=None):
+        """获取缓存内容及附加信息，未命中返回 (None, None)"""
+        if not self.enabled:
+            return None, None
+        try:
+            with self._lock:
+                row = self.conn.execute(
+                    'SELECT content_hash, meta, created_at FROM cache_entries WHERE namespace = ? AND key = ?',
+                    (namespace, key)
+                ).fetchone()
+            if row and max_age is not None and time.time() - row[2] > max_age:
+                row = None
+            if row:
+                with open(self._object_path(row[0]), 'rb') as f:
+                    data = f.read()
+                with self._lock:
+                    self.conn.execute(
+                        'UPDATE cache_objects SET last_access = ? WHERE content_hash = ?', (time.time(), row[0])
+                    )
+                    self.conn.commit()
+                    self._stats[namespace]["hits"] += 1
+                return data, json.loads(row[1]) if row[1] else None
+        except FileNotFoundError:
+            # 对象文件被外部删除，清理索引
+            self.delete(namespace, key)
+        except Exception as e:
+            logger.warning(f"读取缓存失败: {namespace}/{key[:12]} - {str(e)}")
+        with self._lock:
+            self._stats[namespace]["misses"] += 1
+        return None, None
+    
+    def get(self, namespace, key, max_age=None):
+        """获取缓存内容（字节），未命中返回None"""
+        return self.get_entry(namespace, key, max_age=max_age)[0]
+    
+    def put(self, namespace, key, data, meta=None):
+        """写入缓存内容（字节），返回内容哈希"""
+        if not self.enabled:
+            return None
+        try:
+            content_hash = hashlib.sha256(data).hexdigest()
+            object_path = self._object_path(content_hash)
+            if not os.path.exists(object_path):
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                # 先写临时文件再原子替换，避免并发读到半个文件
+                tmp_path = f"{object_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, object_path)
+            
+            now = time.time()
+            with self._lock:
+                self.conn.execute('''
+                    INSERT INTO cache_objects (content_hash, size, last_access) VALUES (?, ?, ?)
+                    ON CONFLICT(content_hash) DO UPDATE SET last_access = excluded.last_access
+                ''', (content_hash, len(data), now))
+                self.conn.execute('''
+                    INSERT OR REPLACE INTO cache_entries (namespace, key, content_hash, meta, created_at)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (namespace, key, content_hash, json.dumps(meta, ensure_ascii=False) if meta else None, now))
+                self.conn.commit()
+                self._stats[namespace]["puts"] += 1
+            self._evict()
+            return content_hash
+        except Exception as e:
+            logger.warning(f"写入缓存失败: {namespace}/{key[:12]} - {str(e)}")
+            return None
+    
+    def get_text(self, namespace, key, max_age=None):
+        """获取文本缓存"""
+        data = self.get(namespace, key, max_age=max_age)
+        return data.decode('utf-8') if data is not None else None
+    
+    def put_text(self, namespace, key, text, meta=None):
+        """写入文本缓存"""
+        return self.put(namespace, key, text.encode('utf-8'), meta=meta)
+    
+    def get_json(self, namespace, key, max_age=None):
+        """获取JSON缓存"""
+        data = self.get(namespace, key, max_age=max_age)
+        return json.loads(data.decode('utf-8')) if data is not None else None
+    
+    def put_json(self, namespace, key, value, meta=None):
+        """写入JSON缓存"""
+        return self.put(namespace, key, json.dumps(value, ensure_ascii=False).encode('utf-8'), meta=meta)
+    
+    def delete(self, namespace, key):
+        """删除缓存条目"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.conn.execute('DELETE FROM cache_entries WHERE namespace = ? AND key = ?', (namespace, key))
+            self.conn.commit()
+    
+    def total_size(self):
+        """缓存对象总大小（字节）"""
+        if not self.enabled:
+            return 0
+        with self._lock:
+            row = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM cache_objects').fetchone()
+        return row[0]
+    
+    def _evict(self):
+        """超过容量上限时按最近访问时间淘汰对象"""
+        total = self.total_size()
+        if total <= self.max_size:
+            return
+        # 淘汰到上限的90%，避免每次写入都触发淘汰
+        target = int(self.max_size * 0.9)
+        evicted = 0
+        with self._lock:
+            rows = self.conn.execute(
+                'SELECT content_hash, size FROM cache_objects ORDER BY last_access'
+            ).fetchall()
+            for content_hash, size in rows:
+                if total <= target:
+                    break
+                self.conn.execute('DELETE FROM cache_entries WHERE content_hash = ?', (content_hash,))
+                self.conn.execute('DELETE FROM cache_objects WHERE content_hash = ?', (content_hash,))
+                try:
+                    os.remove(self._object_path(content_hash))
+                except FileNotFoundError:
+                    pass
+                total -= size
+                evicted += 1
+            self.conn.commit()
+        if evicted:
+            logger.info(f"缓存淘汰 {evicted} 个对象，当前大小 {total} 字节")
+    
+    def stats(self):
+        """获取命中/未命中统计"""
+        with self._lock:
+            namespaces = {name: dict(values) for name, values in self._stats.items()}
+        for values in namespaces.values():
+            lookups = values["hits"] + values["misses"]
+            values["hit_rate"] = round(values["hits"] / lookups, 3) if lookups else 0.0
+        return {
+            "enabled": self.enabled,
+            "size_bytes": self.total_size(),
+            "max_size_bytes": self.max_size,
+            "namespaces": namespaces
+        }
+
+# 全局缓存实例，首次访问时按 system.cache 配置创建
+_artifact_cache = None
+_artifact_cache_lock = threading.Lock()
+
+def get_artifact_cache():
+    """获取全局产物缓存"""
+    global _artifact_cache
+    if _artifact_cache is None:
+        with _artifact_cache_lock:
+            if _artifact_cache is None:
+                from .config import get_config_manager
+                config = get_config_manager()
+                try:
+                    _artifact_cache = ArtifactCache(
+                        path=config.get("system.cache.path", "data/cache"),
+                        max_size_mb=config.get("system.cache.max_size_mb", 2048),
+                        enabled=config.get("system.cache.enabled", False)
+                    )
+                except Exception as e:
+                    logger.error(f"初始化缓存失败，缓存已禁用: {str(e)}")
+                    _artifact_cache = ArtifactCache(enabled=False)
+    return _artifact_cache
@@ -1,14 +1,27 @@
-import yaml
 import os
 from datetime import datetime
 
+# 项目根目录（src/core/config.py 向上两级）
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def _default_config_path():
+    """默认配置文件路径：环境变量 > 当前目录 > 项目根目录"""
+    env_path = os.environ.get("DINHUI_CONFIG")
+    if env_path:
+        return env_path
+    cwd_path = os.path.join("config", "config.yaml")
+    if os.path.exists(cwd_path):
+        return cwd_path
+    return os.path.join(PROJECT_ROOT, "config", "config.yaml")
+
 class ConfigManager:
-    def __init__(self, config_path="config/config.yaml"):
-        self.config_path = config_path
+    def __init__(self, config_path=None):
+        self.config_path = config_path or _default_config_path()
         self.config = self._load_config()
     
     def _load_config(self):
         """加载配置文件"""
+        import yaml
         with open(self.config_path, 'r', encoding='utf-8') as f:
             config = yaml.safe_load(f)
         return config
@@ -36,6 +49,7 @@ class ConfigManager:
     
     def save(self):
         """保存配置到文件"""
+        import yaml
         with open(self.config_path, 'w', encoding='utf-8') as f:
             yaml.dump(self.config, f, default_flow_style=False, allow_unicode=True)
     
@@ -43,6 +57,29 @@ class ConfigManager:
         """获取研究领域"""
         return self.get("research.domain")
     
+    def get_domain_specs(self):
+        """获取本次运行的领域列表，未配置 research.domains 时只包含单个领域"""
+        start_year, end_year = self.get_time_range()
+        defaults = {
+            "name": self.get_research_domain(),
+            "keywords": self.get_keywords(),
+            "categories": self.get_arxiv_categories(),
+            "start_year": start_year,
+            "end_year": end_year
+        }
+        domains = self.get("research.domains") or []
+        if not domains:
+            return [defaults]
+        
+        specs = []
+        for domain in domains:
+            if isinstance(domain, str):
+                domain = {"name": domain}
+            spec = dict(defaults)
+            spec.update({key: value for key, value in domain.items() if value})
+            specs.append(spec)
+        return specs
+    
     def get_keywords(self):
         """获取关键词列表"""
         return self.get("research.keywords", [])
@@ -65,6 +102,19 @@ class ConfigManager:
             return self.get("sources.google_scholar.max_results", 50)
         return 100
     
+    def get_stage_config(self, stage):
+        """获取流水线阶段的并发配置（工作线程数、队列容量、执行器类型、异步并发数）"""
+        max_workers = self.get("system.max_workers", 4)
+        queue_size = self.get("system.pipeline.queue_size", 16)
+        stage_config = self.get(f"system.pipeline.stages.{stage}") or {}
+        return {
+            "workers": stage_config.get("workers") or max_workers,
+            "queue_size": stage_config.get("queue_size") or queue_size,
+            "executor": stage_config.get("executor", "thread"),
+            # 异步执行器同时进行的论文数
+            "concurrency": stage_config.get("concurrency") or 64
+        }
+    
     def get_pdf_storage_path(self):
         """获取PDF存储路径"""
         path = self.get("pdf.storage_path", "data/pdf")
@@ -88,5 +138,18 @@ class ConfigManager:
         os.makedirs(path, exist_ok=True)
         return path
 
-# 创建全局配置实例
-config_manager = ConfigManager()
+# 全局配置实例，首次访问时创建
+_config_manager = None
+
+def get_config_manager():
+    """获取全局配置实例"""
+    global _config_manager
+    if _config_manager is None:
+        _config_manager = ConfigManager()
+    return _config_manager
+
+def __getattr__(name):
+    """模块级延迟属性：导入本模块不会读取配置文件"""
+    if name == "config_manager":
+        return get_config_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,24 +1,166 @@
 import logging
 import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from .config import config_manager
+from .config import get_config_manager
+from .metrics import PipelineMetrics
+from src.crawler.utils import canonical_paper_id
+from src.pdf.text_store import TextStore, load_paper_content
 
-# 配置日志
-logging.basicConfig(
-    level=getattr(logging, config_manager.get("system.log_level", "INFO")),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
+def _configure_logging(config):
+    """配置日志（根日志已有处理器时不生效）"""
+    logging.basicConfig(
+        level=getattr(logging, config.get("system.log_level", "INFO")),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
 class Controller:
     def __init__(self):
-        self.config = config_manager
+        self.config = get_config_manager()
+        _configure_logging(self.config)
         self.domain = self.config.get_research_domain()
         self.start_year, self.end_year = self.config.get_time_range()
+        # 本次运行的领域列表（多领域运行时共享爬取、下载、解析和分析）
+        self.domains = self.config.get_domain_specs()
+        # 论文处理台账，运行期间打开
+        self.ledger = None
+        self.incremental = None
+        # 解析文本落盘存储，运行期间创建
+        self.text_store = None
+        # 本次运行的阶段指标
+        self.metrics = PipelineMetrics()
         logger.info(f"初始化控制器: 研究领域={self.domain}, 时间范围={self.start_year}-{self.end_year}")
     
-    def run_pipeline(self):
+    def run_pipeline(self, streaming=None, incremental=None):
         """运行完整的工作流程"""
+        if streaming is None:
+            streaming = self.config.get("system.pipeline.streaming", False)
+        # 增量模式只爬取上次运行之后的新论文（None表示使用配置）
+        self.incremental = incremental
+        self.domains = self.config.get_domain_specs()
+        if len(self.domains) > 1:
+            logger.info(f"多领域运行: {', '.join(domain['name'] for domain in self.domains)}")
+        self.metrics = PipelineMetrics()
+        
+        self.text_store = TextStore(self.config.get("pdf_parsing.text_store_path", "data/text"))
+        self._open_ledger()
+        try:
+            if streaming:
+                return self._run_streaming_pipeline()
+            return self._run_batch_pipeline()
+        finally:
+            self._close_ledger()
+            self._write_metrics()
+    
+    def run_worker(self, stage, once=False):
+        """worker模式：从台账按租约领取处于上一阶段的论文，只执行指定阶段，可在同一主机的多个进程中同时运行"""
+        from .worker import Worker
+        
+        self.metrics = PipelineMetrics()
+        self.text_store = TextStore(self.config.get("pdf_parsing.text_store_path", "data/text"))
+        self._open_ledger()
+        if self.ledger is None:
+            logger.error("worker模式需要启用处理台账（system.ledger.enabled）")
+            return False
+        
+        parse_pool = self._create_parse_pool() if stage == "parse" else None
+        try:
+            worker = Worker(
+                self.ledger,
+                stage,
+                self.metrics.timed(stage, self._create_stage_handler(stage, parse_pool)),
+                workers=self.config.get_stage_config(stage)["workers"],
+                batch_size=self.config.get("system.worker.batch_size", 8),
+                lease_seconds=self.config.get("system.worker.lease_seconds", 300),
+                idle_seconds=self.config.get("system.worker.idle_seconds", 10)
+            )
+            try:
+                worker.run(once=once)
+            except KeyboardInterrupt:
+                logger.info("worker收到中断信号，已释放租约")
+            return True
+        except Exception as e:
+            logger.error(f"worker执行失败: {str(e)}")
+            return False
+        finally:
+            if parse_pool is not None:
+                parse_pool.shutdown()
+            self._close_ledger()
+            self._write_metrics(suffix=f"_{stage}_{os.getpid()}")
+    
+    def enqueue_papers(self, incremental=None):
+        """只执行爬取，把新论文记入台账，供各阶段worker领取，返回入队数量"""
+        self.incremental = incremental
+        self.domains = self.config.get_domain_specs()
+        self.metrics = PipelineMetrics()
+        self._open_ledger()
+        if self.ledger is None:
+            logger.error("入队需要启用处理台账（system.ledger.enabled）")
+            return 0
+        try:
+            count = 0
+            for paper in self._filter_relevant(self.metrics.iter_timed("crawl", self._iter_crawled_papers())):
+                if self.ledger.get_stage(paper) is None or paper.get("revised"):
+                    self.ledger.record(paper, "crawled")
+                    count += 1
+            logger.info(f"新论文入队 {count} 篇")
+            return count
+        finally:
+            self._close_ledger()
+            self._write_metrics(suffix="_enqueue")
+    
+    def _write_metrics(self, suffix=""):
+        """输出本次运行的指标摘要（JSON，可选Prometheus文本格式）"""
+        from .cache import get_artifact_cache
+        cache_stats = get_artifact_cache().stats()
+        self.metrics.extra["cache"] = cache_stats
+        self.metrics.log_summary()
+        for namespace, values in cache_stats["namespaces"].items():
+            logger.info(f"[缓存] {namespace}: 命中 {values['hits']}, 未命中 {values['misses']}, 命中率 {values['hit_rate']}")
+        from .replay import get_recorder
+        recorder = get_recorder()
+        if recorder.enabled:
+            self.metrics.extra["replay"] = {"mode": recorder.mode, "calls": recorder.stats()}
+            for kind, values in recorder.stats().items():
+                logger.info(f"[录制/回放] {kind}: 回放 {values['replayed']}, 录制 {values['recorded']}, 未命中 {values['missed']}")
+        from src.crawler.http_cache import get_http_cache
+        http_cache = get_http_cache()
+        if http_cache.enabled:
+            http_stats = http_cache.stats()
+            self.metrics.extra["http_cache"] = http_stats
+            logger.info(
+                f"[HTTP缓存] 直接命中 {http_stats.get('fresh_hits', 0)}, 重新验证未变化 {http_stats.get('revalidated', 0)}, "
+                f"未命中 {http_stats.get('misses', 0)}, 网络传输 {http_stats.get('bytes_fetched', 0)} 字节, "
+                f"缓存提供 {http_stats.get('bytes_from_cache', 0)} 字节"
+            )
+        from src.crawler.politeness import get_host_scheduler
+        host_stats = get_host_scheduler().stats()
+        if host_stats:
+            self.metrics.extra["hosts"] = host_stats
+            for host, values in host_stats.items():
+                logger.info(f"[主机队列] {host}: 请求 {values['requests']}, 平均等待 {values['wait_mean']} 秒, 最长等待 {values['wait_max']} 秒")
+        if not self.config.get("system.metrics.enabled", True):
+            return
+        try:
+            output_path = self.config.get("system.metrics.output_path", "data/metrics")
+            run_name = self.metrics.started_at.strftime("%Y%m%d_%H%M%S")
+            json_path = self.metrics.write_json(os.path.join(output_path, f"run_{run_name}{suffix}.json"))
+            logger.info(f"运行指标已保存: {json_path}")
+            
+            # worker各自只有部分阶段的指标，不覆盖完整运行的Prometheus文件
+            if self.config.get("system.metrics.prometheus", False) and not suffix:
+                prom_path = self.config.get("system.metrics.prometheus_path") or os.path.join(output_path, "pipeline.prom")
+                self.metrics.write_prometheus(prom_path)
+                logger.info(f"Prometheus指标已保存: {prom_path}")
+        except Exception as e:
+            logger.error(f"保存运行指标失败: {str(e)}")
+    
+    def _run_batch_pipeline(self):
+        """分阶段批量执行工作流程"""
         try:
             logger.info("开始执行工作流程...")
             
@@ -60,73 +202,459 @@ class Controller:
             traceback.print_exc()
             return False
     
+    def _run_streaming_pipeline(self):
+        """流式执行工作流程：各阶段通过有界队列衔接并同时运行"""
+        # 延迟导入
+        from .pipeline import Stage, AsyncStage, StreamingPipeline
+        
+        parse_pool = None
+        try:
+            logger.info("开始执行流式工作流程...")
+            
+            parse_pool = self._create_parse_pool()
+            
+            # 步骤1-5: 爬取、下载、解析、分析、存储同时进行
+            stages = []
+            for name in ("download", "parse", "analyze", "store"):
+                stage_config = self.config.get_stage_config(name)
+                async_handler = self._create_async_stage_handler(name, parse_pool)
+                if async_handler is not None:
+                    handler, close = async_handler
+                    stages.append(AsyncStage(
+                        name,
+                        self.metrics.timed_async(name, handler),
+                        concurrency=stage_config["concurrency"],
+                        queue_size=stage_config["queue_size"],
+                        close=close
+                    ))
+                    continue
+                stages.append(Stage(
+                    name,
+                    self.metrics.timed(name, self._create_stage_handler(name, parse_pool)),
+                    workers=stage_config["workers"],
+                    queue_size=stage_config["queue_size"]
+                ))
+            source = self._with_ledger(self._filter_relevant(self.metrics.iter_timed("crawl", self._iter_crawled_papers())))
+            pipeline = StreamingPipeline(source, stages, metrics=self.metrics)
+            stats = pipeline.run()
+            logger.info(
+                f"流水线完成: 爬取 {stats['source']} 篇, 下载 {stats['download']} 篇, "
+                f"解析 {stats['parse']} 篇, 分析 {stats['analyze']} 篇, 存储 {stats['store']} 篇"
+            )
+            
+            # 6. 生成报告
+            logger.info("步骤6: 生成报告")
+            report_path = self._generate_report()
+            logger.info(f"报告生成完成，保存路径: {report_path}")
+            
+            logger.info("工作流程执行完成！")
+            return True
+        except Exception as e:
+            logger.error(f"工作流程执行失败: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return False
+        finally:
+            if parse_pool is not None:
+                parse_pool.shutdown()
+    
+    def _create_stage_handler(self, stage, parse_pool=None):
+        """创建阶段的单篇处理函数（流式流水线和worker共用）"""
+        # 延迟导入
+        if stage == "download":
+            from src.pdf.downloader import PDFDownloader
+            downloader = PDFDownloader()
+            return lambda paper: self._download_paper(downloader, paper)
+        if stage == "parse":
+            from src.pdf.parser import PDFParser
+            parser = PDFParser(process_pool=parse_pool)
+            return lambda paper: self._parse_paper(parser, paper)
+        if stage == "analyze":
+            from src.llm.analyzer import LLMAnalyzer
+            analyzer = LLMAnalyzer()
+            return lambda paper: self._analyze_paper(analyzer, paper)
+        if stage == "store":
+            from src.database.db_manager import DatabaseManager
+            db_manager = DatabaseManager()
+            return lambda paper: self._store_paper(db_manager, paper)
+        raise ValueError(f"未知的阶段: {stage}")
+    
+    def _create_async_stage_handler(self, stage, parse_pool=None):
+        """按配置创建阶段的异步处理函数 (协程函数, 关闭函数)；阶段未配置异步执行器、不支持或缺少aiohttp时返回None"""
+        if self.config.get_stage_config(stage)["executor"] != "async":
+            return None
+        if stage not in ("download", "parse"):
+            logger.warning(f"{stage}阶段不支持异步执行器，使用线程池")
+            return None
+        try:
+            # 延迟导入
+            from src.crawler.async_http import AsyncRequestHandler
+            if stage == "download":
+                from src.pdf.downloader import PDFDownloader
+                downloader = PDFDownloader()
+                client = AsyncRequestHandler()
+                return lambda paper: self._download_paper_async(downloader, client, paper), client.close
+            from src.pdf.parser import PDFParser
+            parser = PDFParser(process_pool=parse_pool)
+            # Grobid为本地服务，不做礼貌限速，连接数与阶段并发数一致
+            client = AsyncRequestHandler(
+                limit_per_host=self.config.get_stage_config("parse")["concurrency"], polite=False, kind="grobid"
+            )
+            return lambda paper: self._parse_paper_async(parser, client, paper), client.close
+        except ImportError as e:
+            logger.warning(f"异步执行器不可用（{str(e)}），{stage}阶段使用线程池")
+            return None
+    
+    def _create_parse_pool(self):
+        """按配置创建PDF解析进程池（异步执行器中PyMuPDF解析同样使用进程池）"""
+        stage_config = self.config.get_stage_config("parse")
+        if stage_config["executor"] not in ("process", "async"):
+            return None
+        from concurrent.futures import ProcessPoolExecutor
+        return ProcessPoolExecutor(max_workers=stage_config["workers"])
+    
+    def _run_stage_batch(self, stage, handler, papers):
+        """批量模式下用线程池并发执行某个阶段，保持原有顺序"""
+        workers = self.config.get_stage_config(stage)["workers"]
+        handler = self.metrics.timed(stage, handler)
+        if workers <= 1:
+            results = [handler(paper) for paper in papers]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"batch-{stage}") as executor:
+                results = list(executor.map(handler, papers))
+        return [paper for paper in results if paper]
+    
     def _crawl_papers(self):
         """爬取文献"""
+        papers = list(self.metrics.iter_timed("crawl", self._iter_crawled_papers()))
+        logger.info(f"去重后共 {len(papers)} 篇论文")
+        
+        # 合并台账中未完成的论文，跳过已处理过的论文
+        return list(self._with_ledger(self._filter_relevant(papers)))
+    
+    def _filter_relevant(self, papers):
+        """按领域相关性预筛选新爬取的论文，只有放行的论文进入下载阶段；未启用时原样产出"""
+        from src.crawler.relevance import RelevanceFilter
+        relevance = RelevanceFilter.from_config(self.config, self.domains)
+        if relevance is None:
+            yield from papers
+            return
+        self.metrics.extra["relevance"] = relevance.stats
+        yield from relevance.filter(papers)
+    
+    def _iter_crawled_papers(self):
+        """并发爬取各领域、各来源，合并重复论文后逐条产出，结果一到达即可进入下载阶段"""
         # 延迟导入，避免循环依赖
         from src.crawler.arxiv import ArxivCrawler
         from src.crawler.scholar import ScholarCrawler
+        from src.crawler.dump import DumpCrawler
+        from src.crawler.snowball import SnowballCrawler
+        from src.database.db_manager import DatabaseManager
         
-        papers = []
-        
-        # 从arXiv爬取
+        crawlers = []
         if self.config.get("sources.arxiv.enabled"):
-            logger.info("从arXiv爬取文献...")
-            arxiv_crawler = ArxivCrawler()
-            arxiv_papers = arxiv_crawler.crawl()
-            papers.extend(arxiv_papers)
-            logger.info(f"从arXiv获取到 {len(arxiv_papers)} 篇论文")
-        
-        # 从Google Scholar爬取
+            crawlers.append(("arXiv", ArxivCrawler))
         if self.config.get("sources.google_scholar.enabled"):
-            logger.info("从Google Scholar爬取文献...")
-            scholar_crawler = ScholarCrawler()
-            scholar_papers = scholar_crawler.crawl()
-            papers.extend(scholar_papers)
-            logger.info(f"从Google Scholar获取到 {len(scholar_papers)} 篇论文")
+            crawlers.append(("Google Scholar", ScholarCrawler))
+        if self.config.get("sources.dump.enabled"):
+            crawlers.append(("导出文件", DumpCrawler))
+        if self.config.get("sources.snowball.enabled"):
+            crawlers.append(("引文扩展", SnowballCrawler))
+        jobs = [(domain, source_name, crawler_cls) for domain in self.domains for source_name, crawler_cls in crawlers]
+        if not jobs:
+            return
+        
+        results = queue.Queue()
+        stop = threading.Event()
+        done = object()
         
-        # 去重
-        unique_papers = self._deduplicate_papers(papers)
-        logger.info(f"去重后剩余 {len(unique_papers)} 篇论文")
+        def crawl(domain, source_name, crawler_cls):
+            count = 0
+            try:
+                logger.info(f"[{domain['name']}] 从{source_name}爬取文献...")
+                crawler = crawler_cls(incremental=self.incremental, domain=domain)
+                for paper in crawler.iter_papers():
+                    if stop.is_set():
+                        break
+                    results.put((domain["name"], paper))
+                    count += 1
+                logger.info(f"[{domain['name']}] 从{source_name}获取到 {count} 篇论文")
+            except Exception as e:
+                logger.error(f"[{domain['name']}] 从{source_name}爬取失败: {str(e)}")
+            finally:
+                results.put(done)
         
-        return unique_papers
+        workers = min(len(jobs), self.config.get_stage_config("crawl")["workers"])
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="crawl")
+        for job in jobs:
+            executor.submit(crawl, *job)
+        
+        # 领域标签使用单独的连接，与存储阶段的写入互不干扰
+        db_manager = DatabaseManager()
+        resolver = self._create_identity_resolver(db_manager)
+        versions = self._open_version_store()
+        # 规范ID -> 本次运行已标记的领域
+        tagged = {}
+        
+        def tag(paper_key, domain_name):
+            domains = tagged.setdefault(paper_key, set())
+            if domain_name not in domains:
+                domains.add(domain_name)
+                db_manager.add_paper_domains(paper_key, [domain_name])
+        
+        new_count = 0
+        revised_count = 0
+        duplicate_count = 0
+        pending = len(jobs)
+        try:
+            while pending:
+                item = results.get()
+                if item is done:
+                    pending -= 1
+                    continue
+                domain_name, paper = item
+                if not (paper.get("title") or "").strip():
+                    continue
+                
+                # arXiv论文先按去版本ID比较已处理的版本，未变化的直接跳过，不计算标题签名
+                revision = versions.check_version(paper) if versions is not None else None
+                if revision == "unchanged":
+                    paper_key = resolver.lookup_arxiv(paper.get("arxiv_id"))
+                    if paper_key is not None:
+                        tag(paper_key, domain_name)
+                        duplicate_count += 1
+                        continue
+                
+                paper_key, is_new = resolver.resolve(paper)
+                tag(paper_key, domain_name)
+                if not is_new and revision != "revised":
+                    # 其他来源、其他领域或之前运行已有的论文只补充领域标签，不再重复处理
+                    duplicate_count += 1
+                    if revision == "new":
+                        versions.mark_processed(paper)
+                    continue
+                
+                paper["paper_key"] = paper_key
+                if revision == "revised":
+                    # arXiv发布了新版本：沿用原规范ID重新下载、解析和分析，入库时替换旧记录
+                    paper["revised"] = True
+                    revised_count += 1
+                else:
+                    new_count += 1
+                yield paper
+                # 产出后（已登记到台账）才记录已处理的版本，中途退出时下次仍会处理
+                if revision is not None:
+                    versions.mark_processed(paper)
+            logger.info(f"身份解析完成: 新论文 {new_count} 篇，新版本 {revised_count} 篇，识别为重复 {duplicate_count} 篇")
+        finally:
+            stop.set()
+            executor.shutdown(wait=False)
+            db_manager.close()
+            if versions is not None:
+                versions.close()
+    
+    def _open_version_store(self):
+        """打开记录arXiv论文已处理版本的元数据存储，未启用或打开失败时返回None"""
+        if not self.config.get("sources.arxiv.track_versions", True):
+            return None
+        try:
+            from src.database.arxiv_metadata import ArxivMetadataStore
+            return ArxivMetadataStore()
+        except Exception as e:
+            logger.error(f"打开arXiv元数据存储失败，本次运行不跟踪论文版本: {str(e)}")
+            return None
+    
+    def _create_identity_resolver(self, db_manager):
+        """创建身份解析器，并载入数据库和台账中已有的论文"""
+        from src.crawler.identity import IdentityResolver
+        
+        resolver = IdentityResolver.from_config(self.config)
+        updates = []
+        for record in db_manager.get_identity_records():
+            paper_key, _ = resolver.resolve(record)
+            # 旧数据没有规范ID时补写
+            if not record["paper_key"]:
+                updates.append((paper_key, record["id"]))
+        if updates:
+            db_manager.update_paper_keys(updates)
+            logger.info(f"为 {len(updates)} 篇已入库论文补写规范ID")
+        if self.ledger is not None:
+            for paper in self.ledger.get_pending_papers():
+                resolver.resolve(paper)
+        logger.info(f"身份解析器已载入 {len(resolver)} 篇已有论文")
+        return resolver
+    
+    def _open_ledger(self):
+        """打开论文处理台账"""
+        self.ledger = None
+        if not self.config.get("system.ledger.enabled", True):
+            return
+        try:
+            from src.database.ledger import PaperLedger
+            self.ledger = PaperLedger()
+        except Exception as e:
+            logger.error(f"打开处理台账失败，本次运行不支持续跑: {str(e)}")
+    
+    def _close_ledger(self):
+        """关闭论文处理台账"""
+        if self.ledger is not None:
+            self.ledger.close()
+            self.ledger = None
+    
+    def _with_ledger(self, papers):
+        """先产出台账中未完成的论文，再产出台账中没有记录的新论文"""
+        if self.ledger is None:
+            yield from papers
+            return
+        
+        resumed = self.ledger.get_unfinished()
+        if resumed:
+            logger.info(f"从台账恢复 {len(resumed)} 篇未完成的论文")
+        yield from resumed
+        
+        skipped = 0
+        for paper in papers:
+            # 发布了新版本的论文重置台账记录，从爬取阶段重新处理
+            if self.ledger.get_stage(paper) is not None and not paper.get("revised"):
+                skipped += 1
+                continue
+            self.ledger.record(paper, "crawled")
+            yield paper
+        if skipped:
+            logger.info(f"跳过 {skipped} 篇台账中已有记录的论文")
+    
+    def _stage_done(self, paper, stage):
+        """论文是否已在之前的运行中完成该阶段"""
+        return self.ledger is not None and self.ledger.stage_done(paper, stage)
+    
+    def _record_stage(self, paper, stage):
+        """在台账中记录阶段完成"""
+        if self.ledger is not None:
+            self.ledger.record(paper, stage)
+    
+    def _record_failure(self, paper, stage, error):
+        """记录阶段失败：error为异常对象或失败说明"""
+        # 供指标按异常类型统计失败
+        paper["last_error_type"] = type(error).__name__ if isinstance(error, Exception) else "EmptyResult"
+        if self.ledger is not None:
+            self.ledger.record_failure(paper, stage, str(error))
+    
+    def _run_stage_batch_async(self, stage, async_handler, papers):
+        """批量模式下在事件循环中并发执行异步阶段，保持原有顺序"""
+        from .pipeline import run_async_batch
+        handler, close = async_handler
+        concurrency = self.config.get_stage_config(stage)["concurrency"]
+        results = run_async_batch(self.metrics.timed_async(stage, handler), papers, concurrency, close=close)
+        return [paper for paper in results if paper]
     
     def _download_pdfs(self, papers):
         """下载PDF"""
+        async_handler = self._create_async_stage_handler("download")
+        if async_handler is not None:
+            return self._run_stage_batch_async("download", async_handler, papers)
+        
         # 延迟导入
         from src.pdf.downloader import PDFDownloader
         
         downloader = PDFDownloader()
-        papers_with_pdf = []
-        
-        for paper in papers:
-            try:
-                pdf_path = downloader.download(paper)
-                if pdf_path:
-                    paper["pdf_path"] = pdf_path
-                    papers_with_pdf.append(paper)
-            except Exception as e:
-                logger.error(f"下载PDF失败: {paper.get('title')} - {str(e)}")
-        
-        return papers_with_pdf
+        return self._run_stage_batch(
+            "download", lambda paper: self._download_paper(downloader, paper), papers
+        )
+    
+    def _download_paper(self, downloader, paper):
+        """下载单篇论文的PDF，失败时返回None"""
+        if self._stage_done(paper, "downloaded"):
+            return paper
+        error = "未能获取PDF"
+        pdf_path = None
+        try:
+            pdf_path = downloader.download(paper)
+        except Exception as e:
+            logger.error(f"下载PDF失败: {paper.get('title')} - {str(e)}")
+            error = e
+        return self._finish_download(paper, pdf_path, error)
+    
+    async def _download_paper_async(self, downloader, client, paper):
+        """异步下载单篇论文的PDF，失败时返回None"""
+        if self._stage_done(paper, "downloaded"):
+            return paper
+        error = "未能获取PDF"
+        pdf_path = None
+        try:
+            pdf_path = await downloader.download_async(paper, client)
+        except Exception as e:
+            logger.error(f"下载PDF失败: {paper.get('title')} - {str(e)}")
+            error = e
+        return self._finish_download(paper, pdf_path, error)
+    
+    def _finish_download(self, paper, pdf_path, error):
+        """记录下载结果：成功时写入PDF路径并在台账中记录，失败时记录失败原因；只统计本次实际传输的字节数"""
+        transferred = paper.pop("download_bytes", 0)
+        if transferred:
+            self.metrics.add_bytes("download", transferred)
+        if pdf_path:
+            paper["pdf_path"] = pdf_path
+            self._record_stage(paper, "downloaded")
+            return paper
+        self._record_failure(paper, "download", error)
+        return None
     
     def _parse_pdfs(self, papers):
         """解析PDF"""
         # 延迟导入
         from src.pdf.parser import PDFParser
         
-        parser = PDFParser()
-        papers_with_content = []
-        
-        for paper in papers:
-            try:
-                content = parser.parse(paper["pdf_path"])
-                if content:
-                    paper["content"] = content
-                    papers_with_content.append(paper)
-            except Exception as e:
-                logger.error(f"解析PDF失败: {paper.get('title')} - {str(e)}")
-        
-        return papers_with_content
+        parse_pool = self._create_parse_pool()
+        try:
+            async_handler = self._create_async_stage_handler("parse", parse_pool)
+            if async_handler is not None:
+                return self._run_stage_batch_async("parse", async_handler, papers)
+            parser = PDFParser(process_pool=parse_pool)
+            return self._run_stage_batch(
+                "parse", lambda paper: self._parse_paper(parser, paper), papers
+            )
+        finally:
+            if parse_pool is not None:
+                parse_pool.shutdown()
+    
+    def _parse_paper(self, parser, paper):
+        """解析单篇论文的PDF，失败时返回None"""
+        if self._stage_done(paper, "parsed"):
+            return paper
+        error = "解析内容为空"
+        try:
+            content = parser.parse(paper["pdf_path"])
+            if content:
+                return self._finish_parse(paper, content)
+        except Exception as e:
+            logger.error(f"解析PDF失败: {paper.get('title')} - {str(e)}")
+            error = e
+        self._record_failure(paper, "parse", error)
+        return None
+    
+    async def _parse_paper_async(self, parser, client, paper):
+        """异步解析单篇论文的PDF，失败时返回None"""
+        if self._stage_done(paper, "parsed"):
+            return paper
+        error = "解析内容为空"
+        try:
+            content = await parser.parse_async(paper["pdf_path"], client)
+            if content:
+                return self._finish_parse(paper, content)
+        except Exception as e:
+            logger.error(f"解析PDF失败: {paper.get('title')} - {str(e)}")
+            error = e
+        self._record_failure(paper, "parse", error)
+        return None
+    
+    def _finish_parse(self, paper, content):
+        """保存解析结果并在台账中记录"""
+        # 全文写入磁盘，论文字典只保存路径，内存占用与并发数而非论文总数相关
+        paper_key = paper.get("paper_key") or canonical_paper_id(paper)
+        paper["content_path"] = self.text_store.put(paper_key, content)
+        paper.pop("content", None)
+        self._record_stage(paper, "parsed")
+        return paper
     
     def _analyze_with_llm(self, papers):
         """使用LLM分析论文"""
@@ -134,19 +662,30 @@ class Controller:
         from src.llm.analyzer import LLMAnalyzer
         
         analyzer = LLMAnalyzer()
-        papers_with_analysis = []
-        
-        for paper in papers:
-            try:
-                analysis = analyzer.analyze(paper["content"])
-                if analysis:
-                    paper.update(analysis)
-                    paper["llm_extract_time"] = datetime.now().isoformat()
-                    papers_with_analysis.append(paper)
-            except Exception as e:
-                logger.error(f"LLM分析失败: {paper.get('title')} - {str(e)}")
-        
-        return papers_with_analysis
+        return self._run_stage_batch(
+            "analyze", lambda paper: self._analyze_paper(analyzer, paper), papers
+        )
+    
+    def _analyze_paper(self, analyzer, paper):
+        """使用LLM分析单篇论文，失败时返回None"""
+        if self._stage_done(paper, "analyzed"):
+            return paper
+        error = "分析结果为空"
+        try:
+            content = load_paper_content(paper)
+            if not content:
+                raise FileNotFoundError(f"解析文本不存在: {paper.get('content_path')}")
+            analysis = analyzer.analyze(content)
+            if analysis:
+                paper.update(analysis)
+                paper["llm_extract_time"] = datetime.now().isoformat()
+                self._record_stage(paper, "analyzed")
+                return paper
+        except Exception as e:
+            logger.error(f"LLM分析失败: {paper.get('title')} - {str(e)}")
+            error = e
+        self._record_failure(paper, "analyze", error)
+        return None
     
     def _store_to_database(self, papers):
         """存储到数据库"""
@@ -156,36 +695,62 @@ class Controller:
         db_manager = DatabaseManager()
         stored_count = 0
         
+        store = self.metrics.timed("store", lambda paper: self._store_paper(db_manager, paper))
         for paper in papers:
-            try:
-                db_manager.insert_paper(paper)
+            if store(paper):
                 stored_count += 1
-            except Exception as e:
-                logger.error(f"存储到数据库失败: {paper.get('title')} - {str(e)}")
         
         return stored_count
     
+    def _store_paper(self, db_manager, paper):
+        """存储单篇论文，失败时返回None"""
+        error = "插入论文失败"
+        try:
+            # 只在插入时临时读取全文，入库后删除落盘文本
+            record = dict(paper, content=load_paper_content(paper))
+            if db_manager.insert_paper(record):
+                self._record_stage(paper, "stored")
+                if paper.get("content_path"):
+                    self.text_store.delete(paper["content_path"])
+                return paper
+        except Exception as e:
+            logger.error(f"存储到数据库失败: {paper.get('title')} - {str(e)}")
+            error = e
+        self._record_failure(paper, "store", error)
+        return None
+    
     def _generate_report(self):
         """生成报告"""
         # 延迟导入
         from src.report.generator import ReportGenerator
         
         generator = ReportGenerator()
-        report_path = generator.generate()
-        return report_path
-    
-    def _deduplicate_papers(self, papers):
-        """去重论文"""
-        seen_titles = set()
-        unique_papers = []
+        if len(self.domains) <= 1:
+            return generator.generate()
         
-        for paper in papers:
-            title = paper.get("title", "").strip().lower()
-            if title and title not in seen_titles:
-                seen_titles.add(title)
-                unique_papers.append(paper)
-        
-        return unique_papers
+        # 多领域运行时每个领域单独生成报告
+        report_paths = []
+        for domain in self.domains:
+            report_path = generator.generate(
+                domain=domain["name"], start_year=domain["start_year"], end_year=domain["end_year"]
+            )
+            logger.info(f"[{domain['name']}] 报告保存路径: {report_path}")
+            if report_path:
+                report_paths.append(report_path)
+        return report_paths
+
+# 全局控制器实例，首次访问时创建
+_controller = None
+
+def get_controller():
+    """获取全局控制器实例"""
+    global _controller
+    if _controller is None:
+        _controller = Controller()
+    return _controller
 
-# 创建全局控制器实例
-controller = Controller()
+def __getattr__(name):
+    """模块级延迟属性：导入本模块不会创建控制器"""
+    if name == "controller":
+        return get_controller()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta
+
+# 字段顺序：分 时 日 月 周，周日可写作0或7
+_FIELDS = [
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day", 1, 31),
+    ("month", 1, 12),
+    ("weekday", 0, 7)
+]
+
+_MONTH_NAMES = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12
+}
+
+_WEEKDAY_NAMES = {
+    "sun": 0, "mon": 1, "tue": 2, "wed": 3, "thu": 4, "fri": 5, "sat": 6
+}
+
+# 常用别名
+_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+    "@yearly": "0 0 1 1 *"
+}
+
+class CronExpression:
+    """五段式cron表达式（分 时 日 月 周），支持 *、列表、范围、步长和月份/星期英文缩写"""
+    
+    def __init__(self, expression):
+        self.expression = expression.strip()
+        fields = _ALIASES.get(self.expression.lower(), self.expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"cron表达式应包含5个字段: {expression}")
+        
+        parsed = []
+        for text, (name, low, high) in zip(fields, _FIELDS):
+            names = _MONTH_NAMES if name == "month" else _WEEKDAY_NAMES if name == "weekday" else {}
+            parsed.append(self._parse_field(text.lower(), low, high, names, name))
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        # 7 与 0 都表示周日
+        self.weekdays = {0 if value == 7 else value for value in weekdays}
+        # 日和周都有限制时，满足任意一个即可（与标准cron一致）
+        self.day_restricted = fields[2] != "*"
+        self.weekday_restricted = fields[4] != "*"
+    
+    @staticmethod
+    def _parse_field(text, low, high, names, field_name):
+        """解析单个字段，返回允许取值的集合"""
+        values = set()
+        for part in text.split(","):
+            step = 1
+            if "/" in part:
+                part, step_text = part.split("/", 1)
+                step = int(step_text)
+                if step <= 0:
+                    raise ValueError(f"cron字段{field_name}的步长必须为正数: {text}")
+            
+            if part == "*":
+                start, end = low, high
+            elif "-" in part:
+                start_text, end_text = part.split("-", 1)
+                start = names.get(start_text, None)
+                start = int(start_text) if start is None else start
+                end = names.get(end_text, None)
+                end = int(end_text) if end is None else end
+            else:
+                start = names.get(part, None)
+                start = int(part) if start is None else start
+                # 形如 5/15 表示从5开始按步长递增
+                end = high if step > 1 else start
+            
+            if start < low or end > high or start > end:
+                raise ValueError(f"cron字段{field_name}超出范围[{low}, {high}]: {text}")
+            values.update(range(start, end + 1, step))
+        return values
+    
+    def matches(self, moment):
+        """判断某个时间（精确到分钟）是否满足表达式"""
+        if moment.minute not in self.minutes or moment.hour not in self.hours or moment.month not in self.months:
+            return False
+        return self._day_matches(moment)
+    
+    def next_after(self, moment):
+        """返回严格晚于给定时间的下一个触发时间"""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # 最多向后查找约5年，避免无法满足的表达式（如2月30日）导致死循环
+        limit = candidate + timedelta(days=366 * 5)
+        while candidate <= limit:
+            if candidate.month not in self.months:
+                # 跳到下个月1日0点
+                year = candidate.year + (1 if candidate.month == 12 else 0)
+                month = 1 if candidate.month == 12 else candidate.month + 1
+                candidate = datetime(year, month, 1, tzinfo=candidate.tzinfo)
+                continue
+            if not self._day_matches(candidate):
+                # 当天不满足日/周条件，跳到次日0点
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+                continue
+            if candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+                continue
+            return candidate
+        raise ValueError(f"cron表达式在可预见的时间内不会触发: {self.expression}")
+    
+    def _day_matches(self, moment):
+        """判断日期是否满足日/周条件"""
+        day_ok = moment.day in self.days
+        # datetime.weekday() 周一为0，转换为cron的周日为0
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.day_restricted and self.weekday_restricted:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+    
+    def __repr__(self):
+        return f"CronExpression({self.expression!r})"
@@ -0,0 +1,239 @@
+import os
+import json
+import time
+import threading
+import logging
+from collections import Counter
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# 延迟直方图的桶边界（秒）
+LATENCY_BUCKETS = [0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300]
+
+def _percentile(values, q):
+    """计算分位数（最近秩法）"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+class StageMetrics:
+    """单个阶段的指标"""
+    
+    def __init__(self, name):
+        self.name = name
+        self.succeeded = 0
+        self.failed = 0
+        self.failures_by_type = Counter()
+        self.latencies = []
+        self.queue_waits = []
+        self.bytes = 0
+        self.first_start = None
+        self.last_end = None
+    
+    def summary(self):
+        """生成阶段指标摘要"""
+        active = (self.last_end - self.first_start) if self.first_start and self.last_end else 0.0
+        total = self.succeeded + self.failed
+        buckets = {}
+        for bound in LATENCY_BUCKETS:
+            buckets[str(bound)] = sum(1 for value in self.latencies if value <= bound)
+        buckets["+Inf"] = len(self.latencies)
+        return {
+            "items": total,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "failures_by_type": dict(self.failures_by_type),
+            "active_seconds": round(active, 3),
+            "items_per_second": round(self.succeeded / active, 3) if active > 0 else 0.0,
+            "bytes": self.bytes,
+            "latency": {
+                "count": len(self.latencies),
+                "sum": round(sum(self.latencies), 3),
+                "mean": round(sum(self.latencies) / len(self.latencies), 4) if self.latencies else 0.0,
+                "p50": round(_percentile(self.latencies, 50), 4),
+                "p95": round(_percentile(self.latencies, 95), 4),
+                "p99": round(_percentile(self.latencies, 99), 4),
+                "max": round(max(self.latencies), 4) if self.latencies else 0.0,
+                "buckets": buckets
+            },
+            "queue_wait": {
+                "count": len(self.queue_waits),
+                "sum": round(sum(self.queue_waits), 3),
+                "p50": round(_percentile(self.queue_waits, 50), 4),
+                "p95": round(_percentile(self.queue_waits, 95), 4),
+                "max": round(max(self.queue_waits), 4) if self.queue_waits else 0.0
+            }
+        }
+
+class PipelineMetrics:
+    """流水线指标：各阶段的单篇延迟、吞吐量、下载字节数、失败类型和排队等待时间"""
+    
+    def __init__(self):
+        self.started_at = datetime.now()
+        self._start = time.monotonic()
+        self._stages = {}
+        self._lock = threading.Lock()
+        # 附加信息（如缓存命中统计），原样写入运行摘要
+        self.extra = {}
+    
+    def _stage(self, name):
+        stage = self._stages.get(name)
+        if stage is None:
+            stage = StageMetrics(name)
+            self._stages[name] = stage
+        return stage
+    
+    def observe(self, stage, started, ended, error=None):
+        """记录一次阶段处理，error为异常对象或失败类型名称"""
+        with self._lock:
+            metrics = self._stage(stage)
+            metrics.latencies.append(ended - started)
+            if metrics.first_start is None or started < metrics.first_start:
+                metrics.first_start = started
+            if metrics.last_end is None or ended > metrics.last_end:
+                metrics.last_end = ended
+            if error is None:
+                metrics.succeeded += 1
+            else:
+                metrics.failed += 1
+                error_type = error if isinstance(error, str) else type(error).__name__
+                metrics.failures_by_type[error_type] += 1
+    
+    def observe_queue_wait(self, stage, seconds):
+        """记录论文在阶段输入队列中的等待时间"""
+        with self._lock:
+            self._stage(stage).queue_waits.append(seconds)
+    
+    def add_bytes(self, stage, count):
+        """累计阶段传输的字节数"""
+        with self._lock:
+            self._stage(stage).bytes += count
+    
+    def timed(self, stage, handler):
+        """包装单篇处理函数：返回None视为失败，异常按类型计数后继续抛出"""
+        def wrapper(paper):
+            started = time.monotonic()
+            try:
+                result = handler(paper)
+            except Exception as e:
+                self.observe(stage, started, time.monotonic(), error=e)
+                raise
+            self._observe_result(stage, started, paper, result)
+            return result
+        return wrapper
+    
+    def timed_async(self, stage, handler):
+        """包装单篇处理的协程函数，统计方式与 timed 相同"""
+        async def wrapper(paper):
+            started = time.monotonic()
+            try:
+                result = await handler(paper)
+            except Exception as e:
+                self.observe(stage, started, time.monotonic(), error=e)
+                raise
+            self._observe_result(stage, started, paper, result)
+            return result
+        return wrapper
+    
+    def _observe_result(self, stage, started, paper, result):
+        """记录单篇处理结果"""
+        error = None
+        if result is None:
+            # 处理函数内部捕获的异常类型由控制器写入 last_error_type
+            error = paper.pop("last_error_type", None) or "EmptyResult"
+        self.observe(stage, started, time.monotonic(), error=error)
+    
+    def iter_timed(self, stage, iterable):
+        """包装生成器，按两次产出之间的间隔记录延迟（用于爬取阶段）"""
+        iterator = iter(iterable)
+        while True:
+            started = time.monotonic()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            except Exception as e:
+                self.observe(stage, started, time.monotonic(), error=e)
+                raise
+            self.observe(stage, started, time.monotonic())
+            yield item
+    
+    def summary(self):
+        """生成完整的运行摘要"""
+        with self._lock:
+            stages = {name: stage.summary() for name, stage in self._stages.items()}
+        return {
+            "started_at": self.started_at.isoformat(),
+            "duration_seconds": round(time.monotonic() - self._start, 3),
+            "stages": stages,
+            **self.extra
+        }
+    
+    def log_summary(self):
+        """在日志中输出各阶段摘要"""
+        for name, stage in self.summary()["stages"].items():
+            logger.info(
+                f"[指标] {name}: 成功 {stage['succeeded']}, 失败 {stage['failed']}, "
+                f"{stage['items_per_second']} 篇/秒, p50 {stage['latency']['p50']}s, "
+                f"p95 {stage['latency']['p95']}s, 排队p95 {stage['queue_wait']['p95']}s"
+            )
+    
+    def write_json(self, path):
+        """写入JSON运行摘要"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+        return path
+    
+    def write_prometheus(self, path, prefix="dinhui"):
+        """写入Prometheus文本格式（可供node_exporter textfile collector采集）"""
+        summary = self.summary()
+        lines = [
+            f"# HELP {prefix}_run_duration_seconds Wall-clock duration of the pipeline run.",
+            f"# TYPE {prefix}_run_duration_seconds gauge",
+            f"{prefix}_run_duration_seconds {summary['duration_seconds']}"
+        ]
+        metric_types = [
+            ("items_total", "counter", "Papers processed by stage."),
+            ("failures_total", "counter", "Failed papers by stage and exception type."),
+            ("bytes_total", "counter", "Bytes transferred by stage."),
+            ("items_per_second", "gauge", "Successful papers per second while the stage was active."),
+            ("latency_seconds", "histogram", "Per-paper stage latency."),
+            ("queue_wait_seconds", "summary", "Time papers waited in the stage input queue.")
+        ]
+        for suffix, metric_type, help_text in metric_types:
+            name = f"{prefix}_stage_{suffix}"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for stage_name, stage in summary["stages"].items():
+                label = f'stage="{stage_name}"'
+                if suffix == "items_total":
+                    lines.append(f"{name}{{{label}}} {stage['items']}")
+                elif suffix == "failures_total":
+                    for error_type, count in stage["failures_by_type"].items():
+                        lines.append(f'{name}{{{label},exception="{error_type}"}} {count}')
+                elif suffix == "bytes_total":
+                    lines.append(f"{name}{{{label}}} {stage['bytes']}")
+                elif suffix == "items_per_second":
+                    lines.append(f"{name}{{{label}}} {stage['items_per_second']}")
+                elif suffix == "latency_seconds":
+                    for bound, count in stage["latency"]["buckets"].items():
+                        lines.append(f'{name}_bucket{{{label},le="{bound}"}} {count}')
+                    lines.append(f"{name}_sum{{{label}}} {stage['latency']['sum']}")
+                    lines.append(f"{name}_count{{{label}}} {stage['latency']['count']}")
+                else:
+                    lines.append(f'{name}{{{label},quantile="0.5"}} {stage["queue_wait"]["p50"]}')
+                    lines.append(f'{name}{{{label},quantile="0.95"}} {stage["queue_wait"]["p95"]}')
+                    lines.append(f"{name}_sum{{{label}}} {stage['queue_wait']['sum']}")
+                    lines.append(f"{name}_count{{{label}}} {stage['queue_wait']['count']}")
+        
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # 先写临时文件再替换，避免采集到半个文件
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+        return path
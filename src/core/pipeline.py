@@ -0,0 +1,218 @@
+import queue
+import time
+import asyncio
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 队列结束标记
+_SENTINEL = object()
+
+class Stage:
+    """流水线阶段：从输入队列取论文，处理后放入下一阶段的队列"""
+    
+    def __init__(self, name, handler, workers=1, queue_size=16):
+        self.name = name
+        # handler(paper) 返回处理后的论文，返回None表示丢弃
+        self.handler = handler
+        self.workers = max(1, int(workers))
+        self.queue_size = max(1, int(queue_size))
+        self.input_queue = queue.Queue(maxsize=self.queue_size)
+        self.processed = 0
+        self.failed = 0
+        self._active_workers = self.workers
+        # 是否已从输入队列取到结束标记
+        self._input_closed = False
+        self._lock = threading.Lock()
+
+class AsyncStage(Stage):
+    """异步流水线阶段：单个线程运行事件循环，同时处理最多 concurrency 篇论文（适合大量并发的网络请求）"""
+    
+    def __init__(self, name, handler, concurrency=64, queue_size=16, close=None):
+        # handler(paper) 为协程函数；close 为阶段结束时在同一事件循环中调用的协程函数（如关闭连接池）
+        super().__init__(name, handler, workers=1, queue_size=queue_size)
+        self.concurrency = max(1, int(concurrency))
+        self.close = close
+
+class StreamingPipeline:
+    """流式流水线：各阶段通过有界队列相连，网络、CPU和LLM阶段同时运行"""
+    
+    def __init__(self, source, stages, metrics=None):
+        # source 是产出论文字典的可迭代对象（通常是爬虫生成器）
+        self.source = source
+        self.stages = stages
+        # 可选的 PipelineMetrics，用于记录排队等待时间
+        self.metrics = metrics
+        self.produced = 0
+        self._threads = []
+        # 某个阶段异常退出后置位：数据源停止产出，各阶段只取出并丢弃剩余论文，保证 run() 能够返回
+        self._shutdown = threading.Event()
+    
+    def run(self):
+        """运行流水线，返回各阶段的处理统计"""
+        if not self.stages:
+            return {"source": sum(1 for _ in self.source)}
+        
+        # 启动各阶段工作线程
+        for index, stage in enumerate(self.stages):
+            next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+            for worker_idx in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._run_async_stage if isinstance(stage, AsyncStage) else self._run_stage,
+                    args=(stage, next_stage),
+                    name=f"pipeline-{stage.name}-{worker_idx}",
+                    daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+        
+        # 在当前线程中产出数据，队列满时自然形成背压
+        first_queue = self.stages[0].input_queue
+        try:
+            for paper in self.source:
+                if self._shutdown.is_set():
+                    logger.warning("流水线阶段异常退出，停止产出数据")
+                    break
+                first_queue.put((paper, time.monotonic()))
+                self.produced += 1
+        except Exception as e:
+            logger.error(f"流水线数据源失败: {str(e)}")
+        finally:
+            first_queue.put(_SENTINEL)
+        
+        for thread in self._threads:
+            thread.join()
+        
+        stats = {"source": self.produced}
+        for stage in self.stages:
+            stats[stage.name] = stage.processed
+        return stats
+    
+    def _run_stage(self, stage, next_stage):
+        """阶段工作线程主循环"""
+        while True:
+            item = stage.input_queue.get()
+            if item is _SENTINEL:
+                # 把结束标记放回，让同阶段的其他线程也能退出
+                stage.input_queue.put(_SENTINEL)
+                break
+            if self._shutdown.is_set():
+                continue
+            
+            paper, enqueued_at = item
+            if self.metrics is not None:
+                self.metrics.observe_queue_wait(stage.name, time.monotonic() - enqueued_at)
+            
+            try:
+                result = stage.handler(paper)
+            except Exception as e:
+                logger.error(f"{stage.name}阶段处理失败: {paper.get('title')} - {str(e)}")
+                result = None
+            
+            self._count(stage, result)
+            if result is not None and next_stage is not None:
+                next_stage.input_queue.put((result, time.monotonic()))
+        
+        # 最后一个退出的线程负责通知下一阶段
+        with stage._lock:
+            stage._active_workers -= 1
+            last_worker = stage._active_workers == 0
+        if last_worker and next_stage is not None:
+            next_stage.input_queue.put(_SENTINEL)
+    
+    def _run_async_stage(self, stage, next_stage):
+        """异步阶段线程：在独立的事件循环中并发处理，结束后通知下一阶段"""
+        try:
+            asyncio.run(self._async_stage_loop(stage, next_stage))
+        except Exception as e:
+            logger.error(f"{stage.name}阶段事件循环失败，流水线停止: {str(e)}")
+            self._shutdown.set()
+            # 继续取出输入队列直到结束标记，上游阶段和数据源不会阻塞在已满的队列上
+            self._drain(stage)
+        finally:
+            if next_stage is not None:
+                next_stage.input_queue.put(_SENTINEL)
+    
+    async def _async_stage_loop(self, stage, next_stage):
+        """从输入队列取论文并创建任务，同时进行的任务数不超过 concurrency"""
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(stage.concurrency)
+        tasks = set()
+        
+        def on_done(task):
+            tasks.discard(task)
+            slots.release()
+        
+        try:
+            while True:
+                await slots.acquire()
+                # 阻塞的队列操作放到线程中执行，不阻塞事件循环中正在进行的请求
+                item = await loop.run_in_executor(None, stage.input_queue.get)
+                if item is _SENTINEL:
+                    stage._input_closed = True
+                    slots.release()
+                    break
+                if self._shutdown.is_set():
+                    slots.release()
+                    continue
+                task = asyncio.create_task(self._process_async(stage, next_stage, item))
+                tasks.add(task)
+                task.add_done_callback(on_done)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            if stage.close is not None:
+                await stage.close()
+    
+    async def _process_async(self, stage, next_stage, item):
+        """异步处理单篇论文并放入下一阶段的队列"""
+        paper, enqueued_at = item
+        if self.metrics is not None:
+            self.metrics.observe_queue_wait(stage.name, time.monotonic() - enqueued_at)
+        
+        try:
+            result = await stage.handler(paper)
+        except Exception as e:
+            logger.error(f"{stage.name}阶段处理失败: {paper.get('title')} - {str(e)}")
+            result = None
+        
+        self._count(stage, result)
+        if result is not None and next_stage is not None:
+            # 下一阶段队列满时在线程中等待，形成背压
+            await asyncio.get_running_loop().run_in_executor(None, next_stage.input_queue.put, (result, time.monotonic()))
+    
+    def _drain(self, stage):
+        """丢弃输入队列中剩余的论文，直到取到结束标记"""
+        while not stage._input_closed:
+            if stage.input_queue.get() is _SENTINEL:
+                stage._input_closed = True
+    
+    def _count(self, stage, result):
+        """统计阶段处理结果"""
+        with stage._lock:
+            if result is None:
+                stage.failed += 1
+            else:
+                stage.processed += 1
+
+def run_async_batch(handler, items, concurrency=64, close=None):
+    """批量模式下在事件循环中并发执行协程处理函数，同时进行的任务数不超过 concurrency，保持原有顺序"""
+    async def main():
+        slots = asyncio.Semaphore(max(1, int(concurrency)))
+        
+        async def run(item):
+            async with slots:
+                try:
+                    return await handler(item)
+                except Exception as e:
+                    logger.error(f"处理失败: {item.get('title') if isinstance(item, dict) else item} - {str(e)}")
+                    return None
+        
+        try:
+            return await asyncio.gather(*(run(item) for item in items))
+        finally:
+            if close is not None:
+                await close()
+    
+    return asyncio.run(main())
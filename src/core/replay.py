@@ -0,0 +1,329 @@
+import os
+import gzip
+import json
+import time
+import asyncio
+import hashlib
+import threading
+import logging
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+# 环境变量优先于配置，使解析进程池等子进程与主进程使用相同的模式
+REPLAY_MODE_ENV = "DINHUI_REPLAY"
+
+# off 直接访问网络；record 访问网络并录制；replay 只从录制文件回放，未录制的请求报错；auto 有录制则回放，否则录制
+REPLAY_MODES = ("off", "record", "replay", "auto")
+
+# 影响响应内容的请求头（条件请求和范围请求），计入HTTP录制键：同一地址带ETag重新验证（304）与首次请求（200）分别录制
+KEY_HEADERS = ("if-none-match", "if-modified-since", "if-match", "if-unmodified-since", "if-range", "range")
+
+class CassetteMissError(LookupError):
+    """回放模式下请求没有对应的录制"""
+
+class ReplayHeaders(dict):
+    """回放响应头，按名称查找时不区分大小写"""
+    
+    def __init__(self, headers=None):
+        super().__init__((key.lower(), value) for key, value in (headers or {}).items())
+    
+    def __getitem__(self, key):
+        return super().__getitem__(key.lower())
+    
+    def __contains__(self, key):
+        return super().__contains__(key.lower())
+    
+    def get(self, key, default=None):
+        return super().get(key.lower(), default)
+
+class ReplayResponse:
+    """回放的HTTP响应，提供流水线用到的 requests.Response 接口"""
+    
+    def __init__(self, status_code, headers, content, url, encoding=None):
+        self.status_code = status_code
+        self.headers = ReplayHeaders(headers)
+        self.content = content
+        self.url = url
+        self.encoding = encoding or "utf-8"
+    
+    @property
+    def ok(self):
+        return self.status_code < 400
+    
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors="replace")
+    
+    def json(self):
+        return json.loads(self.content)
+    
+    def iter_content(self, chunk_size=1024 * 1024):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+    
+    def raise_for_status(self):
+        if self.status_code < 400:
+            return
+        message = f"{self.status_code} Error for url: {self.url}"
+        try:
+            import requests
+            raise requests.HTTPError(message, response=self)
+        except ImportError:
+            raise IOError(message)
+    
+    def close(self):
+        pass
+
+class CassetteStore:
+    """录制文件存储：每次交互一个gzip文件，首行为JSON元信息，其后为原始响应体，按请求内容哈希寻址"""
+    
+    def __init__(self, path="data/cassettes"):
+        self.path = path
+    
+    @staticmethod
+    def make_key(kind, *parts):
+        """由交互类型和请求内容生成录制键"""
+        digest = hashlib.sha256(kind.encode("utf-8"))
+        for part in parts:
+            if part is None:
+                part = ""
+            if not isinstance(part, bytes):
+                part = json.dumps(part, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+            digest.update(hashlib.sha256(part).digest())
+        return digest.hexdigest()
+    
+    def _file_path(self, kind, key):
+        return os.path.join(self.path, kind, key[:2], f"{key}.gz")
+    
+    def load(self, kind, key):
+        """读取录制，返回 (元信息, 响应体)，不存在时返回 (None, None)"""
+        try:
+            with gzip.open(self._file_path(kind, key), "rb") as f:
+                meta = json.loads(f.readline().decode("utf-8"))
+                body = f.read()
+            return meta, body
+        except FileNotFoundError:
+            return None, None
+    
+    def save(self, kind, key, meta, body=b""):
+        """原子写入录制，返回文件路径"""
+        file_path = self._file_path(kind, key)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, "wb", compresslevel=6) as f:
+            f.write(json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+            f.write(b"\n")
+            f.write(body)
+        os.replace(tmp_path, file_path)
+        return file_path
+
+class Recorder:
+    """外部调用的录制/回放层：HTTP请求、arXiv搜索、Grobid和LLM调用都经过这里，回放时按录制耗时（或固定延迟）模拟网络延迟"""
+    
+    def __init__(self, mode="off", path="data/cassettes", latency_ms=None, latency_scale=1.0):
+        if mode not in REPLAY_MODES:
+            raise ValueError(f"不支持的录制/回放模式: {mode}")
+        self.mode = mode
+        self.store = CassetteStore(path)
+        # latency_ms 为空时按录制时的实际耗时乘以 latency_scale 模拟延迟，设置后每次调用固定延迟
+        self.latency_ms = latency_ms
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: {"replayed": 0, "recorded": 0, "missed": 0})
+    
+    @property
+    def enabled(self):
+        return self.mode != "off"
+    
+    @property
+    def replaying(self):
+        """是否只回放（不会访问网络）"""
+        return self.mode == "replay"
+    
+    def http(self, method, url, send, params=None, body=None, kind="http", headers=None):
+        """执行或回放一次HTTP请求；send 为实际发送请求并返回响应的函数，headers 中的条件请求头计入录制键"""
+        if not self.enabled:
+            return send()
+        key = self._http_key(kind, method, url, params, body, headers)
+        meta, content = self._lookup(kind, key, f"{method.upper()} {url}")
+        if meta is not None:
+            self._sleep(meta.get("elapsed", 0.0))
+            return self._replay_response(meta, content, url)
+        
+        started = time.monotonic()
+        response = send()
+        elapsed = time.monotonic() - started
+        self._save_response(kind, key, method, url, response, elapsed)
+        return response
+    
+    async def ahttp(self, method, url, send, params=None, body=None, kind="http", headers=None):
+        """异步版本的 http：send 为发送请求的协程函数，响应需提供 status_code、headers、content"""
+        if not self.enabled:
+            return await send()
+        key = self._http_key(kind, method, url, params, body, headers)
+        meta, content = self._lookup(kind, key, f"{method.upper()} {url}")
+        if meta is not None:
+            delay = self._delay(meta.get("elapsed", 0.0))
+            if delay > 0:
+                await asyncio.sleep(delay)
+            return self._replay_response(meta, content, url)
+        
+        started = time.monotonic()
+        response = await send()
+        elapsed = time.monotonic() - started
+        self._save_response(kind, key, method, url, response, elapsed)
+        return response
+    
+    def _http_key(self, kind, method, url, params, body, headers):
+        """HTTP请求的录制键：方法、地址、参数、请求体，以及条件请求头（没有时与不带请求头的键相同，已有录制仍可回放）"""
+        parts = [method.upper(), url, params, body]
+        selected = {name.lower(): value for name, value in (headers or {}).items() if name.lower() in KEY_HEADERS and value}
+        if selected:
+            parts.append(selected)
+        return self.store.make_key(kind, *parts)
+    
+    def call(self, kind, key_parts, func):
+        """执行或回放一次返回值可JSON序列化的调用（如LLM生成）"""
+        if not self.enabled:
+            return func()
+        key = self.store.make_key(kind, *key_parts)
+        meta, body = self._lookup(kind, key, kind)
+        if meta is not None:
+            self._sleep(meta.get("elapsed", 0.0))
+            return json.loads(body.decode("utf-8"))
+        
+        started = time.monotonic()
+        value = func()
+        elapsed = time.monotonic() - started
+        self._save(kind, key, {"elapsed": round(elapsed, 4)}, json.dumps(value, ensure_ascii=False).encode("utf-8"))
+        return value
+    
+    def iterate(self, kind, key_parts, func):
+        """执行或回放一次逐条产出结果的调用（如arXiv分页搜索），元素需可JSON序列化"""
+        if not self.enabled:
+            yield from func()
+            return
+        key = self.store.make_key(kind, *key_parts)
+        meta, body = self._lookup(kind, key, kind)
+        if meta is not None:
+            items = json.loads(body.decode("utf-8"))
+            for item, delay in zip(items, meta.get("delays", [])):
+                self._sleep(delay)
+                yield item
+            return
+        
+        items, delays = [], []
+        last = time.monotonic()
+        try:
+            for item in func():
+                now = time.monotonic()
+                items.append(item)
+                delays.append(round(now - last, 4))
+                yield item
+                last = time.monotonic()
+        except GeneratorExit:
+            # 调用方提前停止迭代时保存已消费的部分，回放时同样只会消费这些；中途出错则不保存
+            self._save(kind, key, {"delays": delays}, json.dumps(items, ensure_ascii=False).encode("utf-8"))
+            raise
+        self._save(kind, key, {"delays": delays}, json.dumps(items, ensure_ascii=False).encode("utf-8"))
+    
+    def wrap_model(self, model, name):
+        """包装LLM模型，使 generate 调用经过录制/回放"""
+        if not self.enabled:
+            return model
+        return RecordedModel(model, name, self)
+    
+    def stats(self):
+        """各交互类型的回放、录制和未命中次数"""
+        with self._lock:
+            return {kind: dict(counts) for kind, counts in self._stats.items()}
+    
+    def _lookup(self, kind, key, label):
+        """按模式查找录制，回放模式下未录制时报错"""
+        if self.mode in ("replay", "auto"):
+            meta, body = self.store.load(kind, key)
+            if meta is not None:
+                with self._lock:
+                    self._stats[kind]["replayed"] += 1
+                return meta, body
+            if self.mode == "replay":
+                with self._lock:
+                    self._stats[kind]["missed"] += 1
+                raise CassetteMissError(f"没有对应的录制: {label} ({key[:12]})")
+        return None, None
+    
+    def _save(self, kind, key, meta, body):
+        """保存录制，失败时只记录日志，不影响本次调用"""
+        try:
+            self.store.save(kind, key, meta, body)
+            with self._lock:
+                self._stats[kind]["recorded"] += 1
+        except Exception as e:
+            logger.error(f"保存录制失败: {kind}/{key[:12]} - {str(e)}")
+    
+    @staticmethod
+    def _replay_response(meta, content, url):
+        """由录制构造响应"""
+        return ReplayResponse(meta["status_code"], meta.get("headers"), content, meta.get("url", url), meta.get("encoding"))
+    
+    def _save_response(self, kind, key, method, url, response, elapsed):
+        """录制HTTP响应"""
+        self._save(kind, key, {
+            "method": method.upper(),
+            "url": getattr(response, "url", url),
+            "status_code": response.status_code,
+            "headers": dict(response.headers),
+            "encoding": getattr(response, "encoding", None),
+            "elapsed": round(elapsed, 4)
+        }, response.content)
+    
+    def _delay(self, recorded_seconds):
+        """回放时模拟的调用延迟（秒）"""
+        if self.latency_ms is not None:
+            return self.latency_ms / 1000.0
+        return recorded_seconds * self.latency_scale
+    
+    def _sleep(self, recorded_seconds):
+        """模拟调用延迟"""
+        delay = self._delay(recorded_seconds)
+        if delay > 0:
+            time.sleep(delay)
+
+class RecordedModel:
+    """经过录制/回放的LLM模型，回放时不会初始化或调用真实模型"""
+    
+    def __init__(self, model, name, recorder):
+        self.model = model
+        self.name = name
+        self.recorder = recorder
+    
+    def generate(self, prompt):
+        return self.recorder.call("llm", (self.name, prompt), lambda: self.model.generate(prompt))
+
+# 全局录制/回放实例，首次访问时按 system.replay 配置创建
+_recorder = None
+_recorder_lock = threading.Lock()
+
+def get_recorder():
+    """获取全局录制/回放实例"""
+    global _recorder
+    if _recorder is None:
+        with _recorder_lock:
+            if _recorder is None:
+                from .config import get_config_manager
+                config = get_config_manager()
+                mode = os.environ.get(REPLAY_MODE_ENV) or config.get("system.replay.mode", "off") or "off"
+                try:
+                    _recorder = Recorder(
+                        mode=mode,
+                        path=config.get("system.replay.path", "data/cassettes"),
+                        latency_ms=config.get("system.replay.latency_ms"),
+                        latency_scale=config.get("system.replay.latency_scale", 1.0)
+                    )
+                    if _recorder.enabled:
+                        logger.info(f"录制/回放模式: {mode}，录制目录: {_recorder.store.path}")
+                except Exception as e:
+                    logger.error(f"初始化录制/回放失败，已关闭: {str(e)}")
+                    _recorder = Recorder()
+    return _recorder
@@ -1,64 +1,262 @@
-import schedule
 import time
 import threading
 import logging
-from .controller import controller
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from .config import get_config_manager
+from .cron import CronExpression
 
 logger = logging.getLogger(__name__)
 
+# 调度线程单次等待的上限（秒），系统时间被调整后也能重新计算下次触发时间
+MAX_SLEEP_SECONDS = 3600
+
+# 星期名称对应的cron取值
+WEEKDAYS = {
+    "sunday": 0,
+    "monday": 1,
+    "tuesday": 2,
+    "wednesday": 3,
+    "thursday": 4,
+    "friday": 5,
+    "saturday": 6
+}
+
+class Job:
+    """定时任务：cron表达式、执行函数及重叠控制策略"""
+    
+    def __init__(self, name, cron, func, kwargs=None, overlap="skip", max_concurrency=1, group=None):
+        self.name = name
+        self.cron = cron if isinstance(cron, CronExpression) else CronExpression(cron)
+        self.func = func
+        self.kwargs = kwargs or {}
+        # 上一次运行未结束时的处理方式：skip 跳过本次触发；coalesce 合并为一次，当前运行结束后补跑
+        if overlap not in ("skip", "coalesce"):
+            raise ValueError(f"不支持的重叠策略: {overlap}")
+        self.overlap = overlap
+        # 同组任务共享并发上限，流水线任务默认同组，避免同时写同一个数据库
+        self.max_concurrency = max_concurrency
+        self.group = group or name
+        self.next_run = self.cron.next_after(datetime.now())
+        # 被合并、等待补跑的触发的计划时间
+        self.pending = None
+
 class Scheduler:
     def __init__(self):
+        self.config = get_config_manager()
         self.running = False
         self.thread = None
+        self.jobs = []
+        self.max_workers = self.config.get("system.scheduler.max_workers", 2)
+        self.default_overlap = self.config.get("system.scheduler.overlap", "skip")
+        self.executor = None
+        self.history = None
+        self._lock = threading.Lock()
+        # 添加任务或停止时唤醒调度线程
+        self._wakeup = threading.Event()
+        # 各任务组正在执行的数量
+        self._running_counts = {}
+        # 正在执行的任务的历史记录ID，停止时仍未结束的标记为interrupted
+        self._active_runs = set()
     
     def start(self):
         """启动调度器"""
         if not self.running:
             self.running = True
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+            self._open_history()
+            # 上次进程异常退出时遗留的running记录
+            if self.history is not None:
+                self.history.mark_interrupted()
             self.thread = threading.Thread(target=self._run_scheduler, daemon=True)
             self.thread.start()
             logger.info("调度器已启动")
     
-    def stop(self):
-        """停止调度器"""
+    def stop(self, wait=True):
+        """停止调度器，wait为True时等待正在执行的任务结束"""
         self.running = False
+        self._wakeup.set()
         if self.thread:
             self.thread.join()
+        if self.executor:
+            self.executor.shutdown(wait=wait)
+            self.executor = None
+        if self.history is not None:
+            # 不等待时仍在执行的任务随进程退出而中断
+            with self._lock:
+                active_runs = list(self._active_runs)
+            if active_runs:
+                self.history.mark_interrupted(active_runs)
+        if self.history is not None and wait:
+            self.history.close()
+            self.history = None
         logger.info("调度器已停止")
     
-    def schedule_daily(self, hour, minute):
-        """设置每日定时任务"""
-        schedule.every().day.at(f"{hour:02d}:{minute:02d}").do(self._run_pipeline)
+    def add_job(self, job):
+        """添加定时任务"""
+        with self._lock:
+            self.jobs.append(job)
+        self._wakeup.set()
+        logger.info(f"已添加定时任务 {job.name} ({job.cron.expression})，下次执行: {job.next_run}")
+        return job
+    
+    def schedule_cron(self, expression, name=None, incremental=True, overlap=None, max_concurrency=1):
+        """按cron表达式设置流水线定时任务（默认增量爬取）"""
+        return self.add_job(Job(
+            name or f"pipeline[{expression}]",
+            expression,
+            self._run_pipeline,
+            kwargs={"incremental": incremental},
+            overlap=overlap or self.default_overlap,
+            max_concurrency=max_concurrency,
+            group="pipeline"
+        ))
+    
+    def schedule_daily(self, hour, minute, incremental=True):
+        """设置每日定时任务（默认增量爬取）"""
+        job = self.schedule_cron(f"{minute} {hour} * * *", name=f"daily {hour:02d}:{minute:02d}", incremental=incremental)
         logger.info(f"已设置每日 {hour:02d}:{minute:02d} 执行任务")
+        return job
     
-    def schedule_weekly(self, day_of_week, hour, minute):
+    def schedule_weekly(self, day_of_week, hour, minute, incremental=True):
         """设置每周定时任务"""
-        days = {
-            "monday": schedule.every().monday,
-            "tuesday": schedule.every().tuesday,
-            "wednesday": schedule.every().wednesday,
-            "thursday": schedule.every().thursday,
-            "friday": schedule.every().friday,
-            "saturday": schedule.every().saturday,
-            "sunday": schedule.every().sunday
-        }
-        if day_of_week.lower() in days:
-            days[day_of_week.lower()].at(f"{hour:02d}:{minute:02d}").do(self._run_pipeline)
-            logger.info(f"已设置每周 {day_of_week} {hour:02d}:{minute:02d} 执行任务")
+        weekday = WEEKDAYS.get(day_of_week.lower())
+        if weekday is None:
+            logger.error(f"无效的星期: {day_of_week}")
+            return None
+        job = self.schedule_cron(
+            f"{minute} {hour} * * {weekday}",
+            name=f"weekly {day_of_week.lower()} {hour:02d}:{minute:02d}",
+            incremental=incremental
+        )
+        logger.info(f"已设置每周 {day_of_week} {hour:02d}:{minute:02d} 执行任务")
+        return job
+    
+    def schedule_from_config(self):
+        """按 system.scheduler.jobs 配置添加定时任务"""
+        jobs = []
+        for job_config in self.config.get("system.scheduler.jobs") or []:
+            try:
+                jobs.append(self.schedule_cron(
+                    job_config["cron"],
+                    name=job_config.get("name"),
+                    incremental=job_config.get("incremental", True),
+                    overlap=job_config.get("overlap"),
+                    max_concurrency=job_config.get("max_concurrency", 1)
+                ))
+            except Exception as e:
+                logger.error(f"添加定时任务失败: {job_config} - {str(e)}")
+        return jobs
     
-    def _run_pipeline(self):
-        """执行工作流程"""
+    def _run_pipeline(self, incremental=True):
+        """执行工作流程：每次运行使用新的控制器，同时运行的任务不共享爬取、台账和指标状态"""
         logger.info("调度器触发工作流程执行")
+        from .controller import Controller
+        return Controller().run_pipeline(incremental=incremental)
+    
+    def _open_history(self):
+        """打开任务历史记录"""
+        if self.history is not None or not self.config.get("system.scheduler.history", True):
+            return
         try:
-            controller.run_pipeline()
+            from src.database.job_history import JobHistoryStore
+            self.history = JobHistoryStore()
         except Exception as e:
-            logger.error(f"调度器执行任务失败: {str(e)}")
+            logger.error(f"打开任务历史失败，本次不记录执行历史: {str(e)}")
+            self.history = None
     
     def _run_scheduler(self):
-        """运行调度器主循环"""
+        """运行调度器主循环：等待到最近一个任务的触发时间，任务交给线程池执行"""
         while self.running:
-            schedule.run_pending()
-            time.sleep(60)  # 每分钟检查一次
+            # 先清除唤醒标记，处理期间添加的任务会让下面的等待立即返回
+            self._wakeup.clear()
+            now = datetime.now()
+            with self._lock:
+                for job in self.jobs:
+                    if job.next_run <= now:
+                        scheduled_at = job.next_run
+                        # 错过的多次触发（如机器休眠）只执行一次
+                        job.next_run = job.cron.next_after(now)
+                        self._trigger(job, scheduled_at)
+                next_due = min((job.next_run for job in self.jobs), default=None)
+            
+            timeout = MAX_SLEEP_SECONDS
+            if next_due is not None:
+                timeout = min(timeout, max(0.0, (next_due - datetime.now()).total_seconds()))
+            self._wakeup.wait(timeout)
+    
+    def _trigger(self, job, scheduled_at):
+        """处理一次触发（需持有锁）：同组运行数已满时按重叠策略跳过或合并"""
+        if self._running_counts.get(job.group, 0) < job.max_concurrency:
+            self._submit(job, scheduled_at)
+            return
+        
+        if job.overlap == "coalesce":
+            if job.pending is None:
+                job.pending = scheduled_at
+            logger.info(f"定时任务 {job.name} 上一次运行尚未结束，本次触发合并到运行结束后执行")
+            status = "coalesced"
+        else:
+            logger.warning(f"定时任务 {job.name} 上一次运行尚未结束，跳过本次触发")
+            status = "skipped"
+        if self.history is not None:
+            self.history.record_trigger(job.name, scheduled_at, status)
+    
+    def _submit(self, job, scheduled_at):
+        """提交任务到线程池（需持有锁）"""
+        self._running_counts[job.group] = self._running_counts.get(job.group, 0) + 1
+        try:
+            self.executor.submit(self._execute, job, scheduled_at)
+        except Exception as e:
+            self._running_counts[job.group] -= 1
+            logger.error(f"提交定时任务失败: {job.name} - {str(e)}")
+    
+    def _execute(self, job, scheduled_at):
+        """在线程池中执行任务并记录历史"""
+        run_id = self.history.start(job.name, scheduled_at) if self.history is not None else None
+        if run_id is not None:
+            with self._lock:
+                self._active_runs.add(run_id)
+        started = time.monotonic()
+        status = "success"
+        error = None
+        try:
+            if job.func(**job.kwargs) is False:
+                status = "failed"
+        except Exception as e:
+            logger.error(f"调度器执行任务失败: {job.name} - {str(e)}")
+            status = "failed"
+            error = str(e)
+        finally:
+            duration = time.monotonic() - started
+            logger.info(f"定时任务 {job.name} 执行结束: {status}，耗时 {duration:.1f} 秒")
+            if self.history is not None:
+                self.history.finish(run_id, status, duration, error)
+            
+            with self._lock:
+                self._active_runs.discard(run_id)
+                self._running_counts[job.group] -= 1
+                # 同组有被合并的触发时，在本次运行结束后补跑
+                for other in self.jobs:
+                    if not self.running or self.executor is None:
+                        break
+                    if other.pending is not None and other.group == job.group \
+                            and self._running_counts.get(other.group, 0) < other.max_concurrency:
+                        scheduled_at, other.pending = other.pending, None
+                        self._submit(other, scheduled_at)
+
+# 全局调度器实例，首次访问时创建
+_scheduler = None
+
+def get_scheduler():
+    """获取全局调度器实例"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = Scheduler()
+    return _scheduler
 
-# 创建全局调度器实例
-scheduler = Scheduler()
+def __getattr__(name):
+    """模块级延迟属性"""
+    if name == "scheduler":
+        return get_scheduler()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
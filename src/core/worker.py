@@ -0,0 +1,103 @@
+import os
+import uuid
+import socket
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# worker阶段 -> 领取的论文在台账中的阶段
+WORKER_STAGES = {
+    "download": "crawled",
+    "parse": "downloaded",
+    "analyze": "parsed",
+    "store": "analyzed"
+}
+
+class Worker:
+    """阶段worker：从台账按租约领取一批论文处理并定期续租，进程崩溃后租约过期，论文由其他worker重新领取"""
+    
+    def __init__(self, ledger, stage, handler, workers=1, batch_size=8, lease_seconds=300, idle_seconds=10):
+        if stage not in WORKER_STAGES:
+            raise ValueError(f"不支持的worker阶段: {stage}")
+        self.ledger = ledger
+        self.stage = stage
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.lease_seconds = lease_seconds
+        self.idle_seconds = idle_seconds
+        # 租约持有者标识：主机名 + 进程号 + 随机后缀，日志和台账中可区分各个worker进程
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._stop = threading.Event()
+        self._count_lock = threading.Lock()
+        self._processed = 0
+        self._failed = 0
+    
+    def stop(self):
+        """请求停止：处理完当前论文后退出"""
+        self._stop.set()
+    
+    def run(self, once=False):
+        """循环领取并处理论文，once为True时没有可领取的论文即退出，返回成功处理的论文数"""
+        logger.info(f"worker {self.owner} 开始处理 {self.stage} 阶段，并发 {self.workers}，每批 {self.batch_size} 篇")
+        heartbeat = threading.Thread(target=self._heartbeat, name=f"heartbeat-{self.stage}", daemon=True)
+        heartbeat.start()
+        
+        self._processed = 0
+        self._failed = 0
+        try:
+            # 每个线程独立领取批次，单篇耗时长的论文不会拖住其他线程
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"worker-{self.stage}") as executor:
+                futures = [executor.submit(self._work_loop, once) for _ in range(self.workers)]
+                try:
+                    for future in futures:
+                        future.result()
+                finally:
+                    # 被中断时通知各线程处理完当前论文后退出
+                    self._stop.set()
+        finally:
+            heartbeat.join()
+            # 正常退出或被中断时释放尚未处理完的论文，其他worker可立即领取
+            self.ledger.release_all(self.owner)
+        logger.info(f"worker {self.owner} 已停止：成功 {self._processed} 篇，失败 {self._failed} 篇")
+        return self._processed
+    
+    def _work_loop(self, once):
+        """单个线程的领取-处理循环"""
+        while not self._stop.is_set():
+            papers = self.ledger.claim(WORKER_STAGES[self.stage], self.owner, self.batch_size, self.lease_seconds)
+            if not papers:
+                if once:
+                    return
+                self._stop.wait(self.idle_seconds)
+                continue
+            
+            for paper in papers:
+                if self._stop.is_set():
+                    # 未处理的论文在退出时统一释放租约
+                    break
+                result = self._process(paper)
+                with self._count_lock:
+                    if result:
+                        self._processed += 1
+                    else:
+                        self._failed += 1
+            logger.info(f"worker {self.owner} 累计处理 {self._processed} 篇，失败 {self._failed} 篇")
+    
+    def _process(self, paper):
+        """处理单篇论文，成功时台账记录会同时清除租约，失败时释放租约等待重试"""
+        try:
+            return self.handler(paper)
+        except Exception as e:
+            logger.error(f"worker处理论文失败: {paper.get('title')} - {str(e)}")
+            return None
+        finally:
+            self.ledger.release(paper, self.owner)
+    
+    def _heartbeat(self):
+        """定期续租，租约时长的三分之一续一次"""
+        interval = max(1.0, self.lease_seconds / 3.0)
+        while not self._stop.wait(interval):
+            self.ledger.renew_leases(self.owner, self.lease_seconds)
@@ -1,11 +1,44 @@
-from .arxiv import ArxivCrawler
-from .scholar import ScholarCrawler
-from .utils import RequestHandler, normalize_title, extract_doi
+import importlib
+
+# 延迟导入：scholarly、arxiv 等依赖只在使用对应爬虫时加载
+_LAZY_ATTRS = {
+    "ArxivCrawler": ".arxiv",
+    "ScholarCrawler": ".scholar",
+    "DumpCrawler": ".dump",
+    "SnowballCrawler": ".snowball",
+    "IdentityResolver": ".identity",
+    "RelevanceFilter": ".relevance",
+    "RateLimiter": ".rate_limit",
+    "HostScheduler": ".politeness",
+    "HTTPCache": ".http_cache",
+    "RequestHandler": ".utils",
+    "AsyncRequestHandler": ".async_http",
+    "normalize_title": ".utils",
+    "extract_doi": ".utils",
+    "strip_arxiv_version": ".utils",
+    "canonical_paper_id": ".utils"
+}
 
 __all__ = [
     "ArxivCrawler",
     "ScholarCrawler",
+    "DumpCrawler",
+    "SnowballCrawler",
+    "IdentityResolver",
+    "RelevanceFilter",
+    "RateLimiter",
+    "HostScheduler",
+    "HTTPCache",
     "RequestHandler",
+    "AsyncRequestHandler",
     "normalize_title",
-    "extract_doi"
+    "extract_doi",
+    "strip_arxiv_version",
+    "canonical_paper_id"
 ]
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        module = importlib.import_module(_LAZY_ATTRS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,11 +1,31 @@
-import arxiv
 import logging
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from src.core.config import config_manager
+from src.core.cache import get_artifact_cache
+from src.core.replay import get_recorder
+from .rate_limit import get_rate_limiter
+from .utils import RequestHandler, strip_arxiv_version
+from .identity import normalize_text
+from .oai import ARXIV_OAI_URL
 
 logger = logging.getLogger(__name__)
 
+# arXiv查询API
+ARXIV_API_URL = "https://export.arxiv.org/api/query"
+
+# Atom响应中用到的命名空间
+_ATOM_NS = {
+    "atom": "http://www.w3.org/2005/Atom",
+    "opensearch": "http://a9.com/-/spec/opensearch/1.1/",
+    "arxiv": "http://arxiv.org/schemas/atom"
+}
+
+# 日期窗口拆分的最小粒度，窗口内结果仍超过分片上限时只获取前 max_per_shard 条
+MIN_SHARD_WINDOW = timedelta(hours=1)
+
 class ArxivCrawler:
-    def __init__(self):
+    def __init__(self, incremental=None, domain=None):
         self.config = config_manager
         self.domain = self.config.get_research_domain()
         self.keywords = self.config.get_keywords()
@@ -13,50 +33,348 @@ class ArxivCrawler:
         self.categories = self.config.get_arxiv_categories()
         self.max_results = self.config.get_max_results("arxiv")
         self.results_per_page = self.config.get("sources.arxiv.results_per_page", 50)
+        # 增量模式：只获取上次运行之后更新的论文
+        if incremental is None:
+            incremental = self.config.get("sources.incremental", False)
+        self.incremental = incremental
+        # 分片并发查询：按关键词、分类号和日期窗口拆分，所有分片和领域共享同一个限速器
+        self.api_url = self.config.get("sources.arxiv.api_url") or ARXIV_API_URL
+        self.sharding = self.config.get("sources.arxiv.sharding.enabled", True)
+        self.shard_workers = self.config.get("sources.arxiv.sharding.workers", 4)
+        self.max_per_shard = self.config.get("sources.arxiv.sharding.max_per_shard", 1000)
+        self.rate_limiter = get_rate_limiter("arxiv", self.config.get("sources.arxiv.rate_limit_seconds", 3))
+        # 获取方式：search 使用检索API；oai 通过OAI-PMH批量收割元数据后在本地按关键词过滤
+        self.mode = self.config.get("sources.arxiv.mode", "search")
+        self.oai_url = self.config.get("sources.arxiv.oai.url") or ARXIV_OAI_URL
+        self.oai_sets = self.config.get("sources.arxiv.oai.sets") or []
+        # 搜索结果缓存有效期（秒）
+        self.cache_ttl = self.config.get("system.cache.crawl_ttl_hours", 24) * 3600
+        # 多领域运行时按领域配置覆盖领域名称、关键词和时间范围
+        if domain:
+            self.domain = domain["name"]
+            self.keywords = domain["keywords"]
+            self.categories = domain["categories"]
+            self.start_year, self.end_year = domain["start_year"], domain["end_year"]
     
     def crawl(self):
         """爬取arXiv论文"""
-        papers = []
+        papers = list(self.iter_papers())
+        logger.info(f"成功获取 {len(papers)} 篇arXiv论文")
+        return papers
+    
+    def iter_papers(self):
+        """逐条产出arXiv论文，供流式流水线在首条结果到达时即开始处理"""
+        if self.mode == "oai":
+            yield from self._iter_harvest()
+            return
+        if self.incremental:
+            yield from self._iter_incremental()
+            return
         
         # 构建搜索查询
         query = self._build_query()
         logger.info(f"构建arXiv搜索查询: {query}")
         
+        # 相同查询在有效期内直接使用缓存的结果
+        cache = get_artifact_cache()
+        cache_key = cache.make_key("arxiv", query, self.max_results, "sharded" if self.sharding else None)
+        cached = cache.get_json("crawl", cache_key, max_age=self.cache_ttl)
+        if cached is not None:
+            logger.info(f"使用缓存的arXiv搜索结果: {len(cached)} 篇")
+            yield from cached
+            return
+        
         # 执行搜索
+        papers = []
         try:
-            # 使用arxiv库的搜索功能
-            search = arxiv.Search(
-                query=query,
-                max_results=self.max_results,
-                sort_by=arxiv.SortCriterion.Relevance,
-                sort_order=arxiv.SortOrder.Descending
-            )
-            
-            # 获取结果
-            for result in arxiv.Client().results(search):
-                paper = self._parse_result(result)
+            results = self._iter_sharded() if self.sharding else self._iter_search(query)
+            for paper in results:
                 papers.append(paper)
+                yield paper
                 
                 if len(papers) >= self.max_results:
                     break
             
-            logger.info(f"成功获取 {len(papers)} 篇arXiv论文")
+            # 只缓存完整执行的搜索
+            cache.put_json("crawl", cache_key, papers)
         except Exception as e:
             logger.error(f"arXiv搜索失败: {str(e)}")
+    
+    def _iter_search(self, query):
+        """用arxiv库按单个查询串行翻页获取"""
+        import arxiv
+        client = arxiv.Client(page_size=self.results_per_page)
+        search = arxiv.Search(
+            query=query,
+            max_results=self.max_results,
+            sort_by=arxiv.SortCriterion.Relevance,
+            sort_order=arxiv.SortOrder.Descending
+        )
+        return self._iter_results(search, (query, self.max_results, "relevance"), client)
+    
+    def _iter_sharded(self):
+        """按关键词×分类号×日期窗口拆分查询并发获取，合并去重后逐条产出；有分片失败时在最后抛出异常"""
+        start = datetime(self.start_year or 1991, 1, 1)
+        end = datetime((self.end_year or datetime.now().year) + 1, 1, 1)
+        request_handler = RequestHandler()
+        seen = set()
+        failures = 0
         
-        return papers
+        executor = ThreadPoolExecutor(max_workers=self.shard_workers, thread_name_prefix="arxiv-shard")
+        pending = {executor.submit(self._fetch_shard_page, request_handler, term, start, end, 0) for term in self._shard_terms()}
+        logger.info(f"arXiv分片查询: {len(pending)} 个分片，并发 {self.shard_workers}")
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        papers, followups = future.result()
+                    except Exception as e:
+                        failures += 1
+                        logger.error(f"arXiv分片查询失败: {str(e)}")
+                        continue
+                    for task in followups:
+                        pending.add(executor.submit(self._fetch_shard_page, request_handler, *task))
+                    # 同一篇论文可能命中多个关键词或分类号
+                    for paper in papers:
+                        key = strip_arxiv_version(paper["arxiv_id"])
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                        yield paper
+        finally:
+            # 调用方提前停止（已达到最大结果数）时取消尚未开始的分页请求
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+        
+        if failures:
+            raise RuntimeError(f"{failures} 个arXiv分片请求失败，结果可能不完整")
     
-    def _build_query(self):
-        """构建搜索查询字符串"""
+    def _shard_terms(self):
+        """分片的查询条件：每个关键词与每个分类号的组合"""
+        keywords = [f"({keyword})" for keyword in self.keywords] or [None]
+        categories = [f"cat:{category}" for category in self.categories] or [None]
+        return [
+            " AND ".join(part for part in (keyword, category) if part)
+            for keyword in keywords for category in categories
+            if keyword or category
+        ]
+    
+    def _fetch_shard_page(self, request_handler, term, start, end, offset):
+        """获取分片的一页结果，返回 (论文列表, 后续任务)：首页结果超过分片上限时对半拆分日期窗口，否则安排其余分页"""
+        query = f"{term} AND submittedDate:[{start.strftime('%Y%m%d%H%M')} TO {end.strftime('%Y%m%d%H%M')}]"
+        page_size = min(self.results_per_page, self.max_per_shard)
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        response = request_handler.get(self.api_url, params={
+            "search_query": query,
+            "start": offset,
+            "max_results": page_size,
+            "sortBy": "relevance",
+            "sortOrder": "descending"
+        })
+        total, papers = self._parse_feed(response.content)
+        if offset > 0:
+            return papers, []
+        
+        if total > self.max_per_shard and end - start > MIN_SHARD_WINDOW:
+            # 本页结果保留（重复的由合并去重处理），两个子窗口重新从首页开始
+            middle = start + (end - start) / 2
+            logger.debug(f"arXiv分片 {query} 共 {total} 条，拆分日期窗口")
+            return papers, [(term, start, middle, 0), (term, middle, end, 0)]
+        if total > self.max_per_shard:
+            logger.warning(f"arXiv分片 {query} 共 {total} 条，超过分片上限，只获取前 {self.max_per_shard} 条")
+        limit = min(total, self.max_per_shard)
+        return papers, [(term, start, end, page_offset) for page_offset in range(page_size, limit, page_size)]
+    
+    def _parse_feed(self, content):
+        """解析arXiv API的Atom响应，返回 (结果总数, 论文列表)"""
+        import xml.etree.ElementTree as ET
+        root = ET.fromstring(content)
+        total = int(root.findtext("opensearch:totalResults", "0", _ATOM_NS))
+        papers = []
+        for entry in root.findall("atom:entry", _ATOM_NS):
+            entry_id = entry.findtext("atom:id", "", _ATOM_NS)
+            # 查询语法错误时API返回一条错误条目
+            if "/api/errors" in entry_id:
+                raise ValueError(f"arXiv API返回错误: {entry.findtext('atom:summary', '', _ATOM_NS).strip()}")
+            papers.append(self._parse_entry(entry))
+        return total, papers
+    
+    def _parse_entry(self, entry):
+        """解析Atom条目，字段与 _parse_result 一致"""
+        short_id = entry.findtext("atom:id", "", _ATOM_NS).rsplit("/abs/", 1)[-1]
+        published = _parse_atom_time(entry.findtext("atom:published", None, _ATOM_NS))
+        updated = _parse_atom_time(entry.findtext("atom:updated", None, _ATOM_NS))
+        pdf_url = next(
+            (link.get("href") for link in entry.findall("atom:link", _ATOM_NS) if link.get("title") == "pdf"),
+            f"https://arxiv.org/pdf/{short_id}"
+        )
+        primary = entry.find("arxiv:primary_category", _ATOM_NS)
+        return {
+            "title": " ".join(entry.findtext("atom:title", "", _ATOM_NS).split()),
+            "authors": [author.findtext("atom:name", "", _ATOM_NS) for author in entry.findall("atom:author", _ATOM_NS)],
+            "summary": entry.findtext("atom:summary", "", _ATOM_NS).strip(),
+            "publish_year": published.year if published else None,
+            "source": "arXiv",
+            "arxiv_id": short_id,
+            "pdf_url": pdf_url,
+            "html_url": f"https://arxiv.org/abs/{short_id}",
+            "categories": [category.get("term") for category in entry.findall("atom:category", _ATOM_NS)],
+            "doi": entry.findtext("arxiv:doi", None, _ATOM_NS),
+            "primary_category": primary.get("term") if primary is not None else None,
+            "published": published.isoformat() if published else None,
+            "updated": updated.isoformat() if updated else None
+        }
+    
+    def _iter_harvest(self):
+        """OAI-PMH收割：按set和日期范围批量获取元数据写入本地元数据存储，再在本地按分类号、年份和关键词过滤后产出"""
+        from src.database.arxiv_metadata import ArxivMetadataStore
+        from src.database.crawl_state import CrawlStateStore
+        from .oai import OAIHarvester, parse_arxiv_raw
+        
+        state = CrawlStateStore()
+        store = ArxivMetadataStore()
+        harvester = OAIHarvester(self.oai_url, rate_limiter=self.rate_limiter)
+        keyword_terms = [normalize_text(keyword).split() for keyword in self.keywords]
+        until_date = f"{self.end_year}-12-31" if self.end_year else None
+        harvested = 0
+        matched = 0
+        try:
+            for set_spec in self._oai_sets():
+                state_key = f"oai:{set_spec or '*'}"
+                # 增量模式从上次收割到的最后修改日期开始（from包含当天，重复记录按ID覆盖）
+                high_water = state.get_high_water("arXiv OAI", state_key) if self.incremental else None
+                from_date = high_water or (f"{self.start_year}-01-01" if self.start_year else None)
+                logger.info(f"开始OAI-PMH收割: set={set_spec or '全部'}, from={from_date}, until={until_date}")
+                
+                newest = high_water
+                for records in harvester.list_records("arXivRaw", set_spec, from_date, until_date):
+                    papers = []
+                    for header, metadata in records:
+                        if newest is None or header["datestamp"] > newest:
+                            newest = header["datestamp"]
+                        paper = parse_arxiv_raw(metadata) if metadata is not None else None
+                        if paper:
+                            paper["datestamp"] = header["datestamp"]
+                            papers.append(paper)
+                    # 每页记录在一个事务中写入元数据存储
+                    harvested += store.upsert_many(papers)
+                    for paper in papers:
+                        paper.pop("datestamp", None)
+                        if self._matches_locally(paper, keyword_terms):
+                            matched += 1
+                            yield paper
+                
+                # 整个set收割完成后才推进高水位，中途失败下次从原位置重新收割
+                if newest and newest != high_water:
+                    state.set_high_water("arXiv OAI", state_key, newest)
+            logger.info(f"OAI-PMH收割完成: 写入 {harvested} 条元数据，本地过滤后 {matched} 篇")
+        except Exception as e:
+            logger.error(f"OAI-PMH收割失败: {str(e)}")
+        finally:
+            state.close()
+            store.close()
+    
+    def _oai_sets(self):
+        """收割的set列表：优先使用配置，否则由分类号推导（如 cs.AI -> cs:cs:AI）"""
+        if self.oai_sets:
+            return list(self.oai_sets)
+        sets = []
+        for category in self.categories:
+            archive, _, subject = category.partition(".")
+            set_spec = f"{archive}:{archive}:{subject}" if subject else category
+            if set_spec not in sets:
+                sets.append(set_spec)
+        # 未配置分类号时收割全部记录
+        return sets or [None]
+    
+    def _matches_locally(self, paper, keyword_terms):
+        """本地过滤：分类号有交集、提交年份在范围内，且标题或摘要包含任一关键词的全部词"""
+        if self.categories and not set(paper.get("categories") or []) & set(self.categories):
+            return False
+        year = paper.get("publish_year")
+        if year and ((self.start_year and year < self.start_year) or (self.end_year and year > self.end_year)):
+            return False
+        if not keyword_terms:
+            return True
+        tokens = set(normalize_text(f"{paper.get('title') or ''} {paper.get('summary') or ''}").split())
+        return any(terms and all(term in tokens for term in terms) for terms in keyword_terms)
+    
+    def _iter_incremental(self):
+        """增量爬取：按更新时间升序获取高水位之后的论文，并推进高水位"""
+        import arxiv
+        from src.database.crawl_state import CrawlStateStore
+        
+        state = CrawlStateStore()
+        base_query = self._build_base_query()
+        high_water = state.get_high_water("arXiv", base_query)
+        since = datetime.fromisoformat(high_water) if high_water else None
+        
+        query = self._build_query(since=since)
+        logger.info(f"构建arXiv增量搜索查询: {query}")
+        
+        newest = since
+        try:
+            # 升序获取，即使中途中断，已产出部分的高水位也是安全的
+            search = arxiv.Search(
+                query=query,
+                max_results=self.max_results,
+                sort_by=arxiv.SortCriterion.LastUpdatedDate,
+                sort_order=arxiv.SortOrder.Ascending
+            )
+            
+            count = 0
+            # 查询中的截止时间每次不同，录制键只使用高水位
+            for paper in self._iter_results(search, (base_query, high_water, self.max_results, "incremental")):
+                updated = datetime.fromisoformat(paper["updated"]) if paper.get("updated") else None
+                # 查询时间精度为分钟，跳过已处理过的边界结果
+                if since and updated and updated <= since:
+                    continue
+                yield paper
+                count += 1
+                if updated and (newest is None or updated > newest):
+                    newest = updated
+                
+                if count >= self.max_results:
+                    break
+            logger.info(f"arXiv增量爬取获取到 {count} 篇新论文")
+        except Exception as e:
+            logger.error(f"arXiv增量搜索失败: {str(e)}")
+        finally:
+            if newest is not None and newest != since:
+                state.set_high_water("arXiv", base_query, newest.isoformat())
+            state.close()
+    
+    def _iter_results(self, search, key_parts, client=None):
+        """执行搜索并逐条产出解析后的论文，经过录制/回放层"""
+        import arxiv
+        client = client or arxiv.Client(page_size=self.results_per_page)
+        return get_recorder().iterate(
+            "arxiv", key_parts, lambda: (self._parse_result(result) for result in client.results(search))
+        )
+    
+    def _build_base_query(self):
+        """构建不含时间范围的查询字符串（关键词与分类号）"""
         # 构建关键词查询
         keyword_query = " OR ".join([f"{keyword}" for keyword in self.keywords])
         
         # 构建分类号查询
         if self.categories:
             category_query = " OR ".join([f"cat:{category}" for category in self.categories])
-            query = f"({keyword_query}) AND ({category_query})"
-        else:
-            query = keyword_query
+            return f"({keyword_query}) AND ({category_query})"
+        return keyword_query
+    
+    def _build_query(self, since=None):
+        """构建搜索查询字符串"""
+        query = self._build_base_query()
+        
+        # 增量模式下按最后更新时间过滤
+        if since:
+            now = datetime.utcnow()
+            query += f" AND lastUpdatedDate:[{since.strftime('%Y%m%d%H%M')} TO {now.strftime('%Y%m%d%H%M')}]"
+            return query
         
         # 添加时间范围
         if self.start_year:
@@ -86,7 +404,15 @@ class ArxivCrawler:
             "html_url": f"https://arxiv.org/abs/{result.get_short_id()}",
             "categories": result.categories,
             "doi": getattr(result, "doi", None),
-            "primary_category": result.primary_category
+            "primary_category": result.primary_category,
+            "published": result.published.isoformat() if result.published else None,
+            "updated": result.updated.isoformat() if result.updated else None
         }
         
         return paper
+
+def _parse_atom_time(text):
+    """解析Atom时间（如 2021-01-01T00:00:00Z）"""
+    if not text:
+        return None
+    return datetime.fromisoformat(text.strip().replace("Z", "+00:00"))
@@ -0,0 +1,200 @@
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from src.core.replay import get_recorder, CassetteMissError, ReplayResponse
+from .politeness import get_host_scheduler, host_of
+from .http_cache import get_http_cache
+
+logger = logging.getLogger(__name__)
+
+class StreamResponse:
+    """流式响应：状态码、响应头，响应体用 iter_chunks(块大小) 异步分块读取"""
+    
+    def __init__(self, status_code, headers, url, iter_chunks):
+        self.status_code = status_code
+        self.headers = headers
+        self.url = url
+        self.iter_chunks = iter_chunks
+
+def _iter_slices(content):
+    """把完整的响应体包装为按块读取的异步迭代"""
+    async def iter_chunks(chunk_size):
+        for start in range(0, len(content), chunk_size):
+            yield content[start:start + chunk_size]
+    return iter_chunks
+
+class AsyncRequestHandler:
+    """异步请求处理器：基于aiohttp连接池复用keep-alive连接，按主机限制并发连接数，支持超时和重试，单个进程可同时进行数百个请求"""
+    
+    def __init__(self, limit=None, limit_per_host=None, timeout=None, polite=True, kind="http"):
+        # 延迟导入网络依赖；aiohttp为可选依赖，只在使用异步执行器时需要，创建时即检查是否已安装
+        import aiohttp
+        from fake_useragent import UserAgent
+        from src.core.config import get_config_manager
+        config = get_config_manager()
+        self.ua = UserAgent()
+        # 连接池总连接数和每个主机的连接数
+        self.limit = limit or config.get("sources.async_http.limit", 256)
+        self.limit_per_host = limit_per_host or config.get("sources.async_http.limit_per_host", 8)
+        self.timeout = timeout or config.get("sources.async_http.timeout", 30)
+        self.retry_count = config.get("sources.async_http.retry_count", 3)
+        self.retry_delay = 2
+        # polite 时与 RequestHandler 共用主机调度器的请求间隔和并发数，访问本地服务（如Grobid）时关闭
+        self.scheduler = get_host_scheduler() if polite else None
+        # 录制/回放层，回放时不访问网络；kind 为录制的交互类型，与同步调用一致（如Grobid为 "grobid"）
+        self.recorder = get_recorder()
+        self.kind = kind
+        # 与 RequestHandler 共用的持久化HTTP缓存（只用于GET）
+        self.http_cache = get_http_cache()
+        # 会话和按主机的信号量绑定创建它们的事件循环，首次请求时在循环内创建
+        self._session = None
+        self._host_semaphores = {}
+    
+    async def get(self, url, headers=None, params=None, timeout=None):
+        """发送GET请求，返回已读取完响应体的响应"""
+        request_headers = {
+            "User-Agent": self.ua.random,
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": "en-US,en;q=0.5"
+        }
+        if headers:
+            request_headers.update(headers)
+        # 有效期内的缓存直接使用；已过期的用条件请求重新验证
+        entry = self.http_cache.lookup(url, params)
+        if entry is not None:
+            if entry.fresh:
+                return entry.response()
+            request_headers.update(entry.validators())
+        response = await self._request("GET", url, record_body=None, timeout=timeout, headers=request_headers, params=params)
+        return self.http_cache.resolve(url, params, response, entry)
+    
+    async def post(self, url, data=None, json=None, files=None, headers=None, timeout=None, record_body=None):
+        """发送POST请求；files 为 {字段名: (文件名, 内容)}，record_body 为录制键中代替请求体的内容（如文件哈希）"""
+        request_headers = {
+            "User-Agent": self.ua.random,
+            "Accept": "application/json, text/plain, */*",
+            "Accept-Language": "en-US,en;q=0.5"
+        }
+        if headers:
+            request_headers.update(headers)
+        if record_body is None:
+            record_body = {"data": data, "json": json}
+        return await self._request("POST", url, record_body=record_body, timeout=timeout, headers=request_headers, data=data, json=json, files=files)
+    
+    @asynccontextmanager
+    async def stream(self, url, headers=None, timeout=None):
+        """发送流式GET请求（不经过HTTP缓存和重试），产出 StreamResponse，响应体用 iter_chunks 分块读取；录制/回放时读取完整响应体"""
+        import aiohttp
+        request_headers = {
+            "User-Agent": self.ua.random,
+            "Accept": "application/pdf,*/*;q=0.8",
+            "Accept-Language": "en-US,en;q=0.5"
+        }
+        if headers:
+            request_headers.update(headers)
+        
+        if self.recorder.enabled:
+            response = await self.recorder.ahttp(
+                "GET", url, lambda: self._send("GET", url, timeout, headers=request_headers), kind=self.kind, headers=request_headers
+            )
+            yield StreamResponse(response.status_code, response.headers, response.url, _iter_slices(response.content))
+            return
+        session = self._get_session()
+        # 大文件不限制总时长，只限制连接和两次读取之间的等待
+        read_timeout = timeout or self.timeout
+        options = {"timeout": aiohttp.ClientTimeout(total=None, sock_connect=read_timeout, sock_read=read_timeout)}
+        async with self._slot(url):
+            async with session.get(url, headers=request_headers, allow_redirects=True, **options) as response:
+                yield StreamResponse(response.status, response.headers, str(response.url), response.content.iter_chunked)
+    
+    async def close(self):
+        """关闭连接池"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    async def _request(self, method, url, record_body=None, timeout=None, **kwargs):
+        """发送请求，失败时指数退避重试"""
+        for i in range(self.retry_count):
+            try:
+                response = await self.recorder.ahttp(
+                    method, url, lambda: self._send(method, url, timeout, **kwargs),
+                    params=kwargs.get("params"), body=record_body, kind=self.kind, headers=kwargs.get("headers")
+                )
+                response.raise_for_status()
+                return response
+            except CassetteMissError:
+                # 没有录制的请求重试也不会命中
+                raise
+            except Exception as e:
+                logger.warning(f"异步请求失败 ({i+1}/{self.retry_count}): {method} {url} - {str(e) or type(e).__name__}")
+                if i < self.retry_count - 1:
+                    delay = self.retry_delay * (2 ** i)
+                    if self.scheduler is not None:
+                        # 推迟该主机的下一个请求，重试在主机队列中等待
+                        self.scheduler.defer(url, delay)
+                    else:
+                        await asyncio.sleep(delay)
+                    continue
+                logger.error(f"异步请求最终失败: {method} {url} - {str(e) or type(e).__name__}")
+                raise
+    
+    async def _send(self, method, url, timeout, headers=None, params=None, data=None, json=None, files=None):
+        """在主机名额内实际发送一次请求并读取响应体"""
+        import aiohttp
+        session = self._get_session()
+        options = {"headers": headers}
+        if params:
+            # aiohttp要求查询参数值为字符串
+            options["params"] = {key: str(value) for key, value in params.items()}
+        if files:
+            # 表单每次重试都需要重新构造
+            form = aiohttp.FormData()
+            for key, value in (data or {}).items():
+                form.add_field(key, str(value))
+            for key, (filename, content) in files.items():
+                form.add_field(key, content, filename=filename, content_type="application/octet-stream")
+            options["data"] = form
+        elif data is not None:
+            options["data"] = data
+        if json is not None:
+            options["json"] = json
+        if timeout:
+            options["timeout"] = aiohttp.ClientTimeout(total=timeout)
+        
+        async with self._slot(url):
+            async with session.request(method, url, allow_redirects=True, **options) as response:
+                content = await response.read()
+                # 与回放响应使用相同的接口（status_code、headers、content、raise_for_status 等）
+                return ReplayResponse(response.status, dict(response.headers), content, str(response.url), response.charset)
+    
+    def _get_session(self):
+        """获取连接池会话，首次调用时在当前事件循环中创建"""
+        import aiohttp
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host, keepalive_timeout=30)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._session
+    
+    @asynccontextmanager
+    async def _slot(self, url):
+        """按主机调度器限制同一主机的并发请求数和请求间隔（在事件循环中等待，不阻塞其他请求）"""
+        if self.scheduler is None:
+            yield
+            return
+        host = host_of(url)
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.scheduler.concurrency_for(url))
+            self._host_semaphores[host] = semaphore
+        started = time.monotonic()
+        async with semaphore:
+            delay = self.scheduler.reserve(url)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.scheduler.observe(url, time.monotonic() - started)
+            yield
@@ -0,0 +1,301 @@
+import os
+import re
+import glob
+import gzip
+import json
+import queue
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from src.core.config import config_manager
+from .identity import normalize_text
+from .oai import _parse_raw_date
+
+logger = logging.getLogger(__name__)
+
+# 从OpenAlex位置链接中提取arXiv ID
+_ARXIV_URL = re.compile(r"arxiv\.org/(?:abs|pdf)/([^/?#\s]+?)(?:\.pdf)?$", re.IGNORECASE)
+
+class RecordFilter:
+    """导出记录过滤条件：分类号有交集（只适用于有arXiv分类号的记录）、年份在范围内，且标题或摘要包含任一关键词的全部词"""
+    
+    def __init__(self, categories=None, start_year=None, end_year=None, keywords=None):
+        self.categories = set(categories or [])
+        self.start_year = start_year
+        self.end_year = end_year
+        self.keyword_terms = [terms for terms in (normalize_text(keyword).split() for keyword in keywords or []) if terms]
+    
+    def maybe_matches(self, line):
+        """解析JSON前的快速预检：原始行（小写）中没有出现任一关键词的全部词时一定不匹配"""
+        if not self.keyword_terms:
+            return True
+        line = line.lower()
+        return any(all(term in line for term in terms) for terms in self.keyword_terms)
+    
+    def matches(self, paper):
+        """解析后的论文是否满足全部过滤条件"""
+        if self.categories and paper.get("categories") and not self.categories & set(paper["categories"]):
+            return False
+        year = paper.get("publish_year")
+        if year and ((self.start_year and year < self.start_year) or (self.end_year and year > self.end_year)):
+            return False
+        if not self.keyword_terms:
+            return True
+        tokens = set(normalize_text(f"{paper.get('title') or ''} {paper.get('summary') or ''}").split())
+        return any(all(term in tokens for term in terms) for terms in self.keyword_terms)
+
+class DumpCrawler:
+    """本地批量元数据导出文件爬虫：流式读取gzip压缩的JSON Lines文件（arXiv元数据快照、OpenAlex works），边读边按分类号、年份和关键词过滤，多个文件分配到多个进程并行处理"""
+    
+    def __init__(self, incremental=None, domain=None):
+        self.config = config_manager
+        self.domain = self.config.get_research_domain()
+        self.keywords = self.config.get_keywords()
+        self.start_year, self.end_year = self.config.get_time_range()
+        self.categories = self.config.get_arxiv_categories()
+        # 导出文件是完整快照，没有增量模式；重复记录由身份解析和版本跟踪跳过
+        self.incremental = incremental
+        self.paths = self.config.get("sources.dump.paths") or []
+        # 文件格式：arxiv、openalex，auto 按每个文件的首条记录判断
+        self.format = self.config.get("sources.dump.format", "auto")
+        self.workers = self.config.get("sources.dump.workers") or os.cpu_count() or 1
+        self.batch_size = self.config.get("sources.dump.batch_size", 500)
+        self.queue_size = self.config.get("sources.dump.queue_size", 16)
+        self.max_results = self.config.get("sources.dump.max_results")
+        # 多领域运行时按领域配置覆盖领域名称、关键词和时间范围
+        if domain:
+            self.domain = domain["name"]
+            self.keywords = domain["keywords"]
+            self.categories = domain["categories"]
+            self.start_year, self.end_year = domain["start_year"], domain["end_year"]
+    
+    def crawl(self):
+        """读取导出文件中匹配的论文"""
+        papers = list(self.iter_papers())
+        logger.info(f"从导出文件获取 {len(papers)} 篇论文")
+        return papers
+    
+    def iter_papers(self):
+        """逐条产出匹配的论文；多个文件时由进程池并行读取，通过有界队列按批交回，内存占用与文件大小无关"""
+        shards = self._shards()
+        if not shards:
+            logger.warning("未找到导出文件，请检查 sources.dump.paths")
+            return
+        record_filter = RecordFilter(self.categories, self.start_year, self.end_year, self.keywords)
+        logger.info(f"读取导出文件: {len(shards)} 个文件，进程数 {min(self.workers, len(shards))}")
+        
+        count = 0
+        for paper in self._iter_shards(shards, record_filter):
+            yield paper
+            count += 1
+            if self.max_results and count >= self.max_results:
+                break
+    
+    def _shards(self):
+        """展开配置的路径（支持通配符），返回去重排序后的文件列表"""
+        files = set()
+        for pattern in self.paths:
+            files.update(path for path in glob.glob(os.path.expanduser(pattern), recursive=True) if os.path.isfile(path))
+        return sorted(files)
+    
+    def _iter_shards(self, shards, record_filter):
+        """按文件读取：单个文件或单进程时在当前进程读取，否则分配到进程池"""
+        if self.workers <= 1 or len(shards) == 1:
+            for path in shards:
+                for batch in iter_dump_batches(path, self.format, record_filter, self.batch_size):
+                    yield from batch
+            return
+        
+        import multiprocessing
+        # 结果队列和停止信号在创建进程时传入，进程直接写入队列，不经过管理进程转发
+        results = multiprocessing.Queue(self.queue_size)
+        stop = multiprocessing.Event()
+        executor = ProcessPoolExecutor(
+            max_workers=min(self.workers, len(shards)),
+            initializer=_init_shard_worker, initargs=(results, stop)
+        )
+        try:
+            futures = [
+                executor.submit(scan_dump_shard, path, self.format, record_filter, self.batch_size)
+                for path in shards
+            ]
+            pending = len(futures)
+            while pending:
+                try:
+                    kind, payload = results.get(timeout=1)
+                except queue.Empty:
+                    # 进程异常退出时不会发送结束标记
+                    if all(future.done() for future in futures) and results.empty():
+                        break
+                    continue
+                if kind == "done":
+                    pending -= 1
+                    continue
+                yield from payload
+        finally:
+            # 调用方提前停止（已达到最大结果数）时通知各进程结束
+            stop.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+            results.close()
+
+# 读取进程中的结果队列和停止信号
+_results = None
+_stop = None
+
+def _init_shard_worker(results, stop):
+    """进程池初始化：保存结果队列和停止信号"""
+    global _results, _stop
+    _results = results
+    _stop = stop
+    # 提前停止时主进程不再读取队列，进程退出时不等待未送出的数据（正常结束时结束标记之前的数据均已被读取）
+    results.cancel_join_thread()
+
+def scan_dump_shard(path, file_format, record_filter, batch_size):
+    """进程池任务：读取一个导出文件，把匹配的论文按批放入结果队列，最后放入结束标记，返回匹配数量"""
+    matched = 0
+    try:
+        for batch in iter_dump_batches(path, file_format, record_filter, batch_size, stop=_stop):
+            matched += len(batch)
+            if not _put(_results, ("papers", batch), _stop):
+                break
+    except Exception as e:
+        logger.error(f"读取导出文件失败: {path} - {str(e)}")
+    finally:
+        _put(_results, ("done", path), _stop)
+    return matched
+
+def _put(results, item, stop):
+    """放入结果队列，队列满时等待；调用方已停止时放弃并返回False"""
+    while not stop.is_set():
+        try:
+            results.put(item, timeout=1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def iter_dump_batches(path, file_format="auto", record_filter=None, batch_size=500, stop=None):
+    """流式读取一个JSON Lines导出文件（.gz 自动解压），按批产出匹配的论文字典"""
+    opener = gzip.open if path.endswith(".gz") else open
+    parser = _PARSERS.get(file_format)
+    batch = []
+    scanned = 0
+    with opener(path, "rt", encoding="utf-8") as handle:
+        for line in handle:
+            scanned += 1
+            if stop is not None and scanned % 10000 == 0 and stop.is_set():
+                return
+            if record_filter is not None and not record_filter.maybe_matches(line):
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if parser is None:
+                parser = _PARSERS[detect_dump_format(record)]
+            paper = parser(record)
+            if paper is None or (record_filter is not None and not record_filter.matches(paper)):
+                continue
+            batch.append(paper)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+    logger.info(f"导出文件读取完成: {path}，共 {scanned} 条记录")
+
+def detect_dump_format(record):
+    """按记录字段判断导出文件格式"""
+    if "abstract_inverted_index" in record or str(record.get("id", "")).startswith("https://openalex.org/"):
+        return "openalex"
+    return "arxiv"
+
+def parse_arxiv_snapshot(record):
+    """把arXiv元数据快照的记录转换为与 ArxivCrawler._parse_result 一致的论文字典"""
+    base_id = (record.get("id") or "").strip()
+    if not base_id:
+        return None
+    
+    # 首个版本的日期为提交时间，最后一个版本的日期为更新时间
+    versions = record.get("versions") or []
+    version = versions[-1].get("version") if versions else None
+    published = _parse_raw_date(versions[0].get("created")) if versions else None
+    updated = _parse_raw_date(versions[-1].get("created")) if versions else None
+    arxiv_id = f"{base_id}{version}" if version else base_id
+    
+    if record.get("authors_parsed"):
+        # authors_parsed 每项为 [姓, 名, 后缀]
+        authors = [" ".join(part for part in (parts[1:2] + parts[:1] + parts[2:3]) if part) for parts in record["authors_parsed"]]
+    else:
+        authors_text = " ".join((record.get("authors") or "").split())
+        authors = [author.strip() for author in re.split(r",\s*|\s+and\s+", authors_text) if author.strip()]
+    categories = (record.get("categories") or "").split()
+    return {
+        "title": " ".join((record.get("title") or "").split()),
+        "authors": authors,
+        "summary": (record.get("abstract") or "").strip(),
+        "publish_year": published.year if published else None,
+        "source": "arXiv",
+        "arxiv_id": arxiv_id,
+        "pdf_url": f"https://arxiv.org/pdf/{arxiv_id}",
+        "html_url": f"https://arxiv.org/abs/{arxiv_id}",
+        "categories": categories,
+        "doi": record.get("doi") or None,
+        "primary_category": categories[0] if categories else None,
+        "published": published.isoformat() if published else None,
+        "updated": updated.isoformat() if updated else None
+    }
+
+def parse_openalex_work(record):
+    """把OpenAlex work记录转换为论文字典，字段与 ScholarCrawler._parse_result 一致，并补充DOI和arXiv ID"""
+    title = " ".join((record.get("display_name") or record.get("title") or "").split())
+    if not title:
+        return None
+    primary = record.get("primary_location") or {}
+    best = record.get("best_oa_location") or {}
+    venue = (primary.get("source") or {}).get("display_name") or ""
+    doi = record.get("doi")
+    if doi:
+        doi = re.sub(r"^https?://(dx\.)?doi\.org/", "", doi, flags=re.IGNORECASE)
+    
+    arxiv_id = None
+    for location in record.get("locations") or []:
+        match = _ARXIV_URL.search(location.get("landing_page_url") or "") or _ARXIV_URL.search(location.get("pdf_url") or "")
+        if match:
+            arxiv_id = match.group(1)
+            break
+    
+    return {
+        "title": title,
+        "authors": [
+            (authorship.get("author") or {}).get("display_name") or authorship.get("raw_author_name") or ""
+            for authorship in record.get("authorships") or []
+        ],
+        "summary": _invert_abstract(record.get("abstract_inverted_index")),
+        "publish_year": record.get("publication_year"),
+        "source": "OpenAlex",
+        "venue": venue,
+        "pdf_url": best.get("pdf_url") or primary.get("pdf_url"),
+        "html_url": primary.get("landing_page_url") or (f"https://doi.org/{doi}" if doi else record.get("id")),
+        "citations": record.get("cited_by_count", 0),
+        "doi": doi,
+        "arxiv_id": arxiv_id,
+        "pub_id": record.get("id"),
+        "published": record.get("publication_date"),
+        # OpenAlex记录的修改时间，不是arXiv的版本更新时间，不能用于版本比较
+        "openalex_updated": record.get("updated_date")
+    }
+
+def _invert_abstract(index):
+    """由OpenAlex的倒排摘要（词 -> 位置列表）还原摘要文本"""
+    if not index:
+        return ""
+    positions = {}
+    for word, offsets in index.items():
+        for offset in offsets:
+            positions[offset] = word
+    return " ".join(positions[offset] for offset in sorted(positions))
+
+_PARSERS = {
+    "arxiv": parse_arxiv_snapshot,
+    "openalex": parse_openalex_work
+}
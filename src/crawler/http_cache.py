@@ -0,0 +1,158 @@
+import json
+import time
+import threading
+import logging
+from collections import defaultdict
+from src.core.cache import ArtifactCache
+from src.core.replay import ReplayResponse
+from .politeness import host_of, match_host
+
+logger = logging.getLogger(__name__)
+
+# 缓存条目中保留的响应头
+_KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Cache-Control")
+
+class CachedEntry:
+    """HTTP缓存条目"""
+    
+    def __init__(self, body, meta, fresh):
+        self.body = body
+        self.meta = meta
+        # 是否仍在有效期内（有效期内直接使用，不访问网络）
+        self.fresh = fresh
+    
+    def validators(self):
+        """条件请求头（If-None-Match / If-Modified-Since）"""
+        headers = {}
+        cached_headers = self.meta.get("headers") or {}
+        if cached_headers.get("ETag"):
+            headers["If-None-Match"] = cached_headers["ETag"]
+        if cached_headers.get("Last-Modified"):
+            headers["If-Modified-Since"] = cached_headers["Last-Modified"]
+        return headers
+    
+    def response(self):
+        """由缓存构造响应"""
+        return ReplayResponse(
+            self.meta.get("status_code", 200), self.meta.get("headers"), self.body,
+            self.meta.get("url"), self.meta.get("encoding")
+        )
+
+class HTTPCache:
+    """持久化HTTP缓存：保存GET响应体及其ETag/Last-Modified，按主机有效期直接命中，过期后用条件请求重新验证，按总大小LRU淘汰"""
+    
+    def __init__(self, path="data/cache/http", max_size_mb=512, default_ttl_hours=24, hosts=None,
+                 max_entry_mb=5, skip_content_types=None, enabled=True):
+        self.enabled = enabled
+        self.store = ArtifactCache(path=path, max_size_mb=max_size_mb, enabled=enabled)
+        self.default_ttl = default_ttl_hours * 3600
+        # 按主机覆盖的有效期（小时），同时适用于子域名；0表示每次都重新验证
+        self.hosts = hosts or {}
+        self.max_entry_size = int(max_entry_mb * 1024 * 1024)
+        # 不缓存的内容类型（PDF由下载器保存到磁盘）
+        self.skip_content_types = [value.lower() for value in (skip_content_types or [])]
+        self._lock = threading.Lock()
+        self._stats = defaultdict(int)
+    
+    def lookup(self, url, params=None):
+        """查找缓存条目，没有缓存时返回None"""
+        if not self.enabled:
+            return None
+        body, meta = self.store.get_entry("http", self._key(url, params))
+        if body is None or not meta:
+            self._count("misses")
+            return None
+        fresh = time.time() - meta.get("stored_at", 0) < self._ttl(url)
+        if fresh:
+            self._count("fresh_hits")
+            self._count("bytes_from_cache", len(body))
+        else:
+            self._count("stale")
+        return CachedEntry(body, meta, fresh)
+    
+    def resolve(self, url, params, response, entry=None):
+        """处理网络响应：304时刷新缓存条目并返回缓存的响应，200时写入缓存，返回最终使用的响应"""
+        if not self.enabled:
+            return response
+        if response.status_code == 304 and entry is not None:
+            self._count("revalidated")
+            self._count("bytes_from_cache", len(entry.body))
+            # 服务端可能返回新的验证器
+            headers = dict(entry.meta.get("headers") or {})
+            for name in _KEPT_HEADERS:
+                value = response.headers.get(name)
+                if value:
+                    headers[name] = value
+            meta = dict(entry.meta, headers=headers, stored_at=time.time())
+            self.store.put("http", self._key(url, params), entry.body, meta=meta)
+            return CachedEntry(entry.body, meta, True).response()
+        
+        self._count("bytes_fetched", len(response.content))
+        if response.status_code == 200 and self._cacheable(response):
+            headers = {name: response.headers.get(name) for name in _KEPT_HEADERS if response.headers.get(name)}
+            self.store.put("http", self._key(url, params), response.content, meta={
+                "status_code": response.status_code,
+                "headers": headers,
+                "url": getattr(response, "url", url),
+                "encoding": getattr(response, "encoding", None),
+                "stored_at": time.time()
+            })
+            self._count("stored")
+        return response
+    
+    def stats(self):
+        """命中、重新验证和传输字节统计"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["size_bytes"] = self.store.total_size()
+        return stats
+    
+    def _cacheable(self, response):
+        """响应是否可以缓存"""
+        if len(response.content) > self.max_entry_size:
+            return False
+        if "no-store" in (response.headers.get("Cache-Control") or "").lower():
+            return False
+        content_type = (response.headers.get("Content-Type") or "").lower()
+        return not any(skipped in content_type for skipped in self.skip_content_types)
+    
+    def _ttl(self, url):
+        """请求所在主机的有效期（秒）"""
+        pattern = match_host(host_of(url), self.hosts)
+        if pattern is None:
+            return self.default_ttl
+        return (self.hosts[pattern] or 0) * 3600
+    
+    def _key(self, url, params):
+        return self.store.make_key("GET", url, json.dumps(params or {}, sort_keys=True, default=str))
+    
+    def _count(self, name, value=1):
+        with self._lock:
+            self._stats[name] += value
+
+# 进程内所有请求处理器共用的HTTP缓存
+_http_cache = None
+_http_cache_lock = threading.Lock()
+
+def get_http_cache():
+    """获取全局HTTP缓存，首次访问时按 sources.http_cache 配置创建"""
+    global _http_cache
+    if _http_cache is None:
+        with _http_cache_lock:
+            if _http_cache is None:
+                from src.core.config import get_config_manager
+                config = get_config_manager()
+                try:
+                    _http_cache = HTTPCache(
+                        path=config.get("sources.http_cache.path", "data/cache/http"),
+                        max_size_mb=config.get("sources.http_cache.max_size_mb", 512),
+                        default_ttl_hours=config.get("sources.http_cache.default_ttl_hours", 24),
+                        hosts=config.get("sources.http_cache.hosts") or {},
+                        max_entry_mb=config.get("sources.http_cache.max_entry_mb", 5),
+                        skip_content_types=config.get("sources.http_cache.skip_content_types", ["application/pdf"]),
+                        enabled=config.get("sources.http_cache.enabled", False)
+                    )
+                except Exception as e:
+                    logger.error(f"初始化HTTP缓存失败，已禁用: {str(e)}")
+                    _http_cache = HTTPCache(enabled=False)
+    return _http_cache
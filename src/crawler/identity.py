@@ -0,0 +1,201 @@
+import re
+import zlib
+import logging
+import unicodedata
+from array import array
+from .utils import strip_arxiv_version, canonical_paper_id
+
+logger = logging.getLogger(__name__)
+
+# 主标题与副标题的分隔符
+_SUBTITLE_SEPARATOR = re.compile(r"\s*(?::|\s-\s|\s–\s|\s—\s)\s*")
+
+def normalize_text(text):
+    """归一化文本：去掉重音符号和标点，转小写，合并空白"""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"[^0-9a-z]+", " ", text.lower())
+    return text.strip()
+
+def normalize_doi(doi):
+    """归一化DOI：去掉URL前缀并转小写"""
+    if not doi:
+        return None
+    doi = doi.strip().lower()
+    doi = re.sub(r"^(https?://(dx\.)?doi\.org/|doi:)", "", doi)
+    return doi or None
+
+def author_surnames(authors):
+    """作者姓氏集合（取姓名最后一个词）"""
+    surnames = set()
+    for author in authors or []:
+        parts = normalize_text(author).split()
+        if parts:
+            surnames.add(parts[-1])
+    return surnames
+
+def title_variants(title):
+    """标题的比较形式：完整标题，以及有副标题时的主标题"""
+    variants = []
+    full = normalize_text(title)
+    if full:
+        variants.append(full)
+    parts = _SUBTITLE_SEPARATOR.split(title or "", maxsplit=1)
+    if len(parts) == 2:
+        main = normalize_text(parts[0])
+        # 主标题过短时区分度不够，不单独比较
+        if main and main != full and len(main.split()) >= 3:
+            variants.append(main)
+    return variants
+
+class IdentityResolver:
+    """论文身份解析：按DOI、去版本的arXiv ID精确匹配，再用标题MinHash/LSH查找近似重复，为同一篇论文分配同一个规范ID"""
+    
+    def __init__(self, num_perm=64, bands=8, threshold=0.8, shingle_size=3):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm必须能被bands整除")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self._doi_index = {}
+        self._arxiv_index = {}
+        # LSH桶：(分段序号, 分段签名) 的哈希 -> 规范ID列表
+        self._buckets = {}
+        # 规范ID -> 签名列表、作者姓氏、年份及已登记的DOI/arXiv ID
+        self._records = {}
+    
+    @classmethod
+    def from_config(cls, config):
+        """按 sources.dedup 配置创建"""
+        return cls(
+            num_perm=config.get("sources.dedup.num_perm", 64),
+            bands=config.get("sources.dedup.bands", 8),
+            threshold=config.get("sources.dedup.threshold", 0.8)
+        )
+    
+    def __len__(self):
+        return len(self._records)
+    
+    def resolve(self, paper):
+        """返回 (规范ID, 是否为新论文)，并把论文的标识加入索引"""
+        doi = normalize_doi(paper.get("doi"))
+        arxiv_id = strip_arxiv_version(paper.get("arxiv_id"))
+        signatures = [self._signature(variant) for variant in title_variants(paper.get("title"))]
+        surnames = author_surnames(paper.get("authors"))
+        year = paper.get("publish_year")
+        
+        canonical_id = None
+        if doi:
+            canonical_id = self._doi_index.get(doi)
+        if canonical_id is None and arxiv_id:
+            canonical_id = self._arxiv_index.get(arxiv_id)
+        if canonical_id is None and signatures:
+            canonical_id = self._find_similar(signatures, surnames, year, doi, arxiv_id)
+        
+        is_new = canonical_id is None
+        if is_new:
+            canonical_id = paper.get("paper_key") or canonical_paper_id(paper)
+            # 规范ID已被其他论文使用（如标题哈希相同），沿用已有记录
+            is_new = canonical_id not in self._records
+        self._add(canonical_id, doi, arxiv_id, signatures, surnames, year)
+        return canonical_id, is_new
+    
+    def lookup_arxiv(self, arxiv_id):
+        """按arXiv ID（可带版本后缀）查找已登记的规范ID，不计算签名，没有时返回None"""
+        return self._arxiv_index.get(strip_arxiv_version(arxiv_id))
+    
+    def _add(self, canonical_id, doi, arxiv_id, signatures, surnames, year):
+        """把论文标识加入索引（同一规范ID的多个来源合并）"""
+        if doi:
+            self._doi_index.setdefault(doi, canonical_id)
+        if arxiv_id:
+            self._arxiv_index.setdefault(arxiv_id, canonical_id)
+        
+        record = self._records.get(canonical_id)
+        if record is None:
+            record = {"signatures": [], "surnames": set(), "year": year, "dois": set(), "arxiv_ids": set()}
+            self._records[canonical_id] = record
+        record["year"] = record["year"] or year
+        record["surnames"].update(surnames)
+        if doi:
+            record["dois"].add(doi)
+        if arxiv_id:
+            record["arxiv_ids"].add(arxiv_id)
+        for signature in signatures:
+            record["signatures"].append(signature)
+            for key in self._band_keys(signature):
+                bucket = self._buckets.setdefault(key, [])
+                if canonical_id not in bucket:
+                    bucket.append(canonical_id)
+    
+    def _find_similar(self, signatures, surnames, year, doi, arxiv_id):
+        """在LSH桶中查找候选并验证相似度，返回最相似的规范ID"""
+        candidates = set()
+        for signature in signatures:
+            for key in self._band_keys(signature):
+                candidates.update(self._buckets.get(key, ()))
+        
+        best_id, best_score = None, self.threshold
+        for candidate in candidates:
+            record = self._records[candidate]
+            # 作者都已知却没有共同姓氏，或年份相差过大，视为不同论文
+            if surnames and record["surnames"] and not (surnames & record["surnames"]):
+                continue
+            if year and record["year"] and abs(year - record["year"]) > 2:
+                continue
+            # 双方都有DOI或arXiv ID且不同，说明是不同论文
+            if (doi and record["dois"] and doi not in record["dois"]) or \
+                    (arxiv_id and record["arxiv_ids"] and arxiv_id not in record["arxiv_ids"]):
+                continue
+            score = max(
+                self._similarity(signature, other)
+                for signature in signatures for other in record["signatures"]
+            )
+            if score >= best_score:
+                best_id, best_score = candidate, score
+        return best_id
+    
+    def _signature(self, text):
+        """计算MinHash签名（单次哈希分桶，空桶从相邻桶借值），复杂度与标题长度线性相关"""
+        size = self.shingle_size
+        if len(text) <= size:
+            shingles = {text}
+        else:
+            shingles = {text[i:i + size] for i in range(len(text) - size + 1)}
+        
+        empty = 0xFFFFFFFF
+        bins = array("I", [empty]) * self.num_perm
+        for shingle in shingles:
+            # crc32在各进程间结果一致，乘以奇数常数打散低位
+            value = (zlib.crc32(shingle.encode("utf-8")) * 0x9E3779B1) & 0xFFFFFFFF
+            index = value % self.num_perm
+            value //= self.num_perm
+            if value < bins[index]:
+                bins[index] = value
+        
+        # 空桶按顺时针方向借用下一个非空桶的值，并加上距离作为偏移
+        if empty in bins and any(value != empty for value in bins):
+            filled = array("I", bins)
+            for index in range(self.num_perm):
+                if bins[index] != empty:
+                    continue
+                distance = 1
+                while bins[(index + distance) % self.num_perm] == empty:
+                    distance += 1
+                filled[index] = (bins[(index + distance) % self.num_perm] + distance * 0x61C88647) & 0xFFFFFFFF
+            bins = filled
+        return bins
+    
+    def _band_keys(self, signature):
+        """签名各分段对应的LSH桶键"""
+        rows = self.rows
+        return [hash((band, signature[band * rows:(band + 1) * rows].tobytes())) for band in range(self.bands)]
+    
+    @staticmethod
+    def _similarity(left, right):
+        """按签名估计Jaccard相似度"""
+        return sum(1 for a, b in zip(left, right) if a == b) / len(left)
@@ -0,0 +1,137 @@
+import re
+import time
+import logging
+from email.utils import parsedate_to_datetime
+from .utils import RequestHandler
+
+logger = logging.getLogger(__name__)
+
+# arXiv OAI-PMH接口
+ARXIV_OAI_URL = "https://oaipmh.arxiv.org/oai"
+
+_OAI_NS = {
+    "oai": "http://www.openarchives.org/OAI/2.0/",
+    "raw": "http://arxiv.org/OAI/arXivRaw/"
+}
+
+# 服务端流量控制（503）时的最大等待次数
+MAX_RETRY_AFTER = 5
+
+class OAIHarvester:
+    """OAI-PMH收割器：按set和from/until日期发出ListRecords请求，跟随resumptionToken逐页产出记录"""
+    
+    def __init__(self, url, rate_limiter=None, request_handler=None):
+        self.url = url
+        self.rate_limiter = rate_limiter
+        self.request_handler = request_handler or RequestHandler()
+    
+    def list_records(self, metadata_prefix, set_spec=None, from_date=None, until_date=None):
+        """逐页产出记录列表，每条记录为 (header字典, metadata元素)，已删除的记录metadata为None"""
+        params = {"verb": "ListRecords", "metadataPrefix": metadata_prefix}
+        if set_spec:
+            params["set"] = set_spec
+        if from_date:
+            params["from"] = from_date
+        if until_date:
+            params["until"] = until_date
+        
+        pages = 0
+        while params:
+            root = self._request(params)
+            error = root.find("oai:error", _OAI_NS)
+            if error is not None:
+                # 没有匹配的记录不是错误
+                if error.get("code") == "noRecordsMatch":
+                    return
+                raise ValueError(f"OAI-PMH错误 {error.get('code')}: {(error.text or '').strip()}")
+            
+            list_records = root.find("oai:ListRecords", _OAI_NS)
+            if list_records is None:
+                return
+            records = []
+            for record in list_records.findall("oai:record", _OAI_NS):
+                header = record.find("oai:header", _OAI_NS)
+                info = {
+                    "identifier": header.findtext("oai:identifier", "", _OAI_NS),
+                    "datestamp": header.findtext("oai:datestamp", "", _OAI_NS),
+                    "deleted": header.get("status") == "deleted"
+                }
+                metadata = record.find("oai:metadata", _OAI_NS)
+                records.append((info, None if info["deleted"] or metadata is None else metadata))
+            pages += 1
+            yield records
+            
+            token = list_records.find("oai:resumptionToken", _OAI_NS)
+            if token is not None and (token.text or "").strip():
+                if pages == 1 and token.get("completeListSize"):
+                    logger.info(f"OAI-PMH收割 {set_spec or '全部'}: 共 {token.get('completeListSize')} 条记录")
+                # 续传请求只带verb和resumptionToken
+                params = {"verb": "ListRecords", "resumptionToken": token.text.strip()}
+            else:
+                params = None
+    
+    def _request(self, params):
+        """发送请求并解析XML，服务端返回503时按Retry-After等待后重试"""
+        import xml.etree.ElementTree as ET
+        for attempt in range(MAX_RETRY_AFTER + 1):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            try:
+                response = self.request_handler.get(self.url, params=params, timeout=120)
+                return ET.fromstring(response.content)
+            except Exception as e:
+                response = getattr(e, "response", None)
+                if response is None or response.status_code != 503 or attempt >= MAX_RETRY_AFTER:
+                    raise
+                retry_after = _retry_after_seconds(response.headers.get("Retry-After"))
+                logger.info(f"OAI-PMH服务端要求等待 {retry_after} 秒")
+                time.sleep(retry_after)
+
+def _retry_after_seconds(value, default=10):
+    """解析Retry-After头（秒数）"""
+    try:
+        return max(1, int(value))
+    except (TypeError, ValueError):
+        return default
+
+def _parse_raw_date(text):
+    """解析arXivRaw版本日期（如 Mon, 2 Apr 2007 19:18:42 GMT）"""
+    try:
+        return parsedate_to_datetime(text.strip()) if text else None
+    except (TypeError, ValueError):
+        return None
+
+def parse_arxiv_raw(metadata):
+    """把arXivRaw格式的metadata元素转换为与 ArxivCrawler._parse_result 一致的论文字典"""
+    raw = metadata.find("raw:arXivRaw", _OAI_NS)
+    if raw is None:
+        return None
+    base_id = raw.findtext("raw:id", "", _OAI_NS).strip()
+    if not base_id:
+        return None
+    
+    # 首个版本的日期为提交时间，最后一个版本的日期为更新时间
+    versions = raw.findall("raw:version", _OAI_NS)
+    version = versions[-1].get("version") if versions else None
+    published = _parse_raw_date(versions[0].findtext("raw:date", None, _OAI_NS)) if versions else None
+    updated = _parse_raw_date(versions[-1].findtext("raw:date", None, _OAI_NS)) if versions else None
+    arxiv_id = f"{base_id}{version}" if version else base_id
+    
+    authors_text = " ".join(raw.findtext("raw:authors", "", _OAI_NS).split())
+    authors = [author.strip() for author in re.split(r",\s*|\s+and\s+", authors_text) if author.strip()]
+    categories = raw.findtext("raw:categories", "", _OAI_NS).split()
+    return {
+        "title": " ".join(raw.findtext("raw:title", "", _OAI_NS).split()),
+        "authors": authors,
+        "summary": raw.findtext("raw:abstract", "", _OAI_NS).strip(),
+        "publish_year": published.year if published else None,
+        "source": "arXiv",
+        "arxiv_id": arxiv_id,
+        "pdf_url": f"https://arxiv.org/pdf/{arxiv_id}",
+        "html_url": f"https://arxiv.org/abs/{arxiv_id}",
+        "categories": categories,
+        "doi": raw.findtext("raw:doi", None, _OAI_NS) or None,
+        "primary_category": categories[0] if categories else None,
+        "published": published.isoformat() if published else None,
+        "updated": updated.isoformat() if updated else None
+    }
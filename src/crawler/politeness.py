@@ -0,0 +1,151 @@
+import time
+import random
+import threading
+import logging
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+class _HostState:
+    """单个主机的调度状态"""
+    
+    def __init__(self, delay, concurrency):
+        self.delay = delay
+        self.semaphore = threading.BoundedSemaphore(concurrency)
+        self.lock = threading.Lock()
+        # 下一个请求最早的发送时间（monotonic）
+        self.next_at = 0.0
+        self.requests = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+class HostScheduler:
+    """按主机调度HTTP请求：同一主机的请求之间保持最小间隔并限制并发数，不同主机的请求互不等待"""
+    
+    def __init__(self, delay=(0.5, 1.5), concurrency=2, hosts=None):
+        self.delay = _delay_range(delay)
+        self.concurrency = max(1, concurrency)
+        # 按主机覆盖的配置，如 {"arxiv.org": {"delay": [1, 2], "concurrency": 1}}，同时适用于子域名
+        self.hosts = hosts or {}
+        self._lock = threading.Lock()
+        self._states = {}
+    
+    @contextmanager
+    def slot(self, url):
+        """占用请求所在主机的一个并发名额，并等待到该主机允许的发送时间，产出在主机队列中等待的秒数"""
+        state = self._state(host_of(url))
+        started = time.monotonic()
+        state.semaphore.acquire()
+        try:
+            delay = self.reserve(url)
+            if delay > 0:
+                time.sleep(delay)
+            waited = time.monotonic() - started
+            self.observe(url, waited)
+            yield waited
+        finally:
+            state.semaphore.release()
+    
+    def reserve(self, url):
+        """预约主机的下一个发送时间，返回需要等待的秒数（不阻塞，异步客户端在事件循环中等待）"""
+        state = self._state(host_of(url))
+        # 预约后即释放锁，同一主机的后续请求依次排在后面
+        with state.lock:
+            now = time.monotonic()
+            send_at = max(now, state.next_at)
+            state.next_at = send_at + random.uniform(*state.delay)
+        return send_at - now
+    
+    def observe(self, url, waited):
+        """记录一次请求在主机队列中等待的秒数"""
+        host = host_of(url)
+        state = self._state(host)
+        with state.lock:
+            state.requests += 1
+            state.wait_total += waited
+            state.wait_max = max(state.wait_max, waited)
+        if waited >= 0.01:
+            logger.debug(f"主机 {host} 排队等待 {waited:.2f} 秒")
+    
+    def concurrency_for(self, url):
+        """请求所在主机允许的并发数"""
+        return self._host_config(host_of(url))[1]
+    
+    def defer(self, url, seconds):
+        """推迟主机的下一个请求（重试退避、服务端要求等待时使用），不阻塞当前线程"""
+        state = self._state(host_of(url))
+        with state.lock:
+            state.next_at = max(state.next_at, time.monotonic() + seconds)
+    
+    def stats(self):
+        """各主机的请求数和排队等待时间"""
+        with self._lock:
+            states = dict(self._states)
+        result = {}
+        for host, state in states.items():
+            with state.lock:
+                result[host] = {
+                    "requests": state.requests,
+                    "wait_total": round(state.wait_total, 3),
+                    "wait_mean": round(state.wait_total / state.requests, 3) if state.requests else 0.0,
+                    "wait_max": round(state.wait_max, 3)
+                }
+        return result
+    
+    def _state(self, host):
+        """获取主机状态，首次请求时按配置创建"""
+        with self._lock:
+            state = self._states.get(host)
+            if state is None:
+                state = _HostState(*self._host_config(host))
+                self._states[host] = state
+            return state
+    
+    def _host_config(self, host):
+        """主机的 (延迟范围, 并发数)"""
+        pattern = match_host(host, self.hosts)
+        if pattern is None:
+            return self.delay, self.concurrency
+        config = self.hosts[pattern] or {}
+        delay = _delay_range(config.get("delay", self.delay))
+        return delay, max(1, config.get("concurrency", self.concurrency))
+
+def host_of(url):
+    """URL的主机名（小写，不含端口）"""
+    return (urlsplit(url).hostname or "").lower()
+
+def match_host(host, patterns):
+    """在按主机配置的模式中查找匹配项：精确匹配优先，其次匹配最长的上级域名，没有匹配时返回None"""
+    for pattern in sorted(patterns, key=len, reverse=True):
+        if host == pattern or host.endswith(f".{pattern}"):
+            return pattern
+    return None
+
+def _delay_range(delay):
+    """把单个秒数或 [最小, 最大] 统一为延迟范围"""
+    if delay is None:
+        return (0.0, 0.0)
+    if isinstance(delay, (int, float)):
+        return (float(delay), float(delay))
+    low, high = delay
+    return (float(low), float(high))
+
+# 进程内所有 RequestHandler 共用的调度器
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_host_scheduler():
+    """获取全局主机调度器，首次访问时按 sources 配置创建"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                from src.core.config import get_config_manager
+                config = get_config_manager()
+                _scheduler = HostScheduler(
+                    delay=config.get("sources.request_delay") or [0.5, 1.5],
+                    concurrency=config.get("sources.politeness.concurrency", 2),
+                    hosts=config.get("sources.politeness.hosts") or {}
+                )
+    return _scheduler
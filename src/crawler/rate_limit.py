@@ -0,0 +1,178 @@
+import os
+import time
+import sqlite3
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+class RateLimiter:
+    """令牌桶限速器：按 rate（每秒令牌数）补充令牌，最多积累 capacity 个，线程安全"""
+    
+    def __init__(self, rate, capacity=1, max_backoff=32):
+        if rate <= 0:
+            raise ValueError("rate必须为正数")
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.max_backoff = max(1, max_backoff)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        # 退避倍数：被封锁时加倍，补充速率为 rate / 退避倍数
+        self._backoff = 1.0
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_interval(cls, seconds, capacity=1, max_backoff=32):
+        """按请求间隔（秒）创建"""
+        return cls(1.0 / seconds, capacity, max_backoff) if seconds and seconds > 0 else None
+    
+    def acquire(self, tokens=1):
+        """取得令牌，不足时等待，返回等待的秒数"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                rate = self.rate / self._backoff
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / rate
+            time.sleep(delay)
+            waited += delay
+    
+    def backoff(self):
+        """被封锁或请求失败时调用：退避倍数加倍并清空令牌，返回新的退避倍数"""
+        with self._lock:
+            self._backoff = min(self.max_backoff, self._backoff * 2)
+            self._tokens = 0.0
+            self._updated = time.monotonic()
+            return self._backoff
+    
+    def recover(self, factor=0.5):
+        """请求成功时调用：退避倍数逐步恢复到1"""
+        with self._lock:
+            self._backoff = max(1.0, self._backoff * factor)
+
+class SharedRateLimiter:
+    """跨线程和进程共享的令牌桶限速器：桶状态保存在SQLite中，每次取令牌在一个写事务内完成，支持自适应退避"""
+    
+    def __init__(self, name, rate, capacity=1, db_path="data/db/rate_limits.db", max_backoff=32):
+        if rate <= 0:
+            raise ValueError("rate必须为正数")
+        self.name = name
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.max_backoff = max(1, max_backoff)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        # 手动管理事务，取令牌时用 BEGIN IMMEDIATE 在进程间互斥
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=60, isolation_level=None)
+        self._create_table()
+    
+    def _create_table(self):
+        """创建限速状态表"""
+        with self._lock:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS rate_limits (
+                    name TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated REAL NOT NULL,  -- Unix时间戳，各进程共用同一时钟
+                    backoff REAL NOT NULL DEFAULT 1
+                )
+            ''')
+    
+    def acquire(self, tokens=1):
+        """取得令牌，不足时等待，返回等待的秒数"""
+        waited = 0.0
+        while True:
+            delay = self._update(lambda available, backoff: self._take(available, backoff, tokens))
+            if delay <= 0:
+                return waited
+            time.sleep(delay)
+            waited += delay
+    
+    def backoff(self):
+        """被封锁或请求失败时调用：退避倍数加倍并清空令牌，返回新的退避倍数"""
+        def double(available, backoff):
+            backoff = min(self.max_backoff, backoff * 2)
+            return 0.0, backoff, backoff
+        return self._update(double)
+    
+    def recover(self, factor=0.5):
+        """请求成功时调用：退避倍数逐步恢复到1"""
+        self._update(lambda available, backoff: (available, max(1.0, backoff * factor), None))
+    
+    def _take(self, available, backoff, tokens):
+        """令牌足够时扣除并返回0，否则返回需要等待的秒数"""
+        if available >= tokens:
+            return available - tokens, backoff, 0.0
+        return available, backoff, (tokens - available) / (self.rate / backoff)
+    
+    def _update(self, func):
+        """在写事务内读取并补充令牌，func(可用令牌, 退避倍数) 返回 (新令牌数, 新退避倍数, 结果)"""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = self.conn.execute(
+                    'SELECT tokens, updated, backoff FROM rate_limits WHERE name = ?', (self.name,)
+                ).fetchone()
+                if row is None:
+                    available, backoff = float(self.capacity), 1.0
+                else:
+                    stored, updated, backoff = row
+                    available = min(self.capacity, stored + max(0.0, now - updated) * self.rate / backoff)
+                available, backoff, result = func(available, backoff)
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO rate_limits (name, tokens, updated, backoff) VALUES (?, ?, ?, ?)',
+                    (self.name, available, now, backoff)
+                )
+                self.conn.execute("COMMIT")
+                return result
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+    
+    def close(self):
+        """关闭连接"""
+        try:
+            self.conn.close()
+        except Exception as e:
+            logger.error(f"关闭限速状态连接失败: {str(e)}")
+
+# 按名称共享的限速器，同一来源的所有爬虫实例（多领域并发爬取时）共用一个
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_rate_limiter(name, interval, capacity=1):
+    """获取按名称共享的限速器，interval为请求间隔（秒），为空或0时不限速返回None"""
+    if not interval or interval <= 0:
+        return None
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = RateLimiter.from_interval(interval, capacity)
+            _limiters[name] = limiter
+        return limiter
+
+def get_shared_rate_limiter(name, interval, capacity=1, db_path="data/db/rate_limits.db", max_backoff=32):
+    """获取跨进程共享的限速器，状态库无法使用时退回进程内限速器；interval为空或0时返回None"""
+    if not interval or interval <= 0:
+        return None
+    key = f"shared:{name}"
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            try:
+                limiter = SharedRateLimiter(name, 1.0 / interval, capacity, db_path, max_backoff)
+            except Exception as e:
+                logger.error(f"初始化跨进程限速器失败，使用进程内限速: {str(e)}")
+                limiter = RateLimiter.from_interval(interval, capacity, max_backoff)
+            _limiters[key] = limiter
+        return limiter
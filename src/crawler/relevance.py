@@ -0,0 +1,186 @@
+import math
+import time
+import heapq
+import queue
+import logging
+import threading
+from collections import Counter
+from .identity import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# 评分时忽略的常见英文虚词
+_STOPWORDS = frozenset("""
+a an and are as at be by for from has have in into is it its of on or our that the their this to via we with
+""".split())
+
+def tokenize(text):
+    """分词：归一化后去掉虚词，产出单词及相邻词组成的二元词组（如 "skill evolution"）"""
+    words = [word for word in normalize_text(text).split() if word not in _STOPWORDS and len(word) > 1]
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+class RelevanceFilter:
+    """相关性预筛选：用BM25按领域名称和关键词给标题、摘要打分，只放行达到阈值（及前K名）的论文，在下载前过滤掉离题结果"""
+    
+    def __init__(self, domains, threshold=0.1, top_k=None, window=200, max_wait=5.0, k1=1.2, b=0.75):
+        self.threshold = threshold
+        self.top_k = top_k
+        self.window = max(1, window)
+        # 流式模式下窗口内最早的论文最多等待的秒数，超时（爬取停顿）时不等攒满窗口直接评分
+        self.max_wait = max_wait
+        self.k1 = k1
+        self.b = b
+        # 查询词及其出现次数：领域名称和每个关键词各为一个查询，论文分数取各查询的最高分，只命中单个关键词的论文不会因关键词多而被稀释
+        self.queries = []
+        for domain in domains:
+            for text in [domain.get("name")] + list(domain.get("keywords") or []):
+                query = Counter(tokenize(text))
+                if query:
+                    self.queries.append(query)
+        # 语料统计：已评分的论文数、总词数和各词的文档频率，随处理的窗口累积
+        self._doc_count = 0
+        self._total_length = 0
+        self._df = Counter()
+        self.stats = {"scored": 0, "kept": 0, "dropped": 0}
+    
+    @classmethod
+    def from_config(cls, config, domains):
+        """按 sources.relevance 配置创建，未启用时返回None"""
+        if not config.get("sources.relevance.enabled", False):
+            return None
+        return cls(
+            domains,
+            threshold=config.get("sources.relevance.threshold", 0.1),
+            top_k=config.get("sources.relevance.top_k"),
+            window=config.get("sources.relevance.window", 200),
+            max_wait=config.get("sources.relevance.max_wait_seconds", 5.0),
+            k1=config.get("sources.relevance.k1", 1.2),
+            b=config.get("sources.relevance.b", 0.75)
+        )
+    
+    def filter(self, papers):
+        """按窗口给论文打分，按分数从高到低产出放行的论文（写入 relevance_score）；批量模式传入完整列表时窗口即全部结果"""
+        if not self.queries:
+            yield from papers
+            return
+        window = []
+        for paper in self._iter_windowed(papers):
+            if paper is not None:
+                window.append(paper)
+            if window and (paper is None or len(window) >= self.window):
+                yield from self._flush(window)
+                window = []
+        if window:
+            yield from self._flush(window)
+        logger.info(f"相关性预筛选: 评分 {self.stats['scored']} 篇，放行 {self.stats['kept']} 篇，过滤 {self.stats['dropped']} 篇")
+    
+    def _iter_windowed(self, papers):
+        """逐条产出上游论文；设置了 max_wait 且上游为迭代器时由后台线程读取，窗口内最早的论文等待超时时产出None"""
+        if not self.max_wait or isinstance(papers, (list, tuple)):
+            yield from papers
+            return
+        
+        items = queue.Queue(self.window)
+        stop = threading.Event()
+        
+        def pump():
+            try:
+                for paper in papers:
+                    if not _put(items, ("paper", paper), stop):
+                        return
+                _put(items, ("done", None), stop)
+            except Exception as e:
+                _put(items, ("error", e), stop)
+            finally:
+                close = getattr(papers, "close", None)
+                if close is not None:
+                    close()
+        
+        thread = threading.Thread(target=pump, name="relevance-pump", daemon=True)
+        thread.start()
+        try:
+            # 窗口内最早论文的评分期限，pending 与 filter 中的窗口大小同步
+            deadline = None
+            pending = 0
+            while True:
+                try:
+                    timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                    kind, payload = items.get(timeout=timeout)
+                except queue.Empty:
+                    deadline = None
+                    pending = 0
+                    yield None
+                    continue
+                if kind == "done":
+                    return
+                if kind == "error":
+                    raise payload
+                if deadline is None:
+                    deadline = time.monotonic() + self.max_wait
+                pending += 1
+                if pending >= self.window:
+                    deadline = None
+                    pending = 0
+                yield payload
+        finally:
+            # 下游提前停止时通知后台线程结束
+            stop.set()
+    
+    def score(self, papers):
+        """先把论文计入语料统计再打分，返回各论文的归一化分数（同时写入 relevance_score）"""
+        if not self.queries:
+            return [0.0 for _ in papers]
+        documents = [Counter(tokenize(f"{paper.get('title') or ''} {paper.get('summary') or ''}")) for paper in papers]
+        for terms in documents:
+            self._doc_count += 1
+            self._total_length += sum(terms.values())
+            self._df.update(terms.keys())
+        
+        scores = []
+        for paper, terms in zip(papers, documents):
+            score = max(self._score(query, terms) for query in self.queries)
+            paper["relevance_score"] = round(score, 4)
+            scores.append(score)
+        return scores
+    
+    def _flush(self, papers):
+        """给窗口内的论文打分，返回放行的论文"""
+        scored = [(score, index) for index, score in enumerate(self.score(papers)) if score >= self.threshold]
+        kept = heapq.nlargest(self.top_k, scored) if self.top_k else sorted(scored, reverse=True)
+        
+        self.stats["scored"] += len(papers)
+        self.stats["kept"] += len(kept)
+        self.stats["dropped"] += len(papers) - len(kept)
+        for score, index in kept:
+            logger.debug(f"相关性 {score:.3f}: {papers[index].get('title')}")
+        return [papers[index] for _, index in kept]
+    
+    def _score(self, query, terms):
+        """BM25分数除以该查询可能的最高分，归一化到 [0, 1)"""
+        length = sum(terms.values())
+        average_length = self._total_length / self._doc_count if self._doc_count else 1.0
+        norm = self.k1 * (1 - self.b + self.b * length / (average_length or 1.0))
+        score = 0.0
+        best = 0.0
+        for term, weight in query.items():
+            idf = self._idf(term)
+            best += weight * idf * (self.k1 + 1)
+            frequency = terms.get(term)
+            if frequency:
+                score += weight * idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return score / best if best else 0.0
+    
+    def _idf(self, term):
+        """BM25的逆文档频率（非负形式）"""
+        df = self._df.get(term, 0)
+        return math.log(1 + (self._doc_count - df + 0.5) / (df + 0.5))
+
+def _put(items, item, stop):
+    """放入队列，队列满时等待；下游已停止时放弃并返回False"""
+    while not stop.is_set():
+        try:
+            items.put(item, timeout=1)
+            return True
+        except queue.Full:
+            continue
+    return False
@@ -1,71 +1,168 @@
-import time
 import logging
-from scholarly import scholarly
 from src.core.config import config_manager
+from src.core.cache import get_artifact_cache
+from src.core.replay import get_recorder
+from .rate_limit import get_shared_rate_limiter
 
 logger = logging.getLogger(__name__)
 
 class ScholarCrawler:
-    def __init__(self):
+    def __init__(self, incremental=None, domain=None):
         self.config = config_manager
         self.domain = self.config.get_research_domain()
         self.keywords = self.config.get_keywords()
         self.start_year, self.end_year = self.config.get_time_range()
         self.max_results = self.config.get_max_results("google_scholar")
         self.request_interval = self.config.get("sources.google_scholar.request_interval", 3)
+        self.max_retries = self.config.get("sources.google_scholar.max_retries", 5)
+        # 只对实际的结果页请求限速，所有线程和进程共享同一个令牌桶
+        self.rate_limiter = get_shared_rate_limiter(
+            "google_scholar",
+            self.request_interval,
+            capacity=self.config.get("sources.google_scholar.burst", 1),
+            db_path=self.config.get("sources.rate_limit_db", "data/db/rate_limits.db"),
+            max_backoff=self.config.get("sources.google_scholar.max_backoff", 32)
+        )
+        # 增量模式：从上次运行已入库的最新年份开始查询
+        if incremental is None:
+            incremental = self.config.get("sources.incremental", False)
+        self.incremental = incremental
+        # 搜索结果缓存有效期（秒）
+        self.cache_ttl = self.config.get("system.cache.crawl_ttl_hours", 24) * 3600
+        # 多领域运行时按领域配置覆盖领域名称、关键词和时间范围
+        if domain:
+            self.domain = domain["name"]
+            self.keywords = domain["keywords"]
+            self.start_year, self.end_year = domain["start_year"], domain["end_year"]
     
     def crawl(self):
         """爬取Google Scholar论文"""
-        papers = []
+        papers = list(self.iter_papers())
+        logger.info(f"成功获取 {len(papers)} 篇Google Scholar论文")
+        return papers
+    
+    def iter_papers(self):
+        """逐条产出Google Scholar论文"""
+        if self.incremental:
+            yield from self._iter_incremental()
+            return
+        yield from self._iter_search()
+    
+    def _iter_incremental(self):
+        """增量爬取：Google Scholar只提供年份，从高水位年份开始查询，重复结果由台账跳过"""
+        from src.database.crawl_state import CrawlStateStore
         
+        state = CrawlStateStore()
+        base_query = self._build_base_query()
+        high_water = state.get_high_water("Google Scholar", base_query)
+        if high_water:
+            self.start_year = max(self.start_year or 0, int(high_water))
+            logger.info(f"Google Scholar增量爬取，从 {self.start_year} 年开始")
+        
+        newest = int(high_water) if high_water else None
+        try:
+            for paper in self._iter_search():
+                year = paper.get("publish_year")
+                if year and (newest is None or year > newest):
+                    newest = year
+                yield paper
+        finally:
+            if newest is not None and str(newest) != high_water:
+                state.set_high_water("Google Scholar", base_query, newest)
+            state.close()
+    
+    def _iter_search(self):
+        """执行搜索并逐条产出结果"""
         # 构建搜索查询
         query = self._build_query()
         logger.info(f"构建Google Scholar搜索查询: {query}")
         
+        # 相同查询在有效期内直接使用缓存的结果
+        cache = get_artifact_cache()
+        cache_key = cache.make_key("google_scholar", query, self.max_results)
+        cached = cache.get_json("crawl", cache_key, max_age=self.cache_ttl)
+        if cached is not None:
+            logger.info(f"使用缓存的Google Scholar搜索结果: {len(cached)} 篇")
+            yield from cached
+            return
+        
         # 执行搜索
+        papers = []
         try:
-            # 使用scholarly库的搜索功能
-            search_query = scholarly.search_pubs(query)
+            # 使用scholarly库的搜索功能，经过录制/回放层（回放时不访问网络，也不限速）
+            recorder = get_recorder()
+            search_query = recorder.iterate("scholar", (query,), lambda: self._iter_results(query))
             
             # 获取结果
-            count = 0
-            while count < self.max_results:
+            for result in search_query:
+                paper = self._parse_result(result)
+                
+                # 检查年份
+                if self._is_in_time_range(paper.get("publish_year")):
+                    papers.append(paper)
+                    logger.debug(f"获取到论文: {paper.get('title')}")
+                    yield paper
+                    if len(papers) >= self.max_results:
+                        break
+            else:
+                logger.info("Google Scholar搜索结果已用完")
+            
+            cache.put_json("crawl", cache_key, papers)
+        except Exception as e:
+            logger.error(f"Google Scholar搜索失败: {str(e)}")
+    
+    def _iter_results(self, query):
+        """逐条产出scholarly搜索结果：只在请求新的结果页之前取令牌，同一页内的结果不再等待"""
+        from scholarly import scholarly
+        results = self._fetch_page(lambda: scholarly.search_pubs(query))
+        while True:
+            if _page_exhausted(results):
+                # 当前页已取完，下一次next会请求下一页
                 try:
-                    result = next(search_query)
-                    paper = self._parse_result(result)
-                    
-                    # 检查年份
-                    if self._is_in_time_range(paper.get("publish_year")):
-                        papers.append(paper)
-                        count += 1
-                        logger.debug(f"获取到论文: {paper.get('title')}")
-                    
-                    # 控制请求间隔，避免反爬
-                    time.sleep(self.request_interval)
+                    result = self._fetch_page(lambda: next(results))
                 except StopIteration:
-                    logger.info("Google Scholar搜索结果已用完")
-                    break
+                    return
+            else:
+                try:
+                    result = next(results)
                 except Exception as e:
-                    logger.error(f"获取Google Scholar结果失败: {str(e)}")
-                    # 遇到错误时增加间隔
-                    time.sleep(self.request_interval * 2)
+                    logger.error(f"解析Google Scholar结果失败: {str(e)}")
                     continue
-            
-            logger.info(f"成功获取 {len(papers)} 篇Google Scholar论文")
-        except Exception as e:
-            logger.error(f"Google Scholar搜索失败: {str(e)}")
-        
-        return papers
+            yield result
     
-    def _build_query(self):
-        """构建搜索查询字符串"""
+    def _fetch_page(self, func):
+        """限速后执行一次结果页请求，失败（多为被封锁）时加倍退避后重试，成功后逐步恢复请求速率"""
+        failures = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            try:
+                value = func()
+            except StopIteration:
+                raise
+            except Exception as e:
+                failures += 1
+                if failures > self.max_retries:
+                    raise
+                backoff = self.rate_limiter.backoff() if self.rate_limiter is not None else 1
+                logger.warning(f"获取Google Scholar结果页失败（第 {failures} 次），请求间隔退避至 {backoff:g} 倍: {str(e)}")
+                continue
+            if self.rate_limiter is not None:
+                self.rate_limiter.recover()
+            return value
+    
+    def _build_base_query(self):
+        """构建不含时间范围的查询字符串"""
         # 构建关键词查询
         if self.keywords:
             # 优先使用配置的关键词
-            query = " ".join(self.keywords)
-        else:
-            # 使用研究领域名称
-            query = self.domain
+            return " ".join(self.keywords)
+        # 使用研究领域名称
+        return self.domain
+    
+    def _build_query(self):
+        """构建搜索查询字符串"""
+        query = self._build_base_query()
         
         # 添加时间范围
         if self.start_year:
@@ -118,3 +215,10 @@ class ScholarCrawler:
             return False
         
         return True
+
+def _page_exhausted(results):
+    """scholarly搜索迭代器的当前页是否已取完（取完后下一次next会请求新页面），无法判断时按每条都会请求处理"""
+    rows = getattr(results, "_rows", None)
+    if rows is None:
+        return True
+    return getattr(results, "_pos", 0) >= len(rows)
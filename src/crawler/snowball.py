@@ -0,0 +1,282 @@
+import math
+import heapq
+import hashlib
+import logging
+from src.core.config import config_manager
+from .utils import RequestHandler, strip_arxiv_version
+from .identity import normalize_doi
+from .relevance import RelevanceFilter
+from .dump import parse_openalex_work
+
+logger = logging.getLogger(__name__)
+
+# OpenAlex接口
+OPENALEX_API_URL = "https://api.openalex.org"
+
+# 按ID批量获取时每个请求的ID数（OpenAlex过滤条件最多50个值）
+_BATCH_SIZE = 50
+
+class BloomFilter:
+    """布隆过滤器：用固定大小的位数组记录已见过的键，可能误判为已见过，但不会漏判"""
+    
+    def __init__(self, capacity=1000000, error_rate=0.001):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+    
+    def add(self, key):
+        """记录键"""
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+    
+    def __contains__(self, key):
+        """键是否可能已记录"""
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+    
+    def _positions(self, key):
+        """双重哈希生成 hashes 个位置"""
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+class SnowballCrawler:
+    """引文雪球扩展：从种子论文出发，沿OpenAlex引文图获取参考文献和施引论文，按相关性和被引次数排序的优先队列逐个扩展，受深度和请求预算限制"""
+    
+    def __init__(self, incremental=None, domain=None):
+        self.config = config_manager
+        self.domain = self.config.get_research_domain()
+        self.keywords = self.config.get_keywords()
+        self.start_year, self.end_year = self.config.get_time_range()
+        # 引文扩展没有增量模式；已处理过的论文在获取前由已见集合跳过
+        self.incremental = incremental
+        self.api_url = self.config.get("sources.snowball.api_url") or OPENALEX_API_URL
+        # 种子论文：arXiv ID、DOI或OpenAlex ID；seed_from_db 为从数据库中该领域被引最多的论文中补充的数量
+        self.seeds = self.config.get("sources.snowball.seeds") or []
+        self.seed_from_db = self.config.get("sources.snowball.seed_from_db", 10)
+        self.max_depth = self.config.get("sources.snowball.max_depth", 2)
+        # 请求预算（OpenAlex请求数）和最多产出的论文数
+        self.max_requests = self.config.get("sources.snowball.max_requests", 200)
+        self.max_results = self.config.get("sources.snowball.max_results", 500)
+        # 每篇论文最多获取的施引论文数（按被引次数降序）
+        self.citing_per_paper = self.config.get("sources.snowball.citing_per_paper", 50)
+        # 相关性低于该值的论文不加入队列
+        self.min_relevance = self.config.get("sources.snowball.min_relevance", 0.02)
+        # 优先级 = 相关性 × (1 + citation_weight × log(1 + 被引次数))
+        self.citation_weight = self.config.get("sources.snowball.citation_weight", 0.2)
+        # OpenAlex礼貌池：请求中附带联系邮箱
+        self.mailto = self.config.get("sources.snowball.mailto")
+        self.bloom_capacity = self.config.get("sources.snowball.bloom_capacity", 1000000)
+        # 多领域运行时按领域配置覆盖领域名称、关键词和时间范围
+        if domain:
+            self.domain = domain["name"]
+            self.keywords = domain["keywords"]
+            self.start_year, self.end_year = domain["start_year"], domain["end_year"]
+        self.request_handler = None
+        self.requests = 0
+    
+    def crawl(self):
+        """执行引文扩展"""
+        papers = list(self.iter_papers())
+        logger.info(f"引文扩展获取到 {len(papers)} 篇论文")
+        return papers
+    
+    def iter_papers(self):
+        """按优先级逐个扩展论文：产出论文后获取其参考文献和施引论文，打分后加入队列"""
+        self.request_handler = RequestHandler()
+        self.requests = 0
+        scorer = RelevanceFilter([{"name": self.domain, "keywords": self.keywords}])
+        seen = BloomFilter(self.bloom_capacity)
+        self._load_known(seen)
+        versions = self._open_version_store()
+        try:
+            yield from self._expand(scorer, seen, versions)
+        finally:
+            if versions is not None:
+                versions.close()
+    
+    def _expand(self, scorer, seen, versions):
+        """从种子论文开始按优先级扩展"""
+        seeds = self._fetch_seeds()
+        if not seeds:
+            logger.warning("引文扩展没有可用的种子论文，请配置 sources.snowball.seeds")
+            return
+        # 优先队列：(-优先级, 序号, 深度, OpenAlex记录, 论文字典)，种子论文本身不产出
+        frontier = []
+        counter = 0
+        for record in seeds:
+            self._mark_seen(seen, record, parse_openalex_work(record) or {})
+            heapq.heappush(frontier, (float("-inf"), counter, 0, record, None))
+            counter += 1
+        
+        produced = 0
+        while frontier and produced < self.max_results:
+            _, _, depth, record, paper = heapq.heappop(frontier)
+            if paper is not None:
+                yield paper
+                produced += 1
+            if depth >= self.max_depth or self.requests >= self.max_requests:
+                continue
+            
+            try:
+                neighbours = self._fetch_references(record, seen) + self._fetch_citing(record)
+            except Exception as e:
+                logger.error(f"获取引文失败: {record.get('id')} - {str(e)}")
+                continue
+            candidates = []
+            for neighbour in neighbours:
+                candidate = parse_openalex_work(neighbour)
+                if candidate is None or self._is_seen(seen, neighbour, candidate):
+                    continue
+                self._mark_seen(seen, neighbour, candidate)
+                if not self._in_time_range(candidate.get("publish_year")):
+                    continue
+                # 已有版本进入过流水线的arXiv论文（可能尚未入库）不再产出和扩展
+                if versions is not None and candidate.get("arxiv_id") and versions.is_processed(candidate["arxiv_id"]):
+                    continue
+                candidates.append((neighbour, candidate))
+            
+            scores = scorer.score([candidate for _, candidate in candidates])
+            for (neighbour, candidate), score in zip(candidates, scores):
+                if score < self.min_relevance:
+                    continue
+                priority = score * (1 + self.citation_weight * math.log1p(candidate.get("citations") or 0))
+                heapq.heappush(frontier, (-priority, counter, depth + 1, neighbour, candidate))
+                counter += 1
+        logger.info(f"引文扩展结束: 产出 {produced} 篇论文，OpenAlex请求 {self.requests} 次，队列剩余 {len(frontier)} 篇")
+    
+    def _fetch_seeds(self):
+        """获取种子论文的OpenAlex记录"""
+        identifiers = list(self.seeds)
+        if self.seed_from_db:
+            identifiers.extend(self._seeds_from_db())
+        records = []
+        for identifier in identifiers:
+            key = _openalex_key(identifier)
+            if key is None or self.requests >= self.max_requests:
+                continue
+            try:
+                records.append(self._get(f"{self.api_url}/works/{key}"))
+            except Exception as e:
+                logger.warning(f"获取种子论文失败: {identifier} - {str(e)}")
+        return records
+    
+    def _open_version_store(self):
+        """打开记录arXiv论文已处理版本的元数据存储，未启用或打开失败时返回None"""
+        if not self.config.get("sources.arxiv.track_versions", True):
+            return None
+        try:
+            from src.database.arxiv_metadata import ArxivMetadataStore
+            return ArxivMetadataStore()
+        except Exception as e:
+            logger.error(f"打开arXiv元数据存储失败，引文扩展不检查已处理的arXiv论文: {str(e)}")
+            return None
+    
+    def _seeds_from_db(self):
+        """数据库中该领域被引次数最多的论文（取arXiv ID或DOI）"""
+        from src.database.db_manager import DatabaseManager
+        db_manager = DatabaseManager()
+        try:
+            papers = db_manager.get_papers_by_domain(self.domain)
+        finally:
+            db_manager.close()
+        papers.sort(key=lambda paper: paper.get("citations") or 0, reverse=True)
+        identifiers = []
+        for paper in papers:
+            identifier = paper.get("doi") or paper.get("arxiv_id")
+            if identifier:
+                identifiers.append(identifier)
+            if len(identifiers) >= self.seed_from_db:
+                break
+        return identifiers
+    
+    def _load_known(self, seen):
+        """把数据库中已有论文的DOI和arXiv ID加入已见集合，扩展时不再获取"""
+        from src.database.db_manager import DatabaseManager
+        db_manager = DatabaseManager()
+        try:
+            for record in db_manager.get_identity_records():
+                self._mark_seen(seen, None, record)
+        finally:
+            db_manager.close()
+    
+    def _fetch_references(self, record, seen):
+        """按ID批量获取参考文献，已见过的ID不再请求"""
+        ids = [work_id.rsplit("/", 1)[-1] for work_id in record.get("referenced_works") or [] if work_id not in seen]
+        works = []
+        for start in range(0, len(ids), _BATCH_SIZE):
+            if self.requests >= self.max_requests:
+                break
+            data = self._get(f"{self.api_url}/works", params={
+                "filter": f"openalex:{'|'.join(ids[start:start + _BATCH_SIZE])}",
+                "per-page": _BATCH_SIZE
+            })
+            works.extend(data.get("results") or [])
+        return works
+    
+    def _fetch_citing(self, record):
+        """获取被引次数最多的施引论文"""
+        if not record.get("cited_by_count") or not self.citing_per_paper or self.requests >= self.max_requests:
+            return []
+        data = self._get(f"{self.api_url}/works", params={
+            "filter": f"cites:{record['id'].rsplit('/', 1)[-1]}",
+            "sort": "cited_by_count:desc",
+            "per-page": min(self.citing_per_paper, 200)
+        })
+        return data.get("results") or []
+    
+    def _get(self, url, params=None):
+        """请求OpenAlex接口并计入请求预算"""
+        params = dict(params or {})
+        if self.mailto:
+            params["mailto"] = self.mailto
+        self.requests += 1
+        response = self.request_handler.get(url, params=params, headers={"Accept": "application/json"})
+        return response.json()
+    
+    @staticmethod
+    def _is_seen(seen, record, paper):
+        """OpenAlex ID、DOI或arXiv ID任一已见过"""
+        return any(key in seen for key in _seen_keys(record, paper))
+    
+    @staticmethod
+    def _mark_seen(seen, record, paper):
+        """把论文的各个标识加入已见集合"""
+        for key in _seen_keys(record, paper):
+            seen.add(key)
+    
+    def _in_time_range(self, publish_year):
+        """检查论文是否在时间范围内（没有年份信息的论文也包含）"""
+        if not publish_year:
+            return True
+        if self.start_year and publish_year < self.start_year:
+            return False
+        if self.end_year and publish_year > self.end_year:
+            return False
+        return True
+
+def _seen_keys(record, paper):
+    """已见集合中使用的键"""
+    keys = []
+    if record and record.get("id"):
+        keys.append(record["id"])
+    doi = normalize_doi(paper.get("doi"))
+    if doi:
+        keys.append(f"doi:{doi}")
+    arxiv_id = strip_arxiv_version(paper.get("arxiv_id"))
+    if arxiv_id:
+        keys.append(f"arxiv:{arxiv_id}")
+    return keys
+
+def _openalex_key(identifier):
+    """把种子标识转换为OpenAlex单篇查询的键：OpenAlex ID原样使用，DOI加 doi: 前缀，arXiv ID使用arXiv的DOI"""
+    identifier = (identifier or "").strip()
+    if not identifier:
+        return None
+    if identifier.rsplit("/", 1)[-1][:1] in ("W", "w") and identifier.rsplit("/", 1)[-1][1:].isdigit():
+        return identifier.rsplit("/", 1)[-1].upper()
+    doi = normalize_doi(identifier)
+    if doi and doi.startswith("10."):
+        return f"doi:{doi}"
+    return f"doi:10.48550/arXiv.{strip_arxiv_version(identifier)}"
@@ -1,8 +1,8 @@
-import requests
-import time
-import random
 import logging
-from fake_useragent import UserAgent
+from contextlib import contextmanager
+from src.core.replay import get_recorder, CassetteMissError
+from .politeness import get_host_scheduler
+from .http_cache import get_http_cache
 
 logger = logging.getLogger(__name__)
 
@@ -10,13 +10,27 @@ class RequestHandler:
     """请求处理器，处理HTTP请求和反爬"""
     
     def __init__(self):
+        # 延迟导入网络依赖
+        import requests
+        from fake_useragent import UserAgent
         self.session = requests.Session()
         self.ua = UserAgent()
         self.retry_count = 3
         self.retry_delay = 2
+        # 按主机调度请求（最小间隔和并发上限），避免反爬，不同主机的请求互不等待
+        self.scheduler = get_host_scheduler()
+        # 录制/回放层，回放时不访问网络
+        self.recorder = get_recorder()
+        # 持久化HTTP缓存（只用于GET），过期后用条件请求重新验证
+        self.http_cache = get_http_cache()
     
     def get(self, url, headers=None, params=None, timeout=30):
         """发送GET请求"""
+        # 有效期内的缓存直接使用，不访问网络
+        entry = self.http_cache.lookup(url, params)
+        if entry is not None and entry.fresh:
+            return entry.response()
+        
         for i in range(self.retry_count):
             try:
                 # 构建请求头
@@ -31,28 +45,31 @@ class RequestHandler:
                 # 更新自定义请求头
                 if headers:
                     request_headers.update(headers)
+                # 已过期的缓存用条件请求重新验证，未变化时服务端只返回304
+                if entry is not None:
+                    request_headers.update(entry.validators())
                 
                 # 发送请求
-                response = self.session.get(
+                response = self.recorder.http("GET", url, lambda: self._send(url, lambda: self.session.get(
                     url, 
                     headers=request_headers, 
                     params=params, 
                     timeout=timeout,
                     allow_redirects=True
-                )
+                )), params=params, headers=request_headers)
                 
                 # 检查响应状态
                 response.raise_for_status()
                 
-                # 随机延迟，避免反爬
-                time.sleep(random.uniform(0.5, 1.5))
-                
-                return response
+                return self.http_cache.resolve(url, params, response, entry)
+            except CassetteMissError:
+                # 没有录制的请求重试也不会命中
+                raise
             except Exception as e:
                 logger.warning(f"请求失败 ({i+1}/{self.retry_count}): {str(e)}")
                 if i < self.retry_count - 1:
-                    # 指数退避
-                    time.sleep(self.retry_delay * (2 ** i))
+                    # 指数退避：推迟该主机的下一个请求，重试在主机队列中等待，不影响其他主机
+                    self.scheduler.defer(url, self.retry_delay * (2 ** i))
                     continue
                 else:
                     logger.error(f"请求最终失败: {str(e)}")
@@ -76,30 +93,60 @@ class RequestHandler:
                     request_headers.update(headers)
                 
                 # 发送请求
-                response = self.session.post(
+                response = self.recorder.http("POST", url, lambda: self._send(url, lambda: self.session.post(
                     url, 
                     data=data, 
                     json=json, 
                     headers=request_headers, 
                     timeout=timeout
-                )
+                )), body={"data": data, "json": json})
                 
                 # 检查响应状态
                 response.raise_for_status()
                 
-                # 随机延迟，避免反爬
-                time.sleep(random.uniform(0.5, 1.5))
-                
                 return response
+            except CassetteMissError:
+                # 没有录制的请求重试也不会命中
+                raise
             except Exception as e:
                 logger.warning(f"请求失败 ({i+1}/{self.retry_count}): {str(e)}")
                 if i < self.retry_count - 1:
-                    # 指数退避
-                    time.sleep(self.retry_delay * (2 ** i))
+                    # 指数退避：推迟该主机的下一个请求，重试在主机队列中等待，不影响其他主机
+                    self.scheduler.defer(url, self.retry_delay * (2 ** i))
                     continue
                 else:
                     logger.error(f"请求最终失败: {str(e)}")
                     raise
+    
+    @contextmanager
+    def stream(self, url, headers=None, timeout=30):
+        """发送流式GET请求（不经过HTTP缓存和重试），产出响应，响应体用 iter_content 分块读取；录制/回放时读取完整响应体"""
+        request_headers = {
+            "User-Agent": self.ua.random,
+            "Accept": "application/pdf,*/*;q=0.8",
+            "Accept-Language": "en-US,en;q=0.5",
+            "Connection": "keep-alive"
+        }
+        if headers:
+            request_headers.update(headers)
+        
+        if self.recorder.enabled:
+            yield self.recorder.http("GET", url, lambda: self._send(url, lambda: self.session.get(
+                url, headers=request_headers, timeout=timeout, allow_redirects=True
+            )), headers=request_headers)
+            return
+        # 整个传输过程占用主机的并发名额
+        with self.scheduler.slot(url):
+            response = self.session.get(url, headers=request_headers, timeout=timeout, stream=True, allow_redirects=True)
+            try:
+                yield response
+            finally:
+                response.close()
+    
+    def _send(self, url, send):
+        """在主机调度器分配的名额内发送请求（只有实际访问网络时才排队）"""
+        with self.scheduler.slot(url):
+            return send()
 
 def normalize_title(title):
     """标准化论文标题"""
@@ -119,3 +166,22 @@ def extract_doi(text):
     if match:
         return match.group(0)
     return None
+
+def strip_arxiv_version(arxiv_id):
+    """去掉arXiv ID的版本后缀，如 2007.06918v1 -> 2007.06918"""
+    import re
+    if not arxiv_id:
+        return None
+    return re.sub(r"v\d+$", "", arxiv_id.strip())
+
+def canonical_paper_id(paper):
+    """生成论文的规范ID：优先使用arXiv ID（去版本），其次DOI，最后使用标题哈希"""
+    import hashlib
+    arxiv_id = strip_arxiv_version(paper.get("arxiv_id"))
+    if arxiv_id:
+        return f"arxiv:{arxiv_id}"
+    doi = paper.get("doi")
+    if doi:
+        return f"doi:{doi.strip().lower()}"
+    title = normalize_title(paper.get("title")).lower()
+    return f"title:{hashlib.sha1(title.encode('utf-8')).hexdigest()[:16]}"
@@ -1,9 +1,16 @@
 from .models import PaperModel
 from .db_manager import DatabaseManager
 from .queries import PaperQueries
+from .ledger import PaperLedger, LEDGER_STAGES
+from .crawl_state import CrawlStateStore
+from .arxiv_metadata import ArxivMetadataStore
 
 __all__ = [
     "PaperModel",
     "DatabaseManager",
-    "PaperQueries"
+    "PaperQueries",
+    "PaperLedger",
+    "LEDGER_STAGES",
+    "CrawlStateStore",
+    "ArxivMetadataStore"
 ]
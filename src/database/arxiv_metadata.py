@@ -0,0 +1,205 @@
+import sqlite3
+import json
+import os
+import threading
+import logging
+from src.core.config import config_manager
+
+logger = logging.getLogger(__name__)
+
+# 论文字典中以JSON格式存储的字段
+_JSON_FIELDS = ("authors", "categories")
+
+_COLUMNS = (
+    "arxiv_id", "version", "title", "authors", "summary", "categories",
+    "primary_category", "doi", "published", "updated", "datestamp"
+)
+
+class ArxivMetadataStore:
+    """arXiv元数据本地存储：按去版本的arXiv ID保存批量收割或检索得到的论文元数据，并记录流水线已处理的版本"""
+    
+    def __init__(self, db_path=None):
+        self.config = config_manager
+        self.db_path = db_path or self.config.get_database_path()
+        self._lock = threading.Lock()
+        
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self._create_table()
+    
+    def _create_table(self):
+        """创建元数据表"""
+        with self._lock:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS arxiv_metadata (
+                    arxiv_id TEXT PRIMARY KEY,  -- 不含版本后缀
+                    version INTEGER,
+                    title TEXT,
+                    authors TEXT,  -- JSON格式
+                    summary TEXT,
+                    categories TEXT,  -- JSON格式
+                    primary_category TEXT,
+                    doi TEXT,
+                    published TEXT,
+                    updated TEXT,
+                    datestamp TEXT,  -- OAI-PMH记录的最后修改日期
+                    fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    processed_version INTEGER,  -- 流水线已处理的版本
+                    processed_updated TEXT  -- 流水线已处理版本的更新时间
+                )
+            ''')
+            # 旧表没有已处理版本列时补充
+            columns = [row[1] for row in self.conn.execute('PRAGMA table_info(arxiv_metadata)').fetchall()]
+            for column, column_type in (("processed_version", "INTEGER"), ("processed_updated", "TEXT")):
+                if column not in columns:
+                    self.conn.execute(f'ALTER TABLE arxiv_metadata ADD COLUMN {column} {column_type}')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_arxiv_metadata_published ON arxiv_metadata(published)')
+            self.conn.commit()
+    
+    def upsert_many(self, papers):
+        """批量写入论文元数据（单个事务），已有记录更新元数据并保留已处理的版本，返回写入数量"""
+        rows = [row for row in (_to_row(paper) for paper in papers) if row is not None]
+        if not rows:
+            return 0
+        try:
+            with self._lock:
+                self.conn.executemany(_UPSERT_SQL, rows)
+                self.conn.commit()
+            return len(rows)
+        except Exception as e:
+            logger.error(f"写入arXiv元数据失败: {str(e)}")
+            return 0
+    
+    def check_version(self, paper):
+        """按主键比较论文版本与流水线已处理的版本，返回 "new"（未处理过）、"revised"（有新版本）或 "unchanged"；元数据较新时一并写入"""
+        arxiv_id, version = _split_version(paper.get("arxiv_id"))
+        if not arxiv_id:
+            return None
+        updated = paper.get("updated")
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT version, updated, processed_version, processed_updated FROM arxiv_metadata WHERE arxiv_id = ?',
+                (arxiv_id,)
+            ).fetchone()
+        
+        processed = row is not None and (row["processed_version"] is not None or row["processed_updated"] is not None)
+        if not _is_arxiv_record(paper, version):
+            # 其他来源（如OpenAlex）的记录只有不带版本的arXiv ID，其时间字段与arXiv版本无关：已处理过即视为未变化，不写入元数据
+            return "unchanged" if processed else "new"
+        if not processed:
+            status = "new"
+        elif version and row["processed_version"]:
+            status = "revised" if version > row["processed_version"] else "unchanged"
+        else:
+            # 没有版本号时按更新时间比较（arXiv只在发布新版本时更新该时间）
+            status = "revised" if updated and row["processed_updated"] and updated > row["processed_updated"] else "unchanged"
+        
+        # 未变化的论文只做一次主键查询；已有相同或更新版本的元数据（如OAI收割写入的）时不覆盖
+        if status != "unchanged" and (row is None or _is_newer(version, updated, row["version"], row["updated"])):
+            self.upsert_many([paper])
+        return status
+    
+    def is_processed(self, arxiv_id):
+        """arXiv ID（可带版本后缀）是否已有版本进入过流水线处理"""
+        arxiv_id, _ = _split_version(arxiv_id)
+        if not arxiv_id:
+            return False
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT processed_version, processed_updated FROM arxiv_metadata WHERE arxiv_id = ?', (arxiv_id,)
+            ).fetchone()
+        return row is not None and (row["processed_version"] is not None or row["processed_updated"] is not None)
+    
+    def mark_processed(self, paper):
+        """记录论文当前版本已进入流水线处理"""
+        arxiv_id, version = _split_version(paper.get("arxiv_id"))
+        if not arxiv_id or not _is_arxiv_record(paper, version):
+            return
+        try:
+            with self._lock:
+                self.conn.execute(
+                    'UPDATE arxiv_metadata SET processed_version = ?, processed_updated = ? WHERE arxiv_id = ?',
+                    (version, paper.get("updated"), arxiv_id)
+                )
+                self.conn.commit()
+        except Exception as e:
+            logger.error(f"记录arXiv已处理版本失败: {arxiv_id} - {str(e)}")
+    
+    def get(self, arxiv_id):
+        """按arXiv ID（可带版本后缀）获取论文字典，不存在时返回None"""
+        arxiv_id, _ = _split_version(arxiv_id)
+        with self._lock:
+            row = self.conn.execute('SELECT * FROM arxiv_metadata WHERE arxiv_id = ?', (arxiv_id,)).fetchone()
+        return self._row_to_paper(row) if row else None
+    
+    def count(self):
+        """记录总数"""
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*) FROM arxiv_metadata').fetchone()[0]
+    
+    @staticmethod
+    def _row_to_paper(row):
+        """数据库行转换为与爬虫结果一致的论文字典"""
+        paper = dict(row)
+        for field in _JSON_FIELDS:
+            paper[field] = json.loads(paper[field]) if paper[field] else []
+        paper.pop("processed_version", None)
+        paper.pop("processed_updated", None)
+        version = paper.pop("version")
+        if version:
+            paper["arxiv_id"] = f"{paper['arxiv_id']}v{version}"
+        paper.pop("fetched_at", None)
+        paper["source"] = "arXiv"
+        paper["publish_year"] = int(paper["published"][:4]) if paper.get("published") else None
+        paper["pdf_url"] = f"https://arxiv.org/pdf/{paper['arxiv_id']}"
+        paper["html_url"] = f"https://arxiv.org/abs/{paper['arxiv_id']}"
+        return paper
+    
+    def close(self):
+        """关闭连接"""
+        try:
+            self.conn.close()
+        except Exception as e:
+            logger.error(f"关闭arXiv元数据连接失败: {str(e)}")
+
+# 已有记录只更新元数据列，保留已处理的版本
+_UPSERT_SQL = f'''
+    INSERT INTO arxiv_metadata ({", ".join(_COLUMNS)}, fetched_at)
+    VALUES ({", ".join("?" for _ in _COLUMNS)}, CURRENT_TIMESTAMP)
+    ON CONFLICT(arxiv_id) DO UPDATE SET
+        {", ".join(f"{column} = excluded.{column}" for column in _COLUMNS[1:])},
+        fetched_at = CURRENT_TIMESTAMP
+'''
+
+def _to_row(paper):
+    """论文字典转换为写入的行，没有arXiv ID时返回None"""
+    arxiv_id, version = _split_version(paper.get("arxiv_id"))
+    if not arxiv_id:
+        return None
+    values = dict(paper, arxiv_id=arxiv_id, version=version)
+    for field in _JSON_FIELDS:
+        values[field] = json.dumps(values.get(field) or [], ensure_ascii=False)
+    return tuple(values.get(column) for column in _COLUMNS)
+
+def _is_arxiv_record(paper, version):
+    """论文的版本信息是否来自arXiv（带版本号，或来源为arXiv）"""
+    return version is not None or paper.get("source") == "arXiv"
+
+def _is_newer(version, updated, stored_version, stored_updated):
+    """论文版本是否比已存储的版本新"""
+    if version and stored_version:
+        return version > stored_version
+    return bool(updated) and (not stored_updated or updated > stored_updated)
+
+def _split_version(arxiv_id):
+    """拆分arXiv ID与版本号，如 2007.06918v2 -> ("2007.06918", 2)"""
+    if not arxiv_id:
+        return None, None
+    arxiv_id = arxiv_id.strip()
+    base, separator, version = arxiv_id.rpartition("v")
+    if separator and base and version.isdigit():
+        return base, int(version)
+    return arxiv_id, None
@@ -0,0 +1,75 @@
+import sqlite3
+import hashlib
+import os
+import threading
+import logging
+from src.core.config import config_manager
+
+logger = logging.getLogger(__name__)
+
+class CrawlStateStore:
+    """增量爬取状态：按来源和查询指纹记录已入库的最新提交/更新时间（高水位）"""
+    
+    def __init__(self, db_path=None):
+        self.config = config_manager
+        self.db_path = db_path or self.config.get_database_path()
+        self._lock = threading.Lock()
+        
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self._create_table()
+    
+    def _create_table(self):
+        """创建爬取状态表"""
+        with self._lock:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS crawl_state (
+                    source TEXT NOT NULL,
+                    query_fingerprint TEXT NOT NULL,
+                    query TEXT,
+                    high_water TEXT,  -- ISO格式时间或年份
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (source, query_fingerprint)
+                )
+            ''')
+            self.conn.commit()
+    
+    @staticmethod
+    def fingerprint(query):
+        """计算查询指纹（不含时间范围部分）"""
+        return hashlib.sha1(query.strip().encode('utf-8')).hexdigest()[:16]
+    
+    def get_high_water(self, source, query):
+        """获取查询的高水位，没有记录时返回None"""
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT high_water FROM crawl_state WHERE source = ? AND query_fingerprint = ?',
+                (source, self.fingerprint(query))
+            ).fetchone()
+        return row["high_water"] if row else None
+    
+    def set_high_water(self, source, query, high_water):
+        """更新查询的高水位"""
+        try:
+            with self._lock:
+                self.conn.execute('''
+                    INSERT INTO crawl_state (source, query_fingerprint, query, high_water, updated_at)
+                    VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                    ON CONFLICT(source, query_fingerprint) DO UPDATE SET
+                        high_water = excluded.high_water,
+                        updated_at = CURRENT_TIMESTAMP
+                ''', (source, self.fingerprint(query), query, str(high_water)))
+                self.conn.commit()
+            logger.info(f"更新{source}增量爬取高水位: {high_water}")
+        except Exception as e:
+            logger.error(f"更新爬取状态失败: {str(e)}")
+    
+    def close(self):
+        """关闭连接"""
+        try:
+            self.conn.close()
+        except Exception as e:
+            logger.error(f"关闭爬取状态连接失败: {str(e)}")
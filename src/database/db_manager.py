@@ -71,6 +71,38 @@ class DatabaseManager:
         
         return PaperModel.get_all_papers(self.conn)
     
+    def get_identity_records(self):
+        """获取身份解析所需的字段"""
+        if not self.conn:
+            logger.error("数据库连接未建立")
+            return []
+        
+        return PaperModel.get_identity_records(self.conn)
+    
+    def update_paper_keys(self, updates):
+        """批量写入论文规范ID"""
+        if not self.conn:
+            logger.error("数据库连接未建立")
+            return False
+        
+        return PaperModel.update_paper_keys(self.conn, updates)
+    
+    def add_paper_domains(self, paper_key, domains):
+        """为论文添加领域标签"""
+        if not self.conn:
+            logger.error("数据库连接未建立")
+            return False
+        
+        return PaperModel.add_paper_domains(self.conn, paper_key, domains)
+    
+    def get_papers_by_domain(self, domain):
+        """根据领域获取论文"""
+        if not self.conn:
+            logger.error("数据库连接未建立")
+            return []
+        
+        return PaperModel.get_papers_by_domain(self.conn, domain)
+    
     def get_papers_by_year(self, year):
         """根据年份获取论文"""
         if not self.conn:
@@ -0,0 +1,115 @@
+import sqlite3
+import os
+import threading
+import logging
+from datetime import datetime
+from src.core.config import config_manager
+
+logger = logging.getLogger(__name__)
+
+class JobHistoryStore:
+    """定时任务执行历史：记录每次触发的计划时间、开始/结束时间、耗时和状态"""
+    
+    def __init__(self, db_path=None):
+        self.config = config_manager
+        self.db_path = db_path or self.config.get_database_path()
+        self._lock = threading.Lock()
+        
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self._create_table()
+    
+    def _create_table(self):
+        """创建任务历史表"""
+        with self._lock:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS job_runs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_name TEXT NOT NULL,
+                    scheduled_at TEXT,
+                    started_at TEXT,
+                    finished_at TEXT,
+                    duration_seconds REAL,
+                    status TEXT NOT NULL,  -- running / success / failed / skipped / coalesced / interrupted
+                    error TEXT
+                )
+            ''')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_job_runs_name ON job_runs(job_name, id)')
+            self.conn.commit()
+    
+    def start(self, job_name, scheduled_at):
+        """记录任务开始执行，返回记录ID"""
+        try:
+            with self._lock:
+                cursor = self.conn.execute('''
+                    INSERT INTO job_runs (job_name, scheduled_at, started_at, status)
+                    VALUES (?, ?, ?, 'running')
+                ''', (job_name, scheduled_at.isoformat() if scheduled_at else None, datetime.now().isoformat()))
+                self.conn.commit()
+                return cursor.lastrowid
+        except Exception as e:
+            logger.error(f"记录任务开始失败: {job_name} - {str(e)}")
+            return None
+    
+    def finish(self, run_id, status, duration, error=None):
+        """记录任务执行结束"""
+        if run_id is None:
+            return
+        try:
+            with self._lock:
+                self.conn.execute('''
+                    UPDATE job_runs
+                    SET finished_at = ?, duration_seconds = ?, status = ?, error = ?
+                    WHERE id = ?
+                ''', (datetime.now().isoformat(), round(duration, 3), status, error, run_id))
+                self.conn.commit()
+        except Exception as e:
+            logger.error(f"记录任务结束失败: {run_id} - {str(e)}")
+    
+    def record_trigger(self, job_name, scheduled_at, status):
+        """记录未执行的触发（因上一次仍在运行而跳过或合并）"""
+        try:
+            with self._lock:
+                self.conn.execute('''
+                    INSERT INTO job_runs (job_name, scheduled_at, status)
+                    VALUES (?, ?, ?)
+                ''', (job_name, scheduled_at.isoformat() if scheduled_at else None, status))
+                self.conn.commit()
+        except Exception as e:
+            logger.error(f"记录任务触发失败: {job_name} - {str(e)}")
+    
+    def get_recent(self, job_name=None, limit=20):
+        """获取最近的执行记录"""
+        with self._lock:
+            if job_name:
+                rows = self.conn.execute(
+                    'SELECT * FROM job_runs WHERE job_name = ? ORDER BY id DESC LIMIT ?', (job_name, limit)
+                ).fetchall()
+            else:
+                rows = self.conn.execute('SELECT * FROM job_runs ORDER BY id DESC LIMIT ?', (limit,)).fetchall()
+        return [dict(row) for row in rows]
+    
+    def mark_interrupted(self, run_ids=None):
+        """把仍为running的记录标记为interrupted：run_ids 为空时处理全部（进程异常退出时遗留的记录），否则只处理指定记录"""
+        try:
+            with self._lock:
+                if run_ids is None:
+                    self.conn.execute("UPDATE job_runs SET status = 'interrupted' WHERE status = 'running'")
+                else:
+                    self.conn.executemany(
+                        "UPDATE job_runs SET status = 'interrupted', finished_at = ? WHERE id = ? AND status = 'running'",
+                        [(datetime.now().isoformat(), run_id) for run_id in run_ids]
+                    )
+                self.conn.commit()
+        except Exception as e:
+            logger.error(f"更新任务历史失败: {str(e)}")
+    
+    def close(self):
+        """关闭连接"""
+        try:
+            self.conn.close()
+        except Exception as e:
+            logger.error(f"关闭任务历史连接失败: {str(e)}")
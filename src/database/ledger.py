@@ -0,0 +1,231 @@
+import sqlite3
+import json
+import os
+import time
+import threading
+import logging
+from src.core.config import config_manager
+from src.crawler.utils import canonical_paper_id
+
+logger = logging.getLogger(__name__)
+
+# 阶段顺序，台账中记录的是论文已完成的最后一个阶段
+LEDGER_STAGES = ["crawled", "downloaded", "parsed", "analyzed", "stored"]
+
+class PaperLedger:
+    """论文处理台账：按规范ID持久化每篇论文完成的阶段及产物，支持崩溃后续跑"""
+    
+    def __init__(self, db_path=None):
+        self.config = config_manager
+        self.db_path = db_path or self.config.get_database_path()
+        self.max_attempts = self.config.get("system.ledger.max_attempts", 3)
+        self._lock = threading.Lock()
+        
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self._create_table()
+    
+    def _create_table(self):
+        """创建台账表"""
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS paper_ledger (
+                    paper_key TEXT PRIMARY KEY,
+                    stage TEXT NOT NULL,
+                    paper TEXT,  -- JSON格式存储论文字典（含阶段产物）
+                    pdf_path TEXT,
+                    attempts INTEGER DEFAULT 0,
+                    last_error TEXT,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    lease_owner TEXT,  -- 持有租约的worker
+                    lease_expires REAL  -- 租约到期时间（Unix时间戳）
+                )
+            ''')
+            # 旧台账没有租约列时补充
+            columns = [row[1] for row in cursor.execute('PRAGMA table_info(paper_ledger)').fetchall()]
+            for column, column_type in (("lease_owner", "TEXT"), ("lease_expires", "REAL")):
+                if column not in columns:
+                    cursor.execute(f'ALTER TABLE paper_ledger ADD COLUMN {column} {column_type}')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_ledger_stage ON paper_ledger(stage)')
+            self.conn.commit()
+    
+    @staticmethod
+    def paper_key(paper):
+        """获取论文的台账键"""
+        return paper.get("paper_key") or canonical_paper_id(paper)
+    
+    @staticmethod
+    def stage_done(paper, stage):
+        """判断论文是否已完成指定阶段"""
+        current = paper.get("ledger_stage")
+        if current not in LEDGER_STAGES:
+            return False
+        return LEDGER_STAGES.index(current) >= LEDGER_STAGES.index(stage)
+    
+    def record(self, paper, stage):
+        """记录论文完成了某个阶段"""
+        paper["paper_key"] = self.paper_key(paper)
+        paper["ledger_stage"] = stage
+        
+        snapshot = dict(paper)
+        if stage == "stored":
+            # 已入库的论文全文保存在papers表中，台账不再保留
+            snapshot.pop("content", None)
+        
+        try:
+            with self._lock:
+                self.conn.execute('''
+                    INSERT INTO paper_ledger (paper_key, stage, paper, pdf_path, attempts, last_error, updated_at)
+                    VALUES (?, ?, ?, ?, 0, NULL, CURRENT_TIMESTAMP)
+                    ON CONFLICT(paper_key) DO UPDATE SET
+                        stage = excluded.stage,
+                        paper = excluded.paper,
+                        pdf_path = excluded.pdf_path,
+                        attempts = 0,
+                        last_error = NULL,
+                        updated_at = CURRENT_TIMESTAMP,
+                        lease_owner = NULL,
+                        lease_expires = NULL
+                ''', (paper["paper_key"], stage, json.dumps(snapshot, ensure_ascii=False), paper.get("pdf_path")))
+                self.conn.commit()
+        except Exception as e:
+            logger.error(f"记录台账失败: {paper.get('title')} - {str(e)}")
+    
+    def record_failure(self, paper, stage, error):
+        """记录某阶段失败，累计重试次数"""
+        try:
+            with self._lock:
+                self.conn.execute('''
+                    UPDATE paper_ledger
+                    SET attempts = attempts + 1, last_error = ?, updated_at = CURRENT_TIMESTAMP,
+                        lease_owner = NULL, lease_expires = NULL
+                    WHERE paper_key = ?
+                ''', (f"{stage}: {error}", self.paper_key(paper)))
+                self.conn.commit()
+        except Exception as e:
+            logger.error(f"记录台账失败: {paper.get('title')} - {str(e)}")
+    
+    def get_stage(self, paper):
+        """获取论文在台账中的阶段，不存在时返回None"""
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT stage FROM paper_ledger WHERE paper_key = ?', (self.paper_key(paper),)
+            ).fetchone()
+        return row["stage"] if row else None
+    
+    def get_unfinished(self):
+        """获取尚未入库、未超过重试上限且未被worker租用的论文"""
+        with self._lock:
+            rows = self.conn.execute('''
+                SELECT paper FROM paper_ledger
+                WHERE stage != 'stored' AND attempts < ?
+                AND (lease_expires IS NULL OR lease_expires < ?)
+                ORDER BY updated_at
+            ''', (self.max_attempts, time.time())).fetchall()
+        
+        papers = []
+        for row in rows:
+            try:
+                papers.append(json.loads(row["paper"]))
+            except Exception:
+                continue
+        return papers
+    
+    def get_pending_papers(self):
+        """获取所有尚未入库的论文（含超过重试上限的），用于身份解析"""
+        with self._lock:
+            rows = self.conn.execute("SELECT paper FROM paper_ledger WHERE stage != 'stored'").fetchall()
+        
+        papers = []
+        for row in rows:
+            try:
+                papers.append(json.loads(row["paper"]))
+            except Exception:
+                continue
+        return papers
+    
+    def claim(self, stage, owner, limit, lease_seconds):
+        """领取一批处于指定阶段、租约空闲或已过期的论文，并设置租约"""
+        now = time.time()
+        with self._lock:
+            try:
+                # 立即获取写锁，同一主机上的多个进程不会领取到同一篇论文（网络文件系统上的SQLite锁不可靠，不保证跨主机互斥）
+                self.conn.execute('BEGIN IMMEDIATE')
+                rows = self.conn.execute('''
+                    SELECT paper_key, paper FROM paper_ledger
+                    WHERE stage = ? AND attempts < ?
+                    AND (lease_expires IS NULL OR lease_expires < ?)
+                    ORDER BY updated_at
+                    LIMIT ?
+                ''', (stage, self.max_attempts, now, limit)).fetchall()
+                self.conn.executemany(
+                    'UPDATE paper_ledger SET lease_owner = ?, lease_expires = ? WHERE paper_key = ?',
+                    [(owner, now + lease_seconds, row["paper_key"]) for row in rows]
+                )
+                self.conn.commit()
+            except Exception as e:
+                self.conn.rollback()
+                logger.error(f"领取论文失败: {str(e)}")
+                return []
+        
+        papers = []
+        for row in rows:
+            try:
+                papers.append(json.loads(row["paper"]))
+            except Exception:
+                continue
+        return papers
+    
+    def renew_leases(self, owner, lease_seconds):
+        """续租worker持有的全部租约（心跳），返回续租的论文数"""
+        try:
+            with self._lock:
+                cursor = self.conn.execute(
+                    'UPDATE paper_ledger SET lease_expires = ? WHERE lease_owner = ?',
+                    (time.time() + lease_seconds, owner)
+                )
+                self.conn.commit()
+                return cursor.rowcount
+        except Exception as e:
+            logger.error(f"续租失败: {owner} - {str(e)}")
+            return 0
+    
+    def release(self, paper, owner):
+        """释放论文的租约（只释放自己持有的）"""
+        try:
+            with self._lock:
+                self.conn.execute(
+                    'UPDATE paper_ledger SET lease_owner = NULL, lease_expires = NULL WHERE paper_key = ? AND lease_owner = ?',
+                    (self.paper_key(paper), owner)
+                )
+                self.conn.commit()
+        except Exception as e:
+            logger.error(f"释放租约失败: {paper.get('title')} - {str(e)}")
+    
+    def release_all(self, owner):
+        """释放worker持有的全部租约"""
+        try:
+            with self._lock:
+                self.conn.execute(
+                    'UPDATE paper_ledger SET lease_owner = NULL, lease_expires = NULL WHERE lease_owner = ?', (owner,)
+                )
+                self.conn.commit()
+        except Exception as e:
+            logger.error(f"释放租约失败: {owner} - {str(e)}")
+    
+    def get_stage_counts(self):
+        """获取各阶段的论文数量"""
+        with self._lock:
+            rows = self.conn.execute('SELECT stage, COUNT(*) FROM paper_ledger GROUP BY stage').fetchall()
+        return {row[0]: row[1] for row in rows}
+    
+    def close(self):
+        """关闭台账连接"""
+        try:
+            self.conn.close()
+        except Exception as e:
+            logger.error(f"关闭台账连接失败: {str(e)}")
@@ -38,7 +38,23 @@ class PaperModel:
                     is_open_source INTEGER,  -- 0或1
                     llm_extract_time TEXT,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    paper_key TEXT  -- 论文规范ID，与台账和领域标签关联
+                )
+            ''')
+            
+            # 旧数据库没有paper_key列时补充（新增列追加在末尾，与建表顺序一致）
+            columns = [row[1] for row in cursor.execute('PRAGMA table_info(papers)').fetchall()]
+            if 'paper_key' not in columns:
+                cursor.execute('ALTER TABLE papers ADD COLUMN paper_key TEXT')
+            
+            # 论文所属领域（多领域运行时同一论文可属于多个领域）
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS paper_domains (
+                    paper_key TEXT NOT NULL,
+                    domain TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (paper_key, domain)
                 )
             ''')
             
@@ -48,6 +64,8 @@ class PaperModel:
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_papers_source ON papers(source)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_papers_arxiv_id ON papers(arxiv_id)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_papers_doi ON papers(doi)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_papers_paper_key ON papers(paper_key)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_paper_domains_domain ON paper_domains(domain)')
             
             conn.commit()
             logger.info("论文表创建成功")
@@ -84,21 +102,26 @@ class PaperModel:
                 'experimental_results': paper.get('experimental_results'),
                 'limitations': paper.get('limitations'),
                 'is_open_source': 1 if paper.get('is_open_source') else 0,
-                'llm_extract_time': paper.get('llm_extract_time')
+                'llm_extract_time': paper.get('llm_extract_time'),
+                'paper_key': paper.get('paper_key')
             }
             
+            # arXiv新版本替换同一规范ID的旧记录（与插入在同一事务中）
+            if paper.get('revised') and data['paper_key']:
+                cursor.execute('DELETE FROM papers WHERE paper_key = ?', (data['paper_key'],))
+            
             # 执行插入
             cursor.execute('''
                 INSERT INTO papers (
                     title, authors, summary, publish_year, source, arxiv_id, pdf_url, html_url,
                     categories, doi, primary_category, venue, citations, pdf_path, content,
                     research_problem, method_summary, innovation, experimental_results, limitations,
-                    is_open_source, llm_extract_time
+                    is_open_source, llm_extract_time, paper_key
                 ) VALUES (
                     :title, :authors, :summary, :publish_year, :source, :arxiv_id, :pdf_url, :html_url,
                     :categories, :doi, :primary_category, :venue, :citations, :pdf_path, :content,
                     :research_problem, :method_summary, :innovation, :experimental_results, :limitations,
-                    :is_open_source, :llm_extract_time
+                    :is_open_source, :llm_extract_time, :paper_key
                 )
             ''', data)
             
@@ -138,6 +161,71 @@ class PaperModel:
             logger.error(f"获取所有论文失败: {str(e)}")
             return []
     
+    @staticmethod
+    def get_identity_records(conn):
+        """获取身份解析所需的字段（不读取全文）"""
+        try:
+            cursor = conn.cursor()
+            cursor.execute('SELECT id, paper_key, title, authors, doi, arxiv_id, publish_year FROM papers')
+            records = []
+            for row in cursor.fetchall():
+                record = dict(zip(['id', 'paper_key', 'title', 'authors', 'doi', 'arxiv_id', 'publish_year'], row))
+                try:
+                    record['authors'] = json.loads(record['authors']) if record['authors'] else []
+                except Exception:
+                    record['authors'] = []
+                records.append(record)
+            return records
+        except Exception as e:
+            logger.error(f"获取论文身份信息失败: {str(e)}")
+            return []
+    
+    @staticmethod
+    def update_paper_keys(conn, updates):
+        """批量写入论文规范ID，updates为 (paper_key, id) 列表"""
+        try:
+            cursor = conn.cursor()
+            cursor.executemany('UPDATE papers SET paper_key = ? WHERE id = ?', updates)
+            conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"更新论文规范ID失败: {str(e)}")
+            conn.rollback()
+            return False
+    
+    @staticmethod
+    def add_paper_domains(conn, paper_key, domains):
+        """为论文添加领域标签"""
+        try:
+            cursor = conn.cursor()
+            cursor.executemany(
+                'INSERT OR IGNORE INTO paper_domains (paper_key, domain) VALUES (?, ?)',
+                [(paper_key, domain) for domain in domains]
+            )
+            conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"添加领域标签失败: {str(e)}")
+            conn.rollback()
+            return False
+    
+    @staticmethod
+    def get_papers_by_domain(conn, domain):
+        """获取属于某个领域的论文"""
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT papers.* FROM papers
+                JOIN paper_domains ON paper_domains.paper_key = papers.paper_key
+                WHERE paper_domains.domain = ?
+            ''', (domain,))
+            rows = cursor.fetchall()
+            papers = [PaperModel._row_to_dict(row) for row in rows]
+            return papers
+        except Exception as e:
+            logger.error(f"根据领域获取论文失败: {str(e)}")
+            return []
+    
     @staticmethod
     def update_pdf_path(conn, paper_id, pdf_path):
         """更新PDF路径"""
@@ -159,7 +247,7 @@ class PaperModel:
             'id', 'title', 'authors', 'summary', 'publish_year', 'source', 'arxiv_id', 'pdf_url',
             'html_url', 'categories', 'doi', 'primary_category', 'venue', 'citations', 'pdf_path',
             'content', 'research_problem', 'method_summary', 'innovation', 'experimental_results',
-            'limitations', 'is_open_source', 'llm_extract_time', 'created_at', 'updated_at'
+            'limitations', 'is_open_source', 'llm_extract_time', 'created_at', 'updated_at', 'paper_key'
         ]
         
         paper = dict(zip(columns, row))
@@ -2,11 +2,23 @@ import os
 import logging
 import json
 import random
+import threading
 from src.core.config import config_manager
+from src.core.cache import get_artifact_cache
+from src.core.replay import get_recorder
 from .prompts import PromptManager
 
 logger = logging.getLogger(__name__)
 
+# 分析提示词或SPO优化方式变化时递增，使旧的分析缓存失效
+ANALYSIS_PROMPT_VERSION = "1"
+
+def _model_id(config, model_type):
+    """模型标识，作为分析缓存键和LLM调用录制键的一部分，换模型后不会使用旧模型的输出"""
+    if model_type == "local":
+        return f"local:{config.get('llm.local.model_path', '')}"
+    return f"api:{config.get('llm.api.api_type', '')}:{config.get('llm.api.model_name', '')}"
+
 class SPOptimizer:
     """Self-Play Optimization 提示词优化器"""
     
@@ -18,7 +30,7 @@ class SPOptimizer:
         self.evaluation_model_type = self.config.get("llm.spo.evaluation_model", "local")
         self.optimizer_model_type = self.config.get("llm.spo.optimizer_model", "api")
         self.prompt_manager = PromptManager()
-        
+    
     def optimize_prompt(self, initial_prompt, sample_texts):
         """优化提示词"""
         if not self.spo_enabled:
@@ -60,9 +72,10 @@ class SPOptimizer:
     def _get_model(self, model_type):
         """获取模型实例"""
         if model_type == "local":
-            return LocalLLMModel()
+            model = LocalLLMModel()
         else:
-            return APILocalModel()
+            model = APILocalModel()
+        return get_recorder().wrap_model(model, _model_id(self.config, model_type))
     
     def _generate_candidate_prompt(self, model, current_prompt):
         """生成候选提示词"""
@@ -80,7 +93,7 @@ class SPOptimizer:
 
 请直接输出改进后的完整提示词，不要添加任何解释或注释。
 """
-        
+
         response = model.generate(prompt)
         return response.strip()
     
@@ -119,8 +132,13 @@ class LLMAnalyzer:
         self.prompt_manager = PromptManager()
         self.model_type = self.config.get("llm.model_type", "local")
         self.spo_optimizer = SPOptimizer()
-        self.model = self._initialize_model()
+        # LLM调用经过录制/回放层
+        self.model = get_recorder().wrap_model(self._initialize_model(), self._model_id())
         self.optimized_prompt = None
+        # 缓存键使用基础提示词模板（而不是每次运行由LLM重新生成的优化提示词），重复运行时可命中缓存
+        self.prompt_template = self.prompt_manager.get_paper_analysis_prompt("{extracted_text}")
+        # 多个分析线程共享同一个分析器时，提示词优化只执行一次
+        self._prompt_lock = threading.Lock()
     
     def _initialize_model(self):
         """初始化LLM模型"""
@@ -143,12 +161,24 @@ class LLMAnalyzer:
     def analyze(self, text):
         """使用LLM分析论文内容"""
         try:
+            # 按模型、基础提示词模板及版本、是否启用SPO和文本哈希查找缓存；全部命中时不进行提示词优化，也不调用LLM
+            cache = get_artifact_cache()
+            cache_key = cache.make_key(
+                self._model_id(), ANALYSIS_PROMPT_VERSION, self.prompt_template, self.spo_optimizer.spo_enabled, text
+            )
+            cached = cache.get_json("llm_analysis", cache_key)
+            if cached:
+                logger.info("使用缓存的LLM分析结果")
+                return cached
+            
             # 获取提示词
             if not self.optimized_prompt:
-                # 首次运行，优化提示词
-                initial_prompt = self.prompt_manager.get_paper_analysis_prompt("示例文本")
-                # 使用当前文本作为样本进行优化
-                self.optimized_prompt = self.spo_optimizer.optimize_prompt(initial_prompt, [text])
+                with self._prompt_lock:
+                    if not self.optimized_prompt:
+                        # 首次未命中缓存时优化提示词
+                        initial_prompt = self.prompt_manager.get_paper_analysis_prompt("示例文本")
+                        # 使用当前文本作为样本进行优化
+                        self.optimized_prompt = self.spo_optimizer.optimize_prompt(initial_prompt, [text])
             
             # 使用优化后的提示词
             prompt = self.optimized_prompt.replace("{extracted_text}", text)
@@ -158,12 +188,18 @@ class LLMAnalyzer:
             
             # 解析响应
             analysis = self._parse_response(response)
+            if analysis:
+                cache.put_json("llm_analysis", cache_key, analysis)
             
             return analysis
         except Exception as e:
             logger.error(f"LLM分析失败: {str(e)}")
             return None
     
+    def _model_id(self):
+        """模型标识，作为分析缓存键的一部分"""
+        return _model_id(self.config, self.model_type)
+    
     def _parse_response(self, response):
         """解析LLM响应"""
         try:
@@ -1,9 +1,20 @@
-from .downloader import PDFDownloader
-from .manager import PDFManager
-from .parser import PDFParser
+import importlib
+
+# 延迟导入：PyMuPDF 只在解析PDF时加载
+_LAZY_ATTRS = {
+    "PDFDownloader": ".downloader",
+    "PDFManager": ".manager",
+    "PDFParser": ".parser"
+}
 
 __all__ = [
     "PDFDownloader",
     "PDFManager",
     "PDFParser"
 ]
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        module = importlib.import_module(_LAZY_ATTRS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,8 +1,11 @@
 import os
-import requests
+import json
+import time
+import asyncio
+import hashlib
 import logging
 from src.core.config import config_manager
-from src.crawler.utils import RequestHandler
+from src.crawler.utils import RequestHandler, strip_arxiv_version
 
 logger = logging.getLogger(__name__)
 
@@ -12,39 +15,32 @@ class PDFDownloader:
         self.storage_path = self.config.get_pdf_storage_path()
         self.timeout = self.config.get("pdf.timeout", 30)
         self.max_retries = self.config.get("pdf.max_retries", 3)
+        # 流式下载每次读取的块大小，单个下载的内存占用与PDF大小无关
+        self.chunk_size = self.config.get("pdf.chunk_size_kb", 256) * 1024
+        # 已存在的文件按记录的大小和SHA-256校验，不一致时重新下载
+        self.verify_existing = self.config.get("pdf.verify_existing", True)
+        # 超过该时间未更新的临时文件（不再重试的地址留下的 .part）在启动时清理
+        self.part_ttl_hours = self.config.get("pdf.part_ttl_hours", 72)
         self.request_handler = RequestHandler()
+        self._sweep_orphans()
     
     def download(self, paper):
-        """下载PDF文件"""
+        """下载PDF文件，本次实际传输的字节数写入 paper["download_bytes"]（已存在的文件和续传前已有的部分不计）"""
+        transfer = {"bytes": 0}
         try:
             # 生成存储路径
             pdf_path = self._generate_pdf_path(paper)
             
-            # 检查文件是否已存在
-            if os.path.exists(pdf_path):
+            # 检查文件是否已完整存在（arXiv发布新版本时重新下载覆盖）
+            if not paper.get("revised") and self._is_complete(pdf_path):
                 logger.info(f"PDF文件已存在: {pdf_path}")
                 return pdf_path
             
-            # 尝试从不同来源下载
-            # 1. 从arXiv下载
-            if paper.get("source") == "arXiv" and paper.get("pdf_url"):
-                if self._download_from_url(paper["pdf_url"], pdf_path):
+            # 按顺序尝试不同来源下载
+            for kind, target in self._candidate_sources(paper):
+                if kind == "url" and self._download_from_url(target, pdf_path, transfer):
                     return pdf_path
-            
-            # 2. 从其他PDF URL下载
-            if paper.get("pdf_url") and paper.get("source") != "arXiv":
-                if self._download_from_url(paper["pdf_url"], pdf_path):
-                    return pdf_path
-            
-            # 3. 尝试从DOI获取（如果有）
-            if paper.get("doi"):
-                doi_url = f"https://doi.org/{paper['doi']}"
-                if self._download_from_url(doi_url, pdf_path):
-                    return pdf_path
-            
-            # 4. 尝试从Unpaywall获取（开放获取）
-            if paper.get("doi"):
-                if self._download_from_unpaywall(paper["doi"], pdf_path):
+                if kind == "unpaywall" and self._download_from_unpaywall(target, pdf_path, transfer):
                     return pdf_path
             
             logger.warning(f"无法下载PDF: {paper.get('title')}")
@@ -52,48 +48,156 @@ class PDFDownloader:
         except Exception as e:
             logger.error(f"下载PDF失败: {str(e)}")
             return None
+        finally:
+            paper["download_bytes"] = transfer["bytes"]
     
-    def _download_from_url(self, url, pdf_path):
-        """从URL下载PDF"""
+    async def download_async(self, paper, client):
+        """使用异步请求处理器下载PDF文件（供异步执行器使用），来源顺序与 download 相同"""
+        transfer = {"bytes": 0}
         try:
-            logger.info(f"从URL下载PDF: {url}")
-            
-            # 发送请求
-            response = self.request_handler.get(url, timeout=self.timeout)
-            
-            # 检查响应内容类型
-            content_type = response.headers.get("Content-Type", "")
-            if "pdf" not in content_type.lower():
-                logger.warning(f"响应不是PDF: {content_type}")
-                return False
+            pdf_path = self._generate_pdf_path(paper)
+            if not paper.get("revised") and self._is_complete(pdf_path):
+                logger.info(f"PDF文件已存在: {pdf_path}")
+                return pdf_path
             
-            # 保存文件
-            with open(pdf_path, "wb") as f:
-                f.write(response.content)
+            for kind, target in self._candidate_sources(paper):
+                if kind == "url" and await self._download_from_url_async(client, target, pdf_path, transfer):
+                    return pdf_path
+                if kind == "unpaywall" and await self._download_from_unpaywall_async(client, target, pdf_path, transfer):
+                    return pdf_path
             
-            logger.info(f"PDF下载成功: {pdf_path}")
-            return True
+            logger.warning(f"无法下载PDF: {paper.get('title')}")
+            return None
         except Exception as e:
-            logger.error(f"从URL下载失败: {str(e)}")
+            logger.error(f"下载PDF失败: {str(e)}")
+            return None
+        finally:
+            paper["download_bytes"] = transfer["bytes"]
+    
+    def _candidate_sources(self, paper):
+        """按优先级列出下载来源：("url", PDF地址) 或 ("unpaywall", DOI)"""
+        sources = []
+        # 1. 从arXiv或其他PDF URL下载
+        if paper.get("pdf_url"):
+            sources.append(("url", paper["pdf_url"]))
+        if paper.get("doi"):
+            # 2. 尝试从DOI获取
+            sources.append(("url", f"https://doi.org/{paper['doi']}"))
+            # 3. 尝试从Unpaywall获取（开放获取）
+            sources.append(("unpaywall", paper["doi"]))
+        return sources
+    
+    def _download_from_url(self, url, pdf_path, transfer=None):
+        """从URL流式下载PDF：分块写入临时文件，中断后用Range请求续传，校验通过后原子替换为正式文件；transfer["bytes"] 累计实际传输的字节数"""
+        logger.info(f"从URL下载PDF: {url}")
+        part = PartialDownload(pdf_path, url, transfer)
+        for i in range(self.max_retries):
+            offset = part.offset()
+            try:
+                with self.request_handler.stream(url, headers=_range_header(offset), timeout=self.timeout) as response:
+                    total = part.begin(response, offset)
+                    if total is False:
+                        return False
+                    # 416表示临时文件已是完整文件，响应体是错误信息，不写入
+                    if total is not ALREADY_COMPLETE:
+                        for chunk in response.iter_content(self.chunk_size):
+                            part.write(chunk)
+                return part.finish(url, total)
+            except NotPDFError as e:
+                logger.warning(f"{str(e)}: {url}")
+                return False
+            except Exception as e:
+                part.close()
+                logger.warning(f"PDF下载中断 ({i+1}/{self.max_retries}): {url} - {str(e) or type(e).__name__}")
+                if i < self.max_retries - 1:
+                    # 推迟该主机的下一个请求，续传请求在主机队列中等待
+                    self.request_handler.scheduler.defer(url, 2 ** i)
+        logger.error(f"从URL下载失败: {url}")
+        return False
+    
+    async def _download_from_url_async(self, client, url, pdf_path, transfer=None):
+        """从URL异步流式下载PDF，续传和校验与 _download_from_url 相同"""
+        logger.info(f"从URL下载PDF: {url}")
+        part = PartialDownload(pdf_path, url, transfer)
+        for i in range(self.max_retries):
+            offset = part.offset()
+            try:
+                async with client.stream(url, headers=_range_header(offset), timeout=self.timeout) as response:
+                    total = part.begin(response, offset)
+                    if total is False:
+                        return False
+                    if total is not ALREADY_COMPLETE:
+                        async for chunk in response.iter_chunks(self.chunk_size):
+                            part.write(chunk)
+                return part.finish(url, total)
+            except NotPDFError as e:
+                logger.warning(f"{str(e)}: {url}")
+                return False
+            except Exception as e:
+                part.close()
+                logger.warning(f"PDF下载中断 ({i+1}/{self.max_retries}): {url} - {str(e) or type(e).__name__}")
+                if i < self.max_retries - 1:
+                    if client.scheduler is not None:
+                        client.scheduler.defer(url, 2 ** i)
+                    else:
+                        await asyncio.sleep(2 ** i)
+        logger.error(f"从URL下载失败: {url}")
+        return False
+    
+    def _is_complete(self, pdf_path):
+        """已有文件是否完整：按下载时记录的大小和SHA-256校验；没有记录的旧文件检查PDF头尾标记，不完整的文件删除"""
+        if not os.path.exists(pdf_path):
             return False
+        meta = _load_meta(pdf_path)
+        if meta is not None:
+            valid = os.path.getsize(pdf_path) == meta.get("size") and (
+                not self.verify_existing or _file_sha256(pdf_path) == meta.get("sha256")
+            )
+        else:
+            valid = _looks_complete(pdf_path)
+        if valid:
+            logger.info(f"PDF文件已存在: {pdf_path}")
+            return True
+        logger.warning(f"PDF文件不完整或已损坏，重新下载: {pdf_path}")
+        os.remove(pdf_path)
+        return False
+    
+    def _sweep_orphans(self):
+        """清理存储目录中超过有效期的 .part 临时文件，以及对应PDF已不存在的校验信息文件"""
+        if not self.part_ttl_hours or not os.path.isdir(self.storage_path):
+            return
+        cutoff = time.time() - self.part_ttl_hours * 3600
+        removed = 0
+        try:
+            for entry in os.scandir(self.storage_path):
+                if not entry.is_file():
+                    continue
+                if entry.name.endswith(".part") or entry.name.endswith(".meta.json.tmp"):
+                    orphan = entry.stat().st_mtime < cutoff
+                elif entry.name.endswith(".meta.json"):
+                    orphan = not os.path.exists(entry.path[:-len(".meta.json")])
+                else:
+                    continue
+                if orphan:
+                    os.remove(entry.path)
+                    removed += 1
+        except OSError as e:
+            logger.warning(f"清理PDF临时文件失败: {str(e)}")
+        if removed:
+            logger.info(f"清理了 {removed} 个过期的PDF临时文件")
     
-    def _download_from_unpaywall(self, doi, pdf_path):
+    def _download_from_unpaywall(self, doi, pdf_path, transfer=None):
         """从Unpaywall获取开放获取的PDF"""
         try:
             logger.info(f"从Unpaywall获取PDF: {doi}")
             
-            # 构建Unpaywall API URL
-            unpaywall_url = f"https://api.unpaywall.org/v2/{doi}?email=your-email@example.com"
-            
             # 发送请求
-            response = self.request_handler.get(unpaywall_url, timeout=self.timeout)
-            data = response.json()
+            response = self.request_handler.get(self._unpaywall_url(doi), timeout=self.timeout)
             
             # 检查是否有开放获取的PDF
-            if data.get("is_oa") and data.get("best_oa_location"):
-                pdf_url = data["best_oa_location"].get("url_for_pdf")
-                if pdf_url:
-                    return self._download_from_url(pdf_url, pdf_path)
+            pdf_url = self._unpaywall_pdf_url(response.json())
+            if pdf_url:
+                return self._download_from_url(pdf_url, pdf_path, transfer)
             
             logger.info(f"Unpaywall没有找到开放获取的PDF: {doi}")
             return False
@@ -101,12 +205,37 @@ class PDFDownloader:
             logger.error(f"从Unpaywall获取失败: {str(e)}")
             return False
     
+    async def _download_from_unpaywall_async(self, client, doi, pdf_path, transfer=None):
+        """从Unpaywall异步获取开放获取的PDF"""
+        try:
+            logger.info(f"从Unpaywall获取PDF: {doi}")
+            response = await client.get(self._unpaywall_url(doi), timeout=self.timeout)
+            pdf_url = self._unpaywall_pdf_url(response.json())
+            if pdf_url:
+                return await self._download_from_url_async(client, pdf_url, pdf_path, transfer)
+            
+            logger.info(f"Unpaywall没有找到开放获取的PDF: {doi}")
+            return False
+        except Exception as e:
+            logger.error(f"从Unpaywall获取失败: {str(e) or type(e).__name__}")
+            return False
+    
+    def _unpaywall_url(self, doi):
+        """构建Unpaywall API URL"""
+        return f"https://api.unpaywall.org/v2/{doi}?email=your-email@example.com"
+    
+    def _unpaywall_pdf_url(self, data):
+        """从Unpaywall响应中取开放获取的PDF地址"""
+        if data.get("is_oa") and data.get("best_oa_location"):
+            return data["best_oa_location"].get("url_for_pdf")
+        return None
+    
     def _generate_pdf_path(self, paper):
         """生成PDF存储路径"""
         # 生成文件名
         if paper.get("arxiv_id"):
-            # arXiv论文使用arXiv ID作为文件名
-            filename = f"{paper['arxiv_id']}.pdf"
+            # arXiv论文使用去版本的arXiv ID作为文件名，新版本覆盖旧版本的文件
+            filename = f"{strip_arxiv_version(paper['arxiv_id'])}.pdf"
         else:
             # 其他论文使用标题的简化版本
             title = paper.get("title", "")
@@ -119,3 +248,180 @@ class PDFDownloader:
         pdf_path = os.path.join(self.storage_path, filename)
         
         return pdf_path
+
+# PartialDownload.begin 的返回值：续传请求返回416，临时文件已完整，跳过响应体直接校验
+ALREADY_COMPLETE = object()
+
+class NotPDFError(ValueError):
+    """响应内容不是PDF（不重试）"""
+
+class PartialDownload:
+    """下载中的临时文件（.part）：支持续传并增量计算SHA-256，完成后校验PDF头和大小，原子替换为正式文件后再记录校验信息"""
+    
+    def __init__(self, pdf_path, url, transfer=None):
+        self.pdf_path = pdf_path
+        # 累计通过网络收到的字节数（续传前已有的部分不计）
+        self.transfer = transfer if transfer is not None else {"bytes": 0}
+        # 临时文件名包含下载地址的哈希，不同地址（如arXiv的不同版本）的数据不会拼接在一起
+        self.part_path = f"{pdf_path}.{hashlib.sha1(url.encode('utf-8')).hexdigest()[:8]}.part"
+        self.handle = None
+        self.hasher = None
+        self.size = 0
+        # 416响应中的总大小
+        self.total = None
+    
+    def offset(self):
+        """已下载的字节数（续传起点）"""
+        return os.path.getsize(self.part_path) if os.path.exists(self.part_path) else 0
+    
+    def begin(self, response, offset):
+        """按响应决定续传或重新下载并打开临时文件，返回预期的总大小（未知时为None）；已下载完整时返回 ALREADY_COMPLETE，不是可下载的PDF时返回False"""
+        status = response.status_code
+        if status == 416 and offset:
+            # 已下载的部分即为完整文件，记录总大小后由 finish 直接校验
+            self._open(resume=True)
+            self.total = _content_range_total(response.headers.get("Content-Range"))
+            return ALREADY_COMPLETE
+        if 400 <= status < 500:
+            logger.warning(f"PDF请求失败: {status} {response.url}")
+            return False
+        if status >= 400:
+            raise IOError(f"{status} Error for url: {response.url}")
+        
+        content_type = response.headers.get("Content-Type", "")
+        if "pdf" not in content_type.lower():
+            logger.warning(f"响应不是PDF: {content_type}")
+            return False
+        
+        if status == 206:
+            start, total = _content_range(response.headers.get("Content-Range"))
+            if start != offset:
+                # 服务端返回的范围与续传起点不一致，丢弃临时文件后重新下载
+                self.discard()
+                raise IOError(f"续传范围不一致: {response.headers.get('Content-Range')}")
+            self._open(resume=True)
+            logger.info(f"从 {offset} 字节处续传PDF: {response.url}")
+            return total
+        # 服务端不支持Range时从头下载
+        self._open(resume=False)
+        length = response.headers.get("Content-Length")
+        if length and length.isdigit() and not response.headers.get("Content-Encoding"):
+            return int(length)
+        return None
+    
+    def write(self, chunk):
+        """写入一块数据，文件开头不是PDF标记时中止"""
+        if not chunk:
+            return
+        if self.size == 0 and not chunk.startswith(b"%PDF"[:len(chunk)]):
+            self.discard()
+            raise NotPDFError("响应内容不是PDF")
+        self.handle.write(chunk)
+        self.hasher.update(chunk)
+        self.size += len(chunk)
+        self.transfer["bytes"] += len(chunk)
+    
+    def finish(self, url, total):
+        """传输结束：大小不足时抛出异常以便续传，校验通过后替换正式文件，返回是否成功"""
+        self.close()
+        if total is ALREADY_COMPLETE:
+            total = self.total
+        if total is not None and self.size < total:
+            raise IOError(f"连接提前关闭: {self.size}/{total} 字节")
+        # 总大小已知时按大小校验，未知时检查结尾的 %%EOF 标记
+        complete = self.size == total if total is not None else _looks_complete(self.part_path)
+        if not complete or not _has_pdf_header(self.part_path):
+            logger.warning(f"下载的PDF不完整或已损坏: {url}")
+            self.discard()
+            return False
+        # 先删除旧文件的校验信息再替换，新的校验信息在替换后写入：中途崩溃时正式文件没有校验信息（按旧文件检查），不会与过期的校验信息配对
+        meta_path = _meta_path(self.pdf_path)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        os.replace(self.part_path, self.pdf_path)
+        meta = {"size": self.size, "sha256": self.hasher.hexdigest(), "url": url, "downloaded_at": time.time()}
+        with open(f"{meta_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(f"{meta_path}.tmp", meta_path)
+        logger.info(f"PDF下载成功: {self.pdf_path} ({self.size} 字节)")
+        return True
+    
+    def close(self):
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+    
+    def discard(self):
+        """删除临时文件"""
+        self.close()
+        if os.path.exists(self.part_path):
+            os.remove(self.part_path)
+        self.size = 0
+    
+    def _open(self, resume):
+        """打开临时文件：续传时先对已有部分分块计算校验和再追加，否则清空"""
+        self.close()
+        os.makedirs(os.path.dirname(self.part_path) or ".", exist_ok=True)
+        self.hasher = hashlib.sha256()
+        self.size = 0
+        if resume and os.path.exists(self.part_path):
+            with open(self.part_path, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    self.hasher.update(block)
+                    self.size += len(block)
+            self.handle = open(self.part_path, "ab")
+        else:
+            self.handle = open(self.part_path, "wb")
+
+def _range_header(offset):
+    """续传请求头"""
+    return {"Range": f"bytes={offset}-"} if offset else None
+
+def _content_range(value):
+    """解析 Content-Range（如 bytes 100-199/1000），返回 (起始位置, 总大小)，总大小未知时为None"""
+    try:
+        unit_range, _, total = (value or "").partition("/")
+        start = int(unit_range.split()[-1].split("-")[0])
+        return start, int(total) if total.isdigit() else None
+    except (ValueError, IndexError):
+        return None, None
+
+def _content_range_total(value):
+    """416响应的 Content-Range（如 bytes */1000）中的总大小"""
+    total = (value or "").rpartition("/")[2]
+    return int(total) if total.isdigit() else None
+
+def _meta_path(pdf_path):
+    """校验信息文件路径"""
+    return f"{pdf_path}.meta.json"
+
+def _load_meta(pdf_path):
+    try:
+        with open(_meta_path(pdf_path), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _file_sha256(path):
+    """分块计算文件的SHA-256"""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+def _has_pdf_header(path):
+    """文件是否以 %PDF 开头"""
+    with open(path, "rb") as f:
+        return f.read(4) == b"%PDF"
+
+def _looks_complete(path):
+    """文件以 %PDF 开头，且末尾1KB内有 %%EOF 标记（截断的文件通常没有）"""
+    try:
+        with open(path, "rb") as f:
+            if f.read(4) != b"%PDF":
+                return False
+            f.seek(max(0, os.path.getsize(path) - 1024))
+            return b"%%EOF" in f.read()
+    except OSError:
+        return False
@@ -1,16 +1,74 @@
 import os
-import requests
+import time
+import asyncio
 import logging
-import fitz  # PyMuPDF
 from src.core.config import config_manager
+from src.core.cache import get_artifact_cache
+from src.core.replay import get_recorder
 
 logger = logging.getLogger(__name__)
 
+# 解析逻辑变化时递增，使旧的解析缓存失效
+PARSER_VERSION = "2"
+
+# 异步解析时Grobid可用性检查结果的有效期（秒），避免同时进行的大量请求各自检查
+GROBID_ALIVE_TTL = 60
+
+def extract_text_with_pymupdf(pdf_path):
+    """使用PyMuPDF提取文本（模块级函数，可提交到进程池执行）"""
+    import fitz  # PyMuPDF
+    # 打开PDF文件
+    doc = fitz.open(pdf_path)
+    
+    # 提取文本
+    text_parts = []
+    
+    # 提取标题（通常在第一页）
+    if doc.page_count > 0:
+        first_page = doc[0]
+        title_text = first_page.get_text("text")
+        # 取前几行作为标题
+        title_lines = title_text.strip().split('\n')[:3]
+        title = ' '.join(title_lines)
+        text_parts.append(f"Title: {title}")
+    
+    # 提取摘要（通常在标题之后）
+    if doc.page_count > 0:
+        first_page = doc[0]
+        abstract_text = first_page.get_text("text")
+        # 简单处理，假设摘要在标题之后
+        text_parts.append(f"Abstract: {abstract_text}")
+    
+    # 提取正文
+    body_text = []
+    for page_num in range(doc.page_count):
+        page = doc[page_num]
+        text = page.get_text("text")
+        body_text.append(text)
+    
+    text_parts.append('\n'.join(body_text))
+    
+    # 关闭文档
+    doc.close()
+    
+    # 组合内容
+    return '\n\n'.join(text_parts)
+
+def _cache_key(cache, pdf_path, parser):
+    """解析缓存键：PDF内容哈希、实际使用的解析器和解析器版本"""
+    return cache.make_key(cache.file_hash(pdf_path), parser, PARSER_VERSION)
+
 class PDFParser:
-    def __init__(self):
+    def __init__(self, process_pool=None):
         self.config = config_manager
         self.grobid_url = self.config.get("pdf_parsing.grobid_url", "http://localhost:8070")
         self.default_parser = self.config.get("pdf_parsing.default_parser", "grobid")
+        # 可选的进程池，PyMuPDF解析是CPU密集型，放到子进程中执行
+        self.process_pool = process_pool
+        # 同步调用Grobid时复用keep-alive连接
+        self._session = None
+        # 异步解析时缓存的Grobid可用性 (是否可用, 检查时间)
+        self._grobid_alive = None
     
     def parse(self, pdf_path):
         """解析PDF文件，提取文本内容"""
@@ -19,33 +77,114 @@ class PDFParser:
                 logger.error(f"PDF文件不存在: {pdf_path}")
                 return None
             
+            # 按PDF内容哈希、解析器和解析器版本查找缓存
+            cached = self._lookup_cache(pdf_path, self.default_parser)
+            if cached:
+                return cached
+            
             # 根据配置选择解析器
+            content = None
             if self.default_parser == "grobid" and self._is_grobid_available():
                 logger.info(f"使用Grobid解析PDF: {pdf_path}")
                 content = self._parse_with_grobid(pdf_path)
-            else:
-                logger.info(f"使用PyMuPDF解析PDF: {pdf_path}")
-                content = self._parse_with_pymupdf(pdf_path)
-            
-            if content:
-                logger.info(f"成功解析PDF: {pdf_path}")
-                return content
-            else:
-                logger.warning(f"解析PDF失败，内容为空: {pdf_path}")
+                if content:
+                    return self._finish(pdf_path, "grobid", content)
+            
+            # Grobid不可用或解析失败时回退到PyMuPDF，结果按实际使用的解析器缓存
+            cached = self._lookup_fallback_cache(pdf_path)
+            if cached:
+                return cached
+            logger.info(f"使用PyMuPDF解析PDF: {pdf_path}")
+            content = self._parse_with_pymupdf(pdf_path)
+            return self._finish(pdf_path, "pymupdf", content)
+        except Exception as e:
+            logger.error(f"解析PDF失败: {str(e)}")
+            return None
+    
+    async def parse_async(self, pdf_path, client):
+        """使用异步请求处理器调用Grobid解析PDF（供异步执行器使用），PyMuPDF解析仍在进程池或线程中执行"""
+        try:
+            if not os.path.exists(pdf_path):
+                logger.error(f"PDF文件不存在: {pdf_path}")
                 return None
+            
+            cached = self._lookup_cache(pdf_path, self.default_parser)
+            if cached:
+                return cached
+            
+            if self.default_parser == "grobid" and await self._is_grobid_available_async(client):
+                logger.info(f"使用Grobid解析PDF: {pdf_path}")
+                content = await self._parse_with_grobid_async(pdf_path, client)
+                if content:
+                    return self._finish(pdf_path, "grobid", content)
+            
+            cached = self._lookup_fallback_cache(pdf_path)
+            if cached:
+                return cached
+            logger.info(f"使用PyMuPDF解析PDF: {pdf_path}")
+            content = await self._parse_with_pymupdf_async(pdf_path)
+            return self._finish(pdf_path, "pymupdf", content)
         except Exception as e:
             logger.error(f"解析PDF失败: {str(e)}")
             return None
     
+    def _lookup_cache(self, pdf_path, parser):
+        """按PDF内容哈希、解析器和解析器版本查找缓存的文本"""
+        cache = get_artifact_cache()
+        if not cache.enabled:
+            return None
+        cached = cache.get_text("parsed_text", _cache_key(cache, pdf_path, parser))
+        if cached:
+            logger.info(f"使用缓存的解析结果: {pdf_path}")
+        return cached
+    
+    def _lookup_fallback_cache(self, pdf_path):
+        """默认解析器不是PyMuPDF时，查找之前回退解析缓存的PyMuPDF结果"""
+        if self.default_parser == "pymupdf":
+            return None
+        return self._lookup_cache(pdf_path, "pymupdf")
+    
+    def _finish(self, pdf_path, parser, content):
+        """记录解析结果，并按实际使用的解析器写入缓存"""
+        if content:
+            logger.info(f"成功解析PDF: {pdf_path}")
+            cache = get_artifact_cache()
+            if cache.enabled:
+                cache.put_text("parsed_text", _cache_key(cache, pdf_path, parser), content)
+            return content
+        logger.warning(f"解析PDF失败，内容为空: {pdf_path}")
+        return None
+    
+    def _get_session(self):
+        """获取Grobid请求使用的会话"""
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+        return self._session
+    
     def _is_grobid_available(self):
         """检查Grobid服务是否可用"""
         try:
-            response = requests.get(f"{self.grobid_url}/api/isalive", timeout=5)
+            url = f"{self.grobid_url}/api/isalive"
+            response = get_recorder().http("GET", url, lambda: self._get_session().get(url, timeout=5), kind="grobid")
             return response.status_code == 200
         except Exception:
             logger.warning("Grobid服务不可用，将使用PyMuPDF")
             return False
     
+    async def _is_grobid_available_async(self, client):
+        """异步检查Grobid服务是否可用，结果在有效期内复用"""
+        if self._grobid_alive is not None and time.monotonic() - self._grobid_alive[1] < GROBID_ALIVE_TTL:
+            return self._grobid_alive[0]
+        try:
+            response = await client.get(f"{self.grobid_url}/api/isalive", timeout=5)
+            alive = response.status_code == 200
+        except Exception:
+            logger.warning("Grobid服务不可用，将使用PyMuPDF")
+            alive = False
+        self._grobid_alive = (alive, time.monotonic())
+        return alive
+    
     def _parse_with_grobid(self, pdf_path):
         """使用Grobid解析PDF"""
         try:
@@ -55,14 +194,15 @@ class PDFParser:
             # 准备文件
             with open(pdf_path, 'rb') as f:
                 files = {'input': f}
+                data = {'consolidateCitations': '1'}
                 
-                # 发送请求
-                response = requests.post(
+                # 发送请求（录制按PDF内容寻址，与文件路径无关）
+                response = get_recorder().http("POST", url, lambda: self._get_session().post(
                     url, 
                     files=files,
-                    data={'consolidateCitations': '1'},
+                    data=data,
                     timeout=60
-                )
+                ), body={"pdf": get_artifact_cache().file_hash(pdf_path), "data": data}, kind="grobid")
                 
                 # 检查响应
                 response.raise_for_status()
@@ -71,9 +211,29 @@ class PDFParser:
                 xml_content = response.text
                 return self._extract_text_from_grobid_xml(xml_content)
         except Exception as e:
-            logger.error(f"使用Grobid解析失败: {str(e)}")
-            # 失败时回退到PyMuPDF
-            return self._parse_with_pymupdf(pdf_path)
+            # 失败时由调用方回退到PyMuPDF
+            logger.error(f"使用Grobid解析失败，将使用PyMuPDF: {str(e)}")
+            return None
+    
+    async def _parse_with_grobid_async(self, pdf_path, client):
+        """使用异步请求处理器调用Grobid解析PDF，失败时返回None（由调用方回退到PyMuPDF）"""
+        try:
+            url = f"{self.grobid_url}/api/processFulltextDocument"
+            with open(pdf_path, 'rb') as f:
+                pdf_bytes = f.read()
+            data = {'consolidateCitations': '1'}
+            # 录制按PDF内容寻址，与同步调用的录制键相同
+            response = await client.post(
+                url,
+                data=data,
+                files={'input': (os.path.basename(pdf_path), pdf_bytes)},
+                timeout=60,
+                record_body={"pdf": get_artifact_cache().file_hash(pdf_path), "data": data}
+            )
+            return self._extract_text_from_grobid_xml(response.text)
+        except Exception as e:
+            logger.error(f"使用Grobid解析失败，将使用PyMuPDF: {str(e) or type(e).__name__}")
+            return None
     
     def _extract_text_from_grobid_xml(self, xml_content):
         """从Grobid XML中提取文本"""
@@ -111,49 +271,26 @@ class PDFParser:
     def _parse_with_pymupdf(self, pdf_path):
         """使用PyMuPDF解析PDF"""
         try:
-            # 打开PDF文件
-            doc = fitz.open(pdf_path)
-            
-            # 提取文本
-            text_parts = []
-            
-            # 提取标题（通常在第一页）
-            if doc.page_count > 0:
-                first_page = doc[0]
-                title_text = first_page.get_text("text")
-                # 取前几行作为标题
-                title_lines = title_text.strip().split('\n')[:3]
-                title = ' '.join(title_lines)
-                text_parts.append(f"Title: {title}")
-            
-            # 提取摘要（通常在标题之后）
-            if doc.page_count > 0:
-                first_page = doc[0]
-                abstract_text = first_page.get_text("text")
-                # 简单处理，假设摘要在标题之后
-                text_parts.append(f"Abstract: {abstract_text}")
-            
-            # 提取正文
-            body_text = []
-            for page_num in range(doc.page_count):
-                page = doc[page_num]
-                text = page.get_text("text")
-                body_text.append(text)
-            
-            text_parts.append('\n'.join(body_text))
-            
-            # 关闭文档
-            doc.close()
-            
-            # 组合内容
-            content = '\n\n'.join(text_parts)
-            return content
+            if self.process_pool is not None:
+                return self.process_pool.submit(extract_text_with_pymupdf, pdf_path).result()
+            return extract_text_with_pymupdf(pdf_path)
+        except Exception as e:
+            logger.error(f"使用PyMuPDF解析失败: {str(e)}")
+            return None
+    
+    async def _parse_with_pymupdf_async(self, pdf_path):
+        """在进程池（或线程）中使用PyMuPDF解析，不阻塞事件循环"""
+        try:
+            if self.process_pool is not None:
+                return await asyncio.wrap_future(self.process_pool.submit(extract_text_with_pymupdf, pdf_path))
+            return await asyncio.to_thread(extract_text_with_pymupdf, pdf_path)
         except Exception as e:
             logger.error(f"使用PyMuPDF解析失败: {str(e)}")
             return None
     
     def extract_metadata(self, pdf_path):
         """提取PDF元数据"""
+        import fitz  # PyMuPDF
         try:
             doc = fitz.open(pdf_path)
             metadata = doc.metadata
@@ -0,0 +1,56 @@
+import os
+import hashlib
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TextStore:
+    """解析文本落盘存储：论文字典只保存文本文件路径，各阶段需要时再读取"""
+    
+    def __init__(self, path="data/text"):
+        self.path = path
+        os.makedirs(self.path, exist_ok=True)
+    
+    def _text_path(self, paper_key):
+        digest = hashlib.sha1(paper_key.encode('utf-8')).hexdigest()
+        return os.path.join(self.path, digest[:2], f"{digest}.txt")
+    
+    def put(self, paper_key, text):
+        """写入论文的解析文本，返回文件路径"""
+        text_path = self._text_path(paper_key)
+        os.makedirs(os.path.dirname(text_path), exist_ok=True)
+        # 先写临时文件再原子替换，避免续跑时读到半个文件
+        tmp_path = f"{text_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, text_path)
+        return text_path
+    
+    @staticmethod
+    def load(text_path):
+        """读取解析文本，文件不存在时返回None"""
+        try:
+            with open(text_path, 'r', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            logger.warning(f"解析文本文件不存在: {text_path}")
+            return None
+    
+    @staticmethod
+    def delete(text_path):
+        """删除解析文本文件"""
+        try:
+            os.remove(text_path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"删除解析文本失败: {text_path} - {str(e)}")
+
+def load_paper_content(paper):
+    """获取论文全文：兼容直接保存content的旧记录和保存content_path的新记录"""
+    if paper.get("content"):
+        return paper["content"]
+    if paper.get("content_path"):
+        return TextStore.load(paper["content_path"])
+    return None
@@ -1,7 +1,18 @@
-from .generator import ReportGenerator
-from .visualization import VisualizationManager
+import importlib
+
+# 延迟导入：matplotlib、jinja2 只在生成报告时加载
+_LAZY_ATTRS = {
+    "ReportGenerator": ".generator",
+    "VisualizationManager": ".visualization"
+}
 
 __all__ = [
     "ReportGenerator",
     "VisualizationManager"
 ]
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        module = importlib.import_module(_LAZY_ATTRS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,7 +1,6 @@
 import os
 import datetime
 import logging
-from jinja2 import Template
 from src.core.config import config_manager
 from src.database.db_manager import DatabaseManager
 from src.database.queries import PaperQueries
@@ -23,26 +22,35 @@ class ReportGenerator:
         self.prompt_manager = PromptManager()
         self.visualization = VisualizationManager()
     
-    def generate(self):
-        """生成报告"""
+    def generate(self, domain=None, start_year=None, end_year=None):
+        """生成报告，指定domain时只包含标记为该领域的论文"""
         try:
             # 获取研究领域和时间范围
-            domain = self.config.get_research_domain()
-            start_year, end_year = self.config.get_time_range()
+            default_start, default_end = self.config.get_time_range()
+            start_year = start_year or default_start
+            end_year = end_year or default_end
             
             # 获取论文数据
-            papers = self.db_manager.get_all_papers()
+            scoped = domain is not None
+            if scoped:
+                papers = self.db_manager.get_papers_by_domain(domain)
+            else:
+                domain = self.config.get_research_domain()
+                papers = self.db_manager.get_all_papers()
             if not papers:
-                logger.warning("没有论文数据，无法生成报告")
+                logger.warning(f"没有论文数据，无法生成报告: {domain}")
                 return None
             
             # 获取统计信息
-            stats = self.paper_queries.get_papers_statistics()
+            if scoped:
+                stats = self._get_papers_statistics(papers)
+            else:
+                stats = self.paper_queries.get_papers_statistics()
             
-            # 生成图表
+            # 生成图表（多领域时图表文件名带领域前缀，避免互相覆盖）
             charts = {}
             if self.generate_charts:
-                charts = self._generate_charts(stats)
+                charts = self._generate_charts(stats, prefix=self._safe_name(domain) if scoped else "")
             
             # 生成论文摘要
             papers_summary = self._generate_papers_summary(papers)
@@ -61,17 +69,38 @@ class ReportGenerator:
             logger.error(f"生成报告失败: {str(e)}")
             return None
     
-    def _generate_charts(self, stats):
+    def _get_papers_statistics(self, papers):
+        """按给定论文列表计算统计信息（字段与PaperQueries.get_papers_statistics一致）"""
+        citations = [paper["citations"] for paper in papers if paper.get("citations") is not None]
+        yearly_distribution = {}
+        source_distribution = {}
+        for paper in papers:
+            year = paper.get("publish_year")
+            yearly_distribution[year] = yearly_distribution.get(year, 0) + 1
+            source = paper.get("source")
+            source_distribution[source] = source_distribution.get(source, 0) + 1
+        
+        return {
+            "total_papers": len(papers),
+            "with_pdf": sum(1 for paper in papers if paper.get("pdf_path") is not None),
+            "with_llm_analysis": sum(1 for paper in papers if paper.get("research_problem") is not None),
+            "open_source": sum(1 for paper in papers if paper.get("is_open_source")),
+            "average_citations": round(sum(citations) / len(citations), 2) if citations else 0,
+            "yearly_distribution": dict(sorted(yearly_distribution.items(), key=lambda item: item[0] or 0)),
+            "source_distribution": source_distribution
+        }
+    
+    def _generate_charts(self, stats, prefix=""):
         """生成图表"""
         charts = {}
         
         # 生成年度分布图表
-        yearly_chart = self.visualization.generate_yearly_chart(stats.get("yearly_distribution", {}))
+        yearly_chart = self.visualization.generate_yearly_chart(stats.get("yearly_distribution", {}), prefix=prefix)
         if yearly_chart:
             charts["yearly"] = yearly_chart
         
         # 生成来源分布图表
-        source_chart = self.visualization.generate_source_chart(stats.get("source_distribution", {}))
+        source_chart = self.visualization.generate_source_chart(stats.get("source_distribution", {}), prefix=prefix)
         if source_chart:
             charts["source"] = source_chart
         
@@ -111,6 +140,7 @@ class ReportGenerator:
     
     def _generate_from_template(self, domain, start_year, end_year, papers, stats, charts):
         """从模板生成报告"""
+        from jinja2 import Template
         # 读取模板文件
         template_path = os.path.join(os.path.dirname(__file__), "templates", "report_template.md")
         
@@ -196,11 +226,11 @@ class ReportGenerator:
 - {{ paper.title }} ({{ paper.publish_year }})
 {% endfor %}
 """
-    
+
     def _save_report(self, content, domain, start_year, end_year):
         """保存报告"""
         # 生成文件名
-        safe_domain = "".join(c for c in domain if c.isalnum() or c in " -_")
+        safe_domain = self._safe_name(domain)
         filename = f"{safe_domain}_{start_year}-{end_year}_{datetime.datetime.now().strftime('%Y%m%d')}.md"
         report_path = os.path.join(self.output_path, filename)
         
@@ -209,3 +239,8 @@ class ReportGenerator:
             f.write(content)
         
         return report_path
+    
+    @staticmethod
+    def _safe_name(domain):
+        """领域名称中可用于文件名的部分"""
+        return "".join(c for c in domain if c.isalnum() or c in " -_")
@@ -1,5 +1,4 @@
 import os
-import matplotlib.pyplot as plt
 import logging
 from src.core.config import config_manager
 
@@ -14,7 +13,12 @@ class VisualizationManager:
         # 确保图表目录存在
         os.makedirs(self.output_path, exist_ok=True)
     
-    def generate_yearly_chart(self, yearly_distribution):
+    def _pyplot(self):
+        """延迟导入matplotlib，只有生成图表时才加载"""
+        import matplotlib.pyplot as plt
+        return plt
+    
+    def generate_yearly_chart(self, yearly_distribution, prefix=""):
         """生成年度分布图表"""
         try:
             if not yearly_distribution:
@@ -26,6 +30,7 @@ class VisualizationManager:
             counts = [yearly_distribution[year] for year in years]
             
             # 创建图表
+            plt = self._pyplot()
             plt.figure(figsize=(10, 6))
             plt.bar(years, counts, color='skyblue')
             plt.title('Annual Paper Distribution')
@@ -35,7 +40,7 @@ class VisualizationManager:
             plt.tight_layout()
             
             # 保存图表
-            chart_path = os.path.join(self.output_path, "yearly_distribution.png")
+            chart_path = os.path.join(self.output_path, f"{prefix}_yearly_distribution.png" if prefix else "yearly_distribution.png")
             plt.savefig(chart_path)
             plt.close()
             
@@ -45,7 +50,7 @@ class VisualizationManager:
             logger.error(f"生成年度分布图表失败: {str(e)}")
             return None
     
-    def generate_source_chart(self, source_distribution):
+    def generate_source_chart(self, source_distribution, prefix=""):
         """生成来源分布图表"""
         try:
             if not source_distribution:
@@ -57,6 +62,7 @@ class VisualizationManager:
             counts = list(source_distribution.values())
             
             # 创建图表
+            plt = self._pyplot()
             plt.figure(figsize=(10, 6))
             plt.pie(counts, labels=sources, autopct='%1.1f%%', startangle=90)
             plt.title('Source Distribution')
@@ -64,7 +70,7 @@ class VisualizationManager:
             plt.tight_layout()
             
             # 保存图表
-            chart_path = os.path.join(self.output_path, "source_distribution.png")
+            chart_path = os.path.join(self.output_path, f"{prefix}_source_distribution.png" if prefix else "source_distribution.png")
             plt.savefig(chart_path)
             plt.close()
             
@@ -93,6 +99,7 @@ class VisualizationManager:
             citations = [paper[1] for paper in top_papers]
             
             # 创建图表
+            plt = self._pyplot()
             plt.figure(figsize=(12, 8))
             plt.barh(titles, citations, color='lightgreen')
             plt.title('Top 10 Most Cited Papers')